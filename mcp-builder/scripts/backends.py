@@ -0,0 +1,273 @@
+"""Model backends for the evaluation harness.
+
+A backend produces the next model turn of the agent loop: given the system
+prompt, the conversation and the tool list, it returns an Anthropic Message
+and the turn's latency and token usage.
+
+    AnthropicBackend   Claude through the Messages API, streamed
+    ScriptedBackend    deterministic offline stand-in: configured tool_use
+                       turns, then a final <response>, with tunable latency;
+                       no network, no API key
+
+The scripted backend drives the harness and the MCP server the way a real
+model would, so harness overhead and concurrency limits can be measured
+offline (see bench_harness.py).
+"""
+
+import asyncio
+import json
+import random
+import time
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any
+
+from anthropic import AsyncAnthropic
+from anthropic.types import Message
+
+CACHE_CONTROL = {"type": "ephemeral"}
+BACKENDS = ("anthropic", "scripted")
+
+
+def usage_turn(response: Message, start_ts: float, duration: float, ttft: float) -> dict[str, Any]:
+    """Metrics of one model turn: latency split and token usage."""
+    usage = response.usage
+    return {
+        "start": start_ts,
+        "duration": duration,
+        "ttft": ttft,
+        "generation_time": duration - ttft,
+        "input_tokens": usage.input_tokens,
+        "output_tokens": usage.output_tokens,
+        "cache_read_input_tokens": getattr(usage, "cache_read_input_tokens", None) or 0,
+        "cache_creation_input_tokens": getattr(usage, "cache_creation_input_tokens", None) or 0,
+    }
+
+
+def with_cache_breakpoint(messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Copy of messages with a cache breakpoint on the last block.
+
+    The next turn then reads the whole conversation so far from the cache and
+    only the new tool results are processed.
+    """
+    last = messages[-1]
+    content = last["content"]
+    if isinstance(content, str):
+        content = [{"type": "text", "text": content}]
+    content = [*content[:-1], {**content[-1], "cache_control": CACHE_CONTROL}]
+    return [*messages[:-1], {**last, "content": content}]
+
+
+class ModelBackend(ABC):
+    """Base class for model backends."""
+
+    @abstractmethod
+    async def create_message(
+        self,
+        model: str,
+        system: str,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]],
+        prompt_cache: bool = True,
+    ) -> tuple[Message, dict[str, Any]]:
+        """Produce the next model turn; returns the response and the turn's metrics (see usage_turn)."""
+
+
+class AnthropicBackend(ModelBackend):
+    """Claude through the Messages API, streamed through the async client."""
+
+    def __init__(self, client: AsyncAnthropic | None = None):
+        self.client = client or AsyncAnthropic()
+
+    async def create_message(
+        self,
+        model: str,
+        system: str,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]],
+        prompt_cache: bool = True,
+    ) -> tuple[Message, dict[str, Any]]:
+        """Stream the next model turn.
+
+        With prompt_cache, breakpoints on the tool list, the system prompt and the
+        conversation prefix let every turn after the first reuse the cached prompt.
+        Latency is split into time to first token (prompt processing and queueing)
+        and generation time (first token to end of stream).
+        """
+        if prompt_cache:
+            system = [{"type": "text", "text": system, "cache_control": CACHE_CONTROL}]
+            if tools:
+                tools = [*tools[:-1], {**tools[-1], "cache_control": CACHE_CONTROL}]
+            messages = with_cache_breakpoint(messages)
+
+        start_ts = time.time()
+        first_token_ts = None
+        async with self.client.messages.stream(
+            model=model,
+            max_tokens=4096,
+            system=system,
+            messages=messages,
+            tools=tools,
+        ) as stream:
+            async for event in stream:
+                if first_token_ts is None and event.type == "content_block_delta":
+                    first_token_ts = time.time()
+            response = await stream.get_final_message()
+        end_ts = time.time()
+        first_token_ts = first_token_ts or end_ts
+        return response, usage_turn(response, start_ts, end_ts - start_ts, first_token_ts - start_ts)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=lambda o: o.model_dump(mode="json", exclude_none=True))
+
+
+def _fill(value: Any, fields: dict[str, str]) -> Any:
+    """Replace {question} / {last_result} placeholders in the strings of a JSON value."""
+    if isinstance(value, str):
+        for name, text in fields.items():
+            value = value.replace("{" + name + "}", text)
+        return value
+    if isinstance(value, dict):
+        return {key: _fill(item, fields) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_fill(item, fields) for item in value]
+    return value
+
+
+def _result_text(content: Any) -> str:
+    """Text of a tool result: the text blocks of serialized MCP content, or the raw string."""
+    try:
+        blocks = json.loads(content)
+    except (TypeError, ValueError):
+        return str(content)
+    if isinstance(blocks, list):
+        return "\n".join(b.get("text", "") for b in blocks if isinstance(b, dict))
+    return str(content)
+
+
+class ScriptedBackend(ModelBackend):
+    """Deterministic model stand-in for offline runs and benchmarks.
+
+    `turns` is a list of turns, each a list of tool calls ({"name": ..., "input": {...}})
+    made at once. After the last one the backend answers with `response`
+    wrapped in <summary>/<feedback>/<response> tags. Strings in tool inputs
+    and in the response may use {question} (the task's question) and
+    {last_result} (text of the latest tool result).
+
+    Each turn waits `ttft` seconds, then `generation_time` seconds; with
+    `jitter`, both vary by up to that fraction, seeded by the question and
+    turn number so reruns wait exactly as long. Token counts are estimated
+    at four characters per token.
+    """
+
+    def __init__(
+        self,
+        turns: list[list[dict[str, Any]]] | None = None,
+        response: str = "NOT_FOUND",
+        ttft: float = 0.0,
+        generation_time: float = 0.0,
+        jitter: float = 0.0,
+        seed: int = 0,
+    ):
+        self.turns = self._check_turns(turns or [])
+        if not isinstance(response, str):
+            raise ValueError(f"response must be a string, got {type(response).__name__}")
+        for name, value in (("ttft", ttft), ("generation_time", generation_time), ("jitter", jitter)):
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+                raise ValueError(f"{name} must be a non-negative number, got {value!r}")
+        self.response = response
+        self.ttft = ttft
+        self.generation_time = generation_time
+        self.jitter = jitter
+        self.seed = seed
+
+    @staticmethod
+    def _check_turns(turns: Any) -> list[list[dict[str, Any]]]:
+        """Validate `turns` (a list of turns, each a list of calls); raises ValueError naming the bad entry."""
+        if not isinstance(turns, list):
+            raise ValueError(f"turns must be a list of turns, got {type(turns).__name__}")
+        for i, turn in enumerate(turns):
+            if not isinstance(turn, list):
+                raise ValueError(
+                    f"turns[{i}] must be a list of tool calls, got {type(turn).__name__} "
+                    '(turns is a list of turns, e.g. [[{"name": "search", "input": {...}}]])'
+                )
+            for j, call in enumerate(turn):
+                if not isinstance(call, dict) or not isinstance(call.get("name"), str) or not call["name"]:
+                    raise ValueError(f'turns[{i}][{j}] must be an object with a "name" string, got {call!r}')
+                if not isinstance(call.get("input", {}), dict):
+                    raise ValueError(f'turns[{i}][{j}]["input"] must be an object, got {call["input"]!r}')
+        return turns
+
+    @classmethod
+    def from_file(cls, path: Path) -> "ScriptedBackend":
+        """Load a script: a JSON object with the constructor's arguments. Raises ValueError if malformed."""
+        script = json.loads(path.read_text())
+        if not isinstance(script, dict):
+            raise ValueError(f"script must be a JSON object, got {type(script).__name__}")
+        unknown = set(script) - {"turns", "response", "ttft", "generation_time", "jitter", "seed"}
+        if unknown:
+            raise ValueError(f"unknown script keys: {', '.join(sorted(unknown))}")
+        return cls(**script)
+
+    def _latency(self, question: str, turn_index: int) -> tuple[float, float]:
+        if not self.jitter:
+            return self.ttft, self.generation_time
+        rng = random.Random(f"{self.seed}:{turn_index}:{question}")
+        return tuple(value * (1 + rng.uniform(-self.jitter, self.jitter))
+                     for value in (self.ttft, self.generation_time))
+
+    async def create_message(
+        self,
+        model: str,
+        system: str,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]],
+        prompt_cache: bool = True,
+    ) -> tuple[Message, dict[str, Any]]:
+        """Next scripted turn, chosen by the number of assistant turns so far."""
+        question = messages[0]["content"]
+        turn_index = sum(1 for message in messages if message["role"] == "assistant")
+        last_result = ""
+        if messages[-1]["role"] == "user" and isinstance(messages[-1]["content"], list):
+            results = [b["content"] for b in messages[-1]["content"] if b.get("type") == "tool_result"]
+            last_result = _result_text(results[-1]) if results else ""
+        fields = {"question": question, "last_result": last_result}
+
+        if turn_index < len(self.turns):
+            content = [
+                {"type": "tool_use", "id": f"toolu_scripted_{turn_index}_{i}", "name": call["name"],
+                 "input": _fill(call.get("input", {}), fields)}
+                for i, call in enumerate(self.turns[turn_index])
+            ]
+            stop_reason = "tool_use"
+        else:
+            calls = sum(len(turn) for turn in self.turns)
+            text = (f"<summary>Scripted run: {calls} tool calls in {len(self.turns)} turns.</summary>\n"
+                    f"<feedback>N/A (scripted backend)</feedback>\n"
+                    f"<response>{_fill(self.response, fields)}</response>")
+            content = [{"type": "text", "text": text}]
+            stop_reason = "end_turn"
+
+        ttft, generation_time = self._latency(question, turn_index)
+        start_ts = time.time()
+        await asyncio.sleep(ttft)
+        first_token_ts = time.time()
+        await asyncio.sleep(generation_time)
+        end_ts = time.time()
+
+        response = Message.model_validate({
+            "id": f"msg_scripted_{turn_index}",
+            "type": "message",
+            "role": "assistant",
+            "model": model,
+            "content": content,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": len(_dumps([system, messages, tools])) // 4,
+                "output_tokens": len(_dumps(content)) // 4,
+            },
+        })
+        return response, usage_turn(response, start_ts, end_ts - start_ts, first_token_ts - start_ts)
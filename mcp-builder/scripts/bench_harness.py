@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark of the evaluation harness against a local stdio MCP server.
+
+Runs evaluation.run_evaluation with the scripted model backend (no network,
+no API key) against bench_server.py, once per concurrency level, and
+measures:
+
+    throughput    tasks per second, and speedup / efficiency against the
+                  first concurrency level
+    overhead      per task, the time not spent in (scripted) model turns or
+                  tool calls ("harness" phase), and the task duration beyond
+                  the scripted ideal (which also counts event loop and
+                  server queueing delays)
+    ceiling       the highest concurrency whose efficiency stays at or above
+                  --efficiency
+
+Each task makes --tool-turns turns of --calls-per-turn echo calls, then
+answers with the last echo, so every task should score.
+
+Usage:
+    python bench_harness.py [--tasks 128] [--concurrency 1,4,16,64] [--ttft 0.03] [--generation 0.02]
+    python bench_harness.py --ttft 0 --generation 0 --tool-delay 0     # pure harness cost
+    python bench_harness.py --shared                                    # one session for all tasks
+
+Stdout: one JSON line per run, then a summary line. Stderr: a table.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from backends import ScriptedBackend
+from connections import MCPConnectionPool, create_connection
+from evaluation import run_evaluation
+
+
+def parse_int_list(text):
+    return [int(v) for v in text.split(",") if v.strip()]
+
+
+def write_evaluation(path: Path, tasks: int, payload: int) -> None:
+    """Evaluation file whose answers are what bench_server.py echoes back."""
+    pairs = []
+    for i in range(tasks):
+        question = f"bench task {i}"
+        pairs.append(f"<qa_pair><question>{escape(question)}</question>"
+                     f"<answer>{escape(question.ljust(payload, '.'))}</answer></qa_pair>")
+    path.write_text("<evaluation>" + "".join(pairs) + "</evaluation>")
+
+
+async def run_level(eval_path: Path, concurrency: int, args) -> dict:
+    """One evaluation run at a concurrency level; returns the measurement row."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_server.py")
+
+    def connect():
+        return create_connection(
+            transport="stdio",
+            command=sys.executable,
+            args=[script, "--delay", str(args.tool_delay), "--payload", str(args.payload)],
+        )
+
+    connection = connect() if args.shared or concurrency == 1 else MCPConnectionPool(connect, size=concurrency)
+    backend = ScriptedBackend(
+        turns=[[{"name": "echo", "input": {"text": "{question}"}}] * args.calls_per_turn] * args.tool_turns,
+        response="{last_result}",
+        ttft=args.ttft,
+        generation_time=args.generation,
+        jitter=args.jitter,
+    )
+
+    async with connection:
+        started, cpu_started = time.perf_counter(), time.process_time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, metrics = await run_evaluation(
+                eval_path, connection, "scripted", concurrency, prompt_cache=False, backend=backend,
+            )
+        seconds, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+
+    tasks = metrics["run"]["tasks"]
+    ideal = (args.tool_turns + 1) * (args.ttft + args.generation) + args.tool_turns * args.tool_delay
+    duration = metrics["task_duration"]
+    harness = metrics["phases"]["harness"]
+    return {
+        "concurrency": concurrency,
+        "sessions": metrics["run"]["sessions"],
+        "tasks": tasks,
+        "correct": metrics["run"]["correct"],
+        "seconds": round(seconds, 3),
+        "cpuSeconds": round(cpu, 3),
+        "tasksPerSecond": round(tasks / seconds, 2),
+        "startupSeconds": round(metrics["run"]["session_startup_time"], 3),
+        "idealTaskSeconds": round(ideal, 4),
+        "taskP50": round(duration["p50"], 4),
+        "taskP99": round(duration["p99"], 4),
+        "excessMean": round(duration["mean"] - ideal, 4),
+        "harnessMean": round(harness["mean"], 4),
+        "harnessP99": round(harness["p99"], 4),
+        "cpuPerTaskMs": round(cpu / tasks * 1000, 2),
+    }
+
+
+def bench(args):
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        eval_path = Path(tmp) / "bench.xml"
+        write_evaluation(eval_path, args.tasks, args.payload)
+        for concurrency in args.concurrency:
+            row = asyncio.run(run_level(eval_path, concurrency, args))
+            rows.append(row)
+            print(json.dumps(row), flush=True)
+
+    base = rows[0]
+    ceiling = base["concurrency"]
+    for row in rows:
+        row["speedup"] = row["tasksPerSecond"] / base["tasksPerSecond"]
+        row["efficiency"] = row["speedup"] / (row["concurrency"] / base["concurrency"])
+        if row["efficiency"] >= args.efficiency:
+            ceiling = max(ceiling, row["concurrency"])
+
+    print(f"\n{'conc':>5} {'tasks/s':>8} {'speedup':>8} {'eff':>5} {'task p50':>9} {'task p99':>9} "
+          f"{'excess':>8} {'harness':>8} {'cpu/task':>9} correct", file=sys.stderr)
+    for row in rows:
+        print(f"{row['concurrency']:>5} {row['tasksPerSecond']:>8.1f} {row['speedup']:>7.1f}x "
+              f"{row['efficiency']:>5.2f} {row['taskP50']:>8.3f}s {row['taskP99']:>8.3f}s "
+              f"{row['excessMean'] * 1000:>6.1f}ms {row['harnessMean'] * 1000:>6.1f}ms "
+              f"{row['cpuPerTaskMs']:>7.2f}ms {row['correct']}/{row['tasks']}", file=sys.stderr)
+    print(f"\nConcurrency ceiling (efficiency >= {args.efficiency}): {ceiling}", file=sys.stderr)
+    print(json.dumps({"type": "summary", "benchmark": "harness", "ceiling": ceiling,
+                      "efficiencyThreshold": args.efficiency, "shared": args.shared,
+                      "allCorrect": all(r["correct"] == r["tasks"] for r in rows)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline harness benchmark with the scripted model backend.")
+    parser.add_argument("--tasks", type=int, default=128, help="Tasks per run (default: 128)")
+    parser.add_argument("--concurrency", type=parse_int_list, default=[1, 4, 16, 64],
+                        help="Comma-separated concurrency levels (default: 1,4,16,64)")
+    parser.add_argument("--ttft", type=float, default=0.03, help="Scripted time to first token, seconds (default: 0.03)")
+    parser.add_argument("--generation", type=float, default=0.02, help="Scripted generation time, seconds (default: 0.02)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Scripted latency jitter fraction (default: 0)")
+    parser.add_argument("--tool-turns", type=int, default=2, help="Turns with tool calls per task (default: 2)")
+    parser.add_argument("--calls-per-turn", type=int, default=2, help="Parallel tool calls per turn (default: 2)")
+    parser.add_argument("--tool-delay", type=float, default=0.01, help="Server time per tool call, seconds (default: 0.01)")
+    parser.add_argument("--payload", type=int, default=0, help="Tool response size in bytes (default: 0)")
+    parser.add_argument("--shared", action="store_true",
+                        help="Share one MCP session between all tasks instead of one session per concurrent task")
+    parser.add_argument("--efficiency", type=float, default=0.8,
+                        help="Efficiency threshold for the concurrency ceiling (default: 0.8)")
+    args = parser.parse_args()
+    bench(args)
+
+
+if __name__ == "__main__":
+    main()
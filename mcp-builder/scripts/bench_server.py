@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Minimal stdio MCP server for offline harness benchmarks.
+
+Tools:
+    echo(text)     returns text, padded with "." to --payload bytes,
+                   after sleeping --delay seconds
+    fail(message)  raises, to exercise tool error handling
+
+Usage:
+    python bench_server.py [--delay 0.01] [--payload 0]
+"""
+
+import argparse
+import asyncio
+
+from mcp.server.fastmcp import FastMCP
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimal stdio MCP server for harness benchmarks.")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds each tool call takes (default: 0)")
+    parser.add_argument("--payload", type=int, default=0, help="Pad echo responses to this many bytes (default: 0)")
+    args = parser.parse_args()
+
+    mcp = FastMCP("bench")
+
+    @mcp.tool()
+    async def echo(text: str) -> str:
+        """Return the given text unchanged (padded to the configured payload size)."""
+        await asyncio.sleep(args.delay)
+        return text.ljust(args.payload, ".")
+
+    @mcp.tool()
+    async def fail(message: str) -> str:
+        """Always fail with the given message."""
+        await asyncio.sleep(args.delay)
+        raise ValueError(message)
+
+    mcp.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+"""Record and replay model turns and tool calls of evaluation runs.
+
+A cassette is a JSONL file with one record per model turn, tool call or tool
+listing, keyed by a hash of the request. Modes:
+
+    record  call the model and the MCP server, and save every exchange
+    replay  serve everything from the cassette; no model API, no server
+    hybrid  serve model turns from the cassette, call the real tools
+
+Replay measures the harness alone; hybrid measures the tool server alone,
+with the model's answers fixed. Tool results are left out of the model
+request key (their tool_use IDs stay in), so a hybrid run follows the recorded
+conversation even when live tool output differs from the recording.
+"""
+
+import hashlib
+import json
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+from anthropic.types import Message
+
+MODES = ("record", "replay", "hybrid")
+
+
+class CassetteMiss(LookupError):
+    """No recorded exchange matches the request."""
+
+
+def to_json(value: Any) -> Any:
+    """Plain JSON value of anything holding pydantic models (content blocks, messages)."""
+    return json.loads(json.dumps(value, default=lambda o: o.model_dump(mode="json", exclude_none=True)))
+
+
+def request_key(kind: str, request: Any) -> str:
+    """Hash of a request's canonical JSON."""
+    canonical = json.dumps([kind, to_json(request)], sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def model_request(model: str, system: str, messages: list[dict[str, Any]], tools: list[dict[str, Any]]) -> dict[str, Any]:
+    """The parts of a model request that identify it, with tool result contents left out."""
+    normalized = []
+    for message in to_json(messages):
+        content = message["content"]
+        if isinstance(content, list):
+            content = [
+                {"type": "tool_result", "tool_use_id": block["tool_use_id"]} if block.get("type") == "tool_result" else block
+                for block in content
+            ]
+        normalized.append({"role": message["role"], "content": content})
+    return {"model": model, "system": system, "messages": normalized, "tools": tools}
+
+
+class Cassette:
+    """Recorded exchanges, indexed by request key.
+
+    The same request can be recorded several times (repeated questions, or
+    the same tool call with the same arguments); replay serves its recordings
+    in order and repeats the last one once they run out.
+    """
+
+    def __init__(self, path: Path, mode: str):
+        if mode not in MODES:
+            raise ValueError(f"Unsupported cassette mode: {mode}. Use one of {', '.join(MODES)}.")
+        self.path = path
+        self.mode = mode
+        self.recorded = 0
+        self.replayed = 0
+        self._index = {}
+        self._served = {}
+
+    @property
+    def replays_model(self) -> bool:
+        return self.mode in ("replay", "hybrid")
+
+    @property
+    def replays_tools(self) -> bool:
+        return self.mode == "replay"
+
+    def load(self) -> None:
+        """Index the cassette file for replay."""
+        with self.path.open(encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                self._index.setdefault(record["key"], []).append(record)
+
+    def start(self, append: bool = False) -> None:
+        """Start recording; a new recording replaces the file unless `append`."""
+        if not append:
+            self.path.write_text("")
+
+    def record(self, kind: str, key: str, **fields: Any) -> None:
+        """Append one exchange to the cassette."""
+        with self.path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps({"type": kind, "key": key, **to_json(fields)}) + "\n")
+        self.recorded += 1
+
+    def replay(self, kind: str, key: str) -> dict[str, Any]:
+        """Next recording for a request key; raises CassetteMiss if there is none."""
+        records = self._index.get(key)
+        if not records:
+            raise CassetteMiss(f"No recorded {kind} matches this request in {self.path} "
+                               "(recorded with a different model, question or tool list?)")
+        served = self._served.get(key, 0)
+        self._served[key] = served + 1
+        self.replayed += 1
+        return records[min(served, len(records) - 1)]
+
+    def record_message(self, request: dict[str, Any], response: Message, turn: dict[str, Any]) -> None:
+        """Save a model response with its latency and token usage as measured."""
+        turn = {key: value for key, value in turn.items() if key != "start"}
+        self.record("model", request_key("model", request), response=response, turn=turn)
+
+    def replay_message(self, request: dict[str, Any]) -> Message:
+        """Recorded model response for a request built by model_request()."""
+        record = self.replay("model turn", request_key("model", request))
+        return Message.model_validate(record["response"])
+
+    def describe(self) -> dict[str, Any]:
+        return {"path": str(self.path), "mode": self.mode}
+
+
+class CassetteConnection:
+    """MCP connection (or pool) that records or replays tool listings and calls.
+
+    In replay mode there is no underlying connection at all.
+    """
+
+    def __init__(self, cassette: Cassette, connection: Any = None):
+        self.cassette = cassette
+        self.connection = connection
+        self.startup_time = 0.0
+
+    @property
+    def session_startup_times(self) -> list[float]:
+        if self.connection is None:
+            return [0.0]
+        return getattr(self.connection, "session_startup_times", None) or [self.connection.startup_time]
+
+    @property
+    def replaced(self) -> int:
+        return getattr(self.connection, "replaced", 0)
+
+    async def __aenter__(self):
+        if self.connection is not None:
+            await self.connection.__aenter__()
+            self.startup_time = self.connection.startup_time
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self.connection is not None:
+            await self.connection.__aexit__(exc_type, exc_val, exc_tb)
+
+    @asynccontextmanager
+    async def lease(self):
+        """Lease a connection of the underlying pool, wrapped the same way."""
+        if self.connection is None:
+            yield self
+            return
+        async with self.connection.lease() as connection:
+            yield CassetteConnection(self.cassette, connection)
+
+    async def list_tools(self) -> list[dict[str, Any]]:
+        key = request_key("tools", None)
+        if self.cassette.replays_tools:
+            return self.cassette.replay("tool list", key)["tools"]
+        tools = await self.connection.list_tools()
+        if self.cassette.mode == "record":
+            self.cassette.record("tools", key, tools=tools)
+        return tools
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any]) -> Any:
+        key = request_key("tool", {"name": tool_name, "arguments": arguments})
+        if self.cassette.replays_tools:
+            record = self.cassette.replay("tool call", key)
+            if record["error"] is not None:
+                raise RuntimeError(record["error"])
+            return record["result"]
+        if self.cassette.mode != "record":
+            return await self.connection.call_tool(tool_name, arguments)
+        try:
+            result = await self.connection.call_tool(tool_name, arguments)
+        except Exception as e:
+            self.cassette.record("tool", key, name=tool_name, arguments=arguments, result=None, error=str(e))
+            raise
+        self.cassette.record("tool", key, name=tool_name, arguments=arguments, result=result, error=None)
+        return result
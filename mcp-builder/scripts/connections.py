@@ -1,8 +1,10 @@
 """Lightweight connection handling for MCP servers."""
 
+import asyncio
+import time
 from abc import ABC, abstractmethod
-from contextlib import AsyncExitStack
-from typing import Any
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import Any, Callable
 
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.sse import sse_client
@@ -16,6 +18,7 @@ class MCPConnection(ABC):
     def __init__(self):
         self.session = None
         self._stack = None
+        self.startup_time = None
 
     @abstractmethod
     def _create_context(self):
@@ -23,6 +26,7 @@ class MCPConnection(ABC):
 
     async def __aenter__(self):
         """Initialize MCP server connection."""
+        start_time = time.time()
         self._stack = AsyncExitStack()
         await self._stack.__aenter__()
 
@@ -40,6 +44,7 @@ class MCPConnection(ABC):
             session_ctx = ClientSession(read, write)
             self.session = await self._stack.enter_async_context(session_ctx)
             await self.session.initialize()
+            self.startup_time = time.time() - start_time
             return self
         except BaseException:
             await self._stack.__aexit__(None, None, None)
@@ -69,6 +74,15 @@ class MCPConnection(ABC):
         result = await self.session.call_tool(tool_name, arguments=arguments)
         return result.content
 
+    async def ping(self) -> None:
+        """Check that the server still answers requests."""
+        await self.session.send_ping()
+
+    @asynccontextmanager
+    async def lease(self):
+        """Lease this connection; a single connection is shared by every lease."""
+        yield self
+
 
 class MCPConnectionStdio(MCPConnection):
     """MCP connection using standard input/output."""
@@ -109,6 +123,118 @@ class MCPConnectionHTTP(MCPConnection):
         return streamablehttp_client(url=self.url, headers=self.headers)
 
 
+class MCPConnectionPool:
+    """Pool of MCP connections leased to concurrent tasks.
+
+    A stdio server answers requests on a single pipe, so concurrent tasks
+    sharing one connection queue behind each other. The pool starts `size`
+    connections concurrently and leases each to one task at a time. A leased
+    connection is pinged first and replaced if it no longer answers.
+
+    Each connection is opened and closed by a holder task of its own, because
+    the MCP client contexts must be exited in the task that entered them.
+    """
+
+    def __init__(self, factory: Callable[[], MCPConnection], size: int, ping_timeout: float = 5.0):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.factory = factory
+        self.size = size
+        self.ping_timeout = ping_timeout
+        self.startup_time = None
+        self.session_startup_times = []
+        self.replaced = 0
+        self._idle = asyncio.Queue()
+        self._holders = {}
+
+    async def _hold(self, connection: MCPConnection, ready: asyncio.Future, stop: asyncio.Event):
+        try:
+            async with connection:
+                ready.set_result(connection)
+                await stop.wait()
+        except BaseException as e:
+            if not ready.done():
+                ready.set_exception(e)
+            elif not isinstance(e, Exception):
+                raise
+
+    async def _open(self) -> MCPConnection:
+        """Start one connection in its holder task; returns once it is initialized."""
+        connection = self.factory()
+        ready = asyncio.get_running_loop().create_future()
+        stop = asyncio.Event()
+        holder = asyncio.create_task(self._hold(connection, ready, stop))
+        await ready
+        self._holders[connection] = (holder, stop)
+        self.session_startup_times.append(connection.startup_time)
+        return connection
+
+    async def _close(self, connection: MCPConnection, timeout: float = 5.0) -> None:
+        if connection not in self._holders:
+            return
+        holder, stop = self._holders.pop(connection)
+        stop.set()
+        try:
+            await asyncio.wait_for(holder, timeout)
+        except (asyncio.TimeoutError, Exception):
+            holder.cancel()
+
+    async def _healthy(self, connection: MCPConnection) -> bool:
+        if connection not in self._holders or self._holders[connection][0].done():
+            return False
+        try:
+            await asyncio.wait_for(connection.ping(), self.ping_timeout)
+            return True
+        except (asyncio.TimeoutError, Exception):
+            return False
+
+    async def __aenter__(self):
+        """Start all connections concurrently."""
+        start_time = time.time()
+        results = await asyncio.gather(*(self._open() for _ in range(self.size)), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            await self.__aexit__(None, None, None)
+            raise errors[0]
+        for connection in results:
+            self._idle.put_nowait(connection)
+        self.startup_time = time.time() - start_time
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Close every connection in the pool."""
+        await asyncio.gather(*(self._close(connection) for connection in list(self._holders)))
+        self._idle = asyncio.Queue()
+
+    @asynccontextmanager
+    async def lease(self):
+        """Lease an idle, healthy connection for exclusive use; waits if all are leased."""
+        connection = await self._idle.get()
+        try:
+            if not await self._healthy(connection):
+                await self._close(connection)
+                connection = await self._open()
+                self.replaced += 1
+        except BaseException:
+            # Replacement failed to start: return the slot so the next lease retries
+            self._idle.put_nowait(connection)
+            raise
+        try:
+            yield connection
+        finally:
+            self._idle.put_nowait(connection)
+
+    async def list_tools(self) -> list[dict[str, Any]]:
+        """Retrieve available tools from the MCP server."""
+        async with self.lease() as connection:
+            return await connection.list_tools()
+
+    async def call_tool(self, tool_name: str, arguments: dict[str, Any]) -> Any:
+        """Call a tool on a leased connection."""
+        async with self.lease() as connection:
+            return await connection.call_tool(tool_name, arguments)
+
+
 def create_connection(
     transport: str,
     command: str = None,
@@ -1,11 +1,17 @@
 """MCP Server Evaluation Harness
 
 This script evaluates MCP servers by running test questions against them using Claude.
+Model turns are streamed through the async client, so many concurrent tasks share
+one event loop. Model turns and tool calls can be recorded to a cassette and
+replayed without the model API or the server (see cassette.py), and a scripted
+model backend runs the harness fully offline (see backends.py).
 """
 
 import argparse
 import asyncio
+import hashlib
 import json
+import os
 import re
 import sys
 import time
@@ -14,9 +20,17 @@ import xml.etree.ElementTree as ET
 from pathlib import Path
 from typing import Any
 
-from anthropic import Anthropic
-
-from connections import create_connection
+from backends import BACKENDS, AnthropicBackend, ModelBackend, ScriptedBackend, usage_turn
+from cassette import Cassette, CassetteConnection, model_request
+from connections import MCPConnectionPool, create_connection
+from metrics import (
+    aggregate_trials,
+    build_metrics,
+    render_comparison_section,
+    render_latency_section,
+    render_timeline,
+    task_phases,
+)
 
 EVALUATION_PROMPT = """You are an AI assistant with access to tools.
 
@@ -83,87 +97,134 @@ def extract_xml_content(text: str, tag: str) -> str | None:
     return matches[-1].strip() if matches else None
 
 
+async def run_tool(connection: Any, tool_use: Any) -> tuple[str, dict[str, Any]]:
+    """Call the tool requested by a tool_use block.
+
+    Returns the response text and the call's metrics (start, duration, response bytes).
+    """
+    tool_start_ts = time.time()
+    error = False
+    try:
+        tool_result = await connection.call_tool(tool_use.name, tool_use.input)
+        if isinstance(tool_result, (dict, list)):
+            # MCP content blocks (TextContent, ImageContent, ...) are pydantic models
+            tool_response = json.dumps(tool_result, default=lambda o: o.model_dump(mode="json", exclude_none=True))
+        else:
+            tool_response = str(tool_result)
+    except Exception as e:
+        error = True
+        tool_response = f"Error executing tool {tool_use.name}: {str(e)}\n"
+        tool_response += traceback.format_exc()
+    call = {
+        "name": tool_use.name,
+        "start": tool_start_ts,
+        "duration": time.time() - tool_start_ts,
+        "bytes": len(tool_response.encode()),
+        "error": error,
+    }
+    return tool_response, call
+
+
+async def create_message(
+    backend: ModelBackend,
+    model: str,
+    messages: list[dict[str, Any]],
+    tools: list[dict[str, Any]],
+    prompt_cache: bool = True,
+    cassette: Cassette | None = None,
+) -> tuple[Any, dict[str, Any]]:
+    """Get the next model turn from the backend; returns the response and the turn's latency and token usage.
+
+    With a cassette in replay or hybrid mode the recorded response is served
+    instead (token usage as recorded, latency as measured); in record mode
+    the response is saved.
+    """
+    request = model_request(model, EVALUATION_PROMPT, messages, tools) if cassette else None
+    if cassette and cassette.replays_model:
+        start_ts = time.time()
+        response = cassette.replay_message(request)
+        duration = time.time() - start_ts
+        return response, usage_turn(response, start_ts, duration, duration)
+
+    response, turn = await backend.create_message(model, EVALUATION_PROMPT, messages, tools, prompt_cache)
+    if cassette and cassette.mode == "record":
+        cassette.record_message(request, response, turn)
+    return response, turn
+
+
 async def agent_loop(
-    client: Anthropic,
+    backend: ModelBackend,
     model: str,
     question: str,
     tools: list[dict[str, Any]],
     connection: Any,
-) -> tuple[str, dict[str, Any]]:
-    """Run the agent loop with MCP tools."""
+    prompt_cache: bool = True,
+    cassette: Cassette | None = None,
+) -> tuple[str, dict[str, Any], list[dict[str, Any]]]:
+    """Run the agent loop with MCP tools.
+
+    Returns the final response text, per-tool metrics and per-turn metrics
+    (each turn lists the tool calls it requested; start times are epoch seconds).
+    """
     messages = [{"role": "user", "content": question}]
 
-    response = await asyncio.to_thread(
-        client.messages.create,
-        model=model,
-        max_tokens=4096,
-        system=EVALUATION_PROMPT,
-        messages=messages,
-        tools=tools,
-    )
+    response, turn = await create_message(backend, model, messages, tools, prompt_cache, cassette)
+    turns = [turn]
 
     messages.append({"role": "assistant", "content": response.content})
 
     tool_metrics = {}
 
     while response.stop_reason == "tool_use":
-        tool_use = next(block for block in response.content if block.type == "tool_use")
-        tool_name = tool_use.name
-        tool_input = tool_use.input
-
-        tool_start_ts = time.time()
-        try:
-            tool_result = await connection.call_tool(tool_name, tool_input)
-            tool_response = json.dumps(tool_result) if isinstance(tool_result, (dict, list)) else str(tool_result)
-        except Exception as e:
-            tool_response = f"Error executing tool {tool_name}: {str(e)}\n"
-            tool_response += traceback.format_exc()
-        tool_duration = time.time() - tool_start_ts
-
-        if tool_name not in tool_metrics:
-            tool_metrics[tool_name] = {"count": 0, "durations": []}
-        tool_metrics[tool_name]["count"] += 1
-        tool_metrics[tool_name]["durations"].append(tool_duration)
-
-        messages.append({
-            "role": "user",
-            "content": [{
+        # Every tool_use block needs a tool_result in the next message; run them all at once
+        tool_uses = [block for block in response.content if block.type == "tool_use"]
+        outcomes = await asyncio.gather(*(run_tool(connection, tool_use) for tool_use in tool_uses))
+
+        tool_results = []
+        turn["tool_calls"] = []
+        for tool_use, (tool_response, call) in zip(tool_uses, outcomes):
+            if tool_use.name not in tool_metrics:
+                tool_metrics[tool_use.name] = {"count": 0, "durations": [], "response_bytes": []}
+            tool_metrics[tool_use.name]["count"] += 1
+            tool_metrics[tool_use.name]["durations"].append(call["duration"])
+            tool_metrics[tool_use.name]["response_bytes"].append(call["bytes"])
+            turn["tool_calls"].append(call)
+            tool_results.append({
                 "type": "tool_result",
                 "tool_use_id": tool_use.id,
                 "content": tool_response,
-            }]
-        })
-
-        response = await asyncio.to_thread(
-            client.messages.create,
-            model=model,
-            max_tokens=4096,
-            system=EVALUATION_PROMPT,
-            messages=messages,
-            tools=tools,
-        )
+            })
+
+        messages.append({"role": "user", "content": tool_results})
+
+        response, turn = await create_message(backend, model, messages, tools, prompt_cache, cassette)
+        turns.append(turn)
         messages.append({"role": "assistant", "content": response.content})
 
     response_text = next(
         (block.text for block in response.content if hasattr(block, "text")),
         None,
     )
-    return response_text, tool_metrics
+    return response_text, tool_metrics, turns
 
 
 async def evaluate_single_task(
-    client: Anthropic,
+    backend: ModelBackend,
     model: str,
     qa_pair: dict[str, Any],
     tools: list[dict[str, Any]],
     connection: Any,
     task_index: int,
+    prompt_cache: bool = True,
+    cassette: Cassette | None = None,
 ) -> dict[str, Any]:
     """Evaluate a single QA pair with the given tools."""
     start_time = time.time()
 
     print(f"Task {task_index + 1}: Running task with question: {qa_pair['question']}")
-    response, tool_metrics = await agent_loop(client, model, qa_pair["question"], tools, connection)
+    response, tool_metrics, turns = await agent_loop(
+        backend, model, qa_pair["question"], tools, connection, prompt_cache, cassette
+    )
 
     response_value = extract_xml_content(response, "response")
     summary = extract_xml_content(response, "summary")
@@ -171,7 +232,14 @@ async def evaluate_single_task(
 
     duration_seconds = time.time() - start_time
 
+    # Timeline offsets relative to the task start
+    for turn in turns:
+        turn["start"] -= start_time
+        for call in turn.get("tool_calls", []):
+            call["start"] -= start_time
+
     return {
+        "task_id": qa_pair.get("task_id"),
         "question": qa_pair["question"],
         "expected": qa_pair["answer"],
         "actual": response_value,
@@ -179,6 +247,8 @@ async def evaluate_single_task(
         "total_duration": duration_seconds,
         "tool_calls": tool_metrics,
         "num_tool_calls": sum(len(metrics["durations"]) for metrics in tool_metrics.values()),
+        "turns": turns,
+        "phases": task_phases(turns, duration_seconds),
         "summary": summary,
         "feedback": feedback,
     }
@@ -191,8 +261,13 @@ REPORT_HEADER = """
 
 - **Accuracy**: {correct}/{total} ({accuracy:.1f}%)
 - **Average Task Duration**: {average_duration_s:.2f}s
+- **Prompt Cache**: {cache_hit_rate:.1f}% of input tokens read from cache ({cache_read_tokens} read, {cache_write_tokens} written, {uncached_tokens} uncached)
+- **Average Model Latency per Turn**: {model_latency_s:.2f}s ({ttft_s:.2f}s to first token, {generation_s:.2f}s generating)
+- **Average Time to First Token**: {cached_ttft} with cache reads, {uncached_ttft} without
 - **Average Tool Calls per Task**: {average_tool_calls:.2f}
 - **Total Tool Calls**: {total_tool_calls}
+- **Average Tool Time per Task**: {average_tool_time_s:.2f}s
+- **MCP Session Startup**: {sessions} session(s) in {startup_time_s:.2f}s ({average_startup_s:.2f}s each, {replaced} replaced; not part of task durations)
 
 ---
 """
@@ -207,6 +282,11 @@ TASK_TEMPLATE = """
 **Duration**: {total_duration:.2f}s
 **Tool Calls**: {tool_calls}
 
+**Timeline**
+```
+{timeline}
+```
+
 **Summary**
 {summary}
 
@@ -217,43 +297,105 @@ TASK_TEMPLATE = """
 """
 
 
-async def run_evaluation(
-    eval_path: Path,
-    connection: Any,
-    model: str = "claude-3-7-sonnet-20250219",
-) -> str:
-    """Run evaluation with MCP server tools."""
-    print("🚀 Starting Evaluation")
-
-    client = Anthropic()
-
-    tools = await connection.list_tools()
-    print(f"📋 Loaded {len(tools)} tools from MCP server")
-
-    qa_pairs = parse_evaluation_file(eval_path)
-    print(f"📋 Loaded {len(qa_pairs)} evaluation tasks")
+def assign_task_ids(qa_pairs: list[dict[str, Any]]) -> None:
+    """Give each QA pair a stable ID: a hash of its question (repeats get a -2, -3, ... suffix)."""
+    seen = {}
+    for qa_pair in qa_pairs:
+        digest = hashlib.sha256(qa_pair["question"].encode()).hexdigest()[:16]
+        seen[digest] = seen.get(digest, 0) + 1
+        qa_pair["task_id"] = digest if seen[digest] == 1 else f"{digest}-{seen[digest]}"
+
+
+def load_checkpoint(path: Path) -> tuple[dict[tuple[str, int, str], dict[str, Any]], dict[str, Any]]:
+    """Read a checkpoint; returns results by (model, trial, task ID) and the last run record.
+
+    A line cut short by a crash is skipped; the task simply runs again on resume.
+    """
+    results, run = {}, {}
+    if not path.exists():
+        return results, run
+    with path.open(encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("type") == "task":
+                result = record["result"]
+                # Results written before trials and multiple models carry neither
+                key = (result.get("model", run.get("model")), result.get("trial", 1), record["task_id"])
+                results[key] = result
+            elif record.get("type") == "run":
+                run = record["run"]
+    return results, run
+
+
+def append_checkpoint(path: Path, record: dict[str, Any]) -> None:
+    """Append one record to the checkpoint and flush it to disk."""
+    with path.open("a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def render_report(
+    qa_pairs: list[dict[str, Any]],
+    results_by_id: dict[str, dict[str, Any]],
+    run: dict[str, Any],
+) -> tuple[str, dict[str, Any]]:
+    """Build the markdown report and the metrics from task results, in evaluation file order.
 
-    results = []
-    for i, qa_pair in enumerate(qa_pairs):
-        print(f"Processing task {i + 1}/{len(qa_pairs)}")
-        result = await evaluate_single_task(client, model, qa_pair, tools, connection, i)
-        results.append(result)
+    Tasks without a result (not run yet) are left out.
+    """
+    numbered = [(i, qa_pair, results_by_id[qa_pair["task_id"]])
+                for i, qa_pair in enumerate(qa_pairs) if qa_pair["task_id"] in results_by_id]
+    results = [result for _, _, result in numbered]
 
     correct = sum(r["score"] for r in results)
     accuracy = (correct / len(results)) * 100 if results else 0
     average_duration_s = sum(r["total_duration"] for r in results) / len(results) if results else 0
     average_tool_calls = sum(r["num_tool_calls"] for r in results) / len(results) if results else 0
     total_tool_calls = sum(r["num_tool_calls"] for r in results)
+    total_tool_time_s = sum(sum(m["durations"]) for r in results for m in r["tool_calls"].values())
+    average_tool_time_s = total_tool_time_s / len(results) if results else 0
+    session_startup_times = run.get("session_startup_times") or [0.0]
+
+    turns = [turn for r in results for turn in r["turns"]]
+    cache_read_tokens = sum(t["cache_read_input_tokens"] for t in turns)
+    cache_write_tokens = sum(t["cache_creation_input_tokens"] for t in turns)
+    uncached_tokens = sum(t["input_tokens"] for t in turns)
+    total_input_tokens = cache_read_tokens + cache_write_tokens + uncached_tokens
+    cache_hit_rate = cache_read_tokens / total_input_tokens * 100 if total_input_tokens else 0
+    # Cache reads shorten prompt processing, which shows in time to first token
+    cached_ttfts = [t["ttft"] for t in turns if t["cache_read_input_tokens"]]
+    uncached_ttfts = [t["ttft"] for t in turns if not t["cache_read_input_tokens"]]
 
     report = REPORT_HEADER.format(
         correct=correct,
         total=len(results),
         accuracy=accuracy,
         average_duration_s=average_duration_s,
+        cache_hit_rate=cache_hit_rate,
+        cache_read_tokens=cache_read_tokens,
+        cache_write_tokens=cache_write_tokens,
+        uncached_tokens=uncached_tokens,
+        model_latency_s=sum(t["duration"] for t in turns) / len(turns) if turns else 0,
+        ttft_s=sum(t["ttft"] for t in turns) / len(turns) if turns else 0,
+        generation_s=sum(t["generation_time"] for t in turns) / len(turns) if turns else 0,
+        cached_ttft=f"{sum(cached_ttfts) / len(cached_ttfts):.2f}s" if cached_ttfts else "N/A",
+        uncached_ttft=f"{sum(uncached_ttfts) / len(uncached_ttfts):.2f}s" if uncached_ttfts else "N/A",
         average_tool_calls=average_tool_calls,
         total_tool_calls=total_tool_calls,
+        average_tool_time_s=average_tool_time_s,
+        sessions=len(session_startup_times),
+        startup_time_s=run.get("session_startup_time") or 0.0,
+        average_startup_s=sum(session_startup_times) / len(session_startup_times),
+        replaced=run.get("replaced", 0),
     )
 
+    metrics = build_metrics(results, {**run, "tasks": len(results), "correct": correct})
+    report += render_latency_section(metrics)
+
     report += "".join([
         TASK_TEMPLATE.format(
             task_num=i + 1,
@@ -263,13 +405,231 @@ async def run_evaluation(
             correct_indicator="✅" if result["score"] else "❌",
             total_duration=result["total_duration"],
             tool_calls=json.dumps(result["tool_calls"], indent=2),
+            timeline=render_timeline(result["turns"]),
             summary=result["summary"] or "N/A",
             feedback=result["feedback"] or "N/A",
         )
-        for i, (qa_pair, result) in enumerate(zip(qa_pairs, results))
+        for i, qa_pair, result in numbered
     ])
 
-    return report
+    return report, metrics
+
+
+COMPARISON_HEADER = """
+# Evaluation Report
+
+## Summary
+
+- **Models**: {models}
+- **Trials**: {trials} per question ({questions} questions, {task_runs} task runs)
+- **Wall Time**: {wall_time}
+- **MCP Session Startup**: {sessions} session(s) in {startup_time_s:.2f}s ({replaced} replaced; not part of task durations)
+
+---
+"""
+
+
+def render_comparison(
+    qa_pairs: list[dict[str, Any]],
+    results: dict[tuple[str, int, str], dict[str, Any]],
+    run: dict[str, Any],
+    models: list[str],
+    trials: int,
+) -> tuple[str, dict[str, Any]]:
+    """Report and metrics of a run with several trials or models.
+
+    Per model: accuracy, mean, variance and 95% confidence intervals of
+    duration and tool calls over all trials, side by side; then each
+    question's pass count and mean duration per model.
+    """
+    per_model = {
+        model: [[results[(model, trial, qa["task_id"])] for qa in qa_pairs if (model, trial, qa["task_id"]) in results]
+                for trial in range(1, trials + 1)]
+        for model in models
+    }
+    aggregates = {model: aggregate_trials(model_trials) for model, model_trials in per_model.items()}
+
+    report = COMPARISON_HEADER.format(
+        models=", ".join(models),
+        trials=trials,
+        questions=len(qa_pairs),
+        task_runs=sum(len(trial) for model_trials in per_model.values() for trial in model_trials),
+        wall_time=f"{run['wall_time']:.1f}s at concurrency {run.get('concurrency', 1)}" if "wall_time" in run else "N/A",
+        sessions=run.get("sessions", 1),
+        startup_time_s=run.get("session_startup_time") or 0.0,
+        replaced=run.get("replaced", 0),
+    )
+    report += render_comparison_section(aggregates)
+
+    lines = [
+        "",
+        "## Per-Question Results",
+        "",
+        "Correct trials, and mean task duration.",
+        "",
+        "| # | Question | Expected | " + " | ".join(models) + " |",
+        "|---|---|---|" + "---|" * len(models),
+    ]
+    for i, qa_pair in enumerate(qa_pairs):
+        cells = []
+        for model in models:
+            runs = [results[(model, trial, qa_pair["task_id"])] for trial in range(1, trials + 1)
+                    if (model, trial, qa_pair["task_id"]) in results]
+            if runs:
+                mean_duration = sum(r["total_duration"] for r in runs) / len(runs)
+                cells.append(f"{sum(r['score'] for r in runs)}/{len(runs)}, {mean_duration:.1f}s")
+            else:
+                cells.append("-")
+        question = qa_pair["question"] if len(qa_pair["question"]) <= 80 else qa_pair["question"][:77] + "..."
+        question = question.replace("|", "\\|")
+        lines.append(f"| {i + 1} | {question} | `{qa_pair['answer']}` | " + " | ".join(cells) + " |")
+    report += "\n".join(lines) + "\n"
+
+    metrics = {
+        "run": run,
+        "models": {
+            model: {
+                "summary": aggregates[model],
+                "metrics": build_metrics([r for trial in per_model[model] for r in trial], run),
+            }
+            for model in models
+        },
+    }
+    return report, metrics
+
+
+def build_report(
+    qa_pairs: list[dict[str, Any]],
+    results: dict[tuple[str, int, str], dict[str, Any]],
+    run: dict[str, Any],
+) -> tuple[str, dict[str, Any]]:
+    """Full report for a single model and trial, comparison report otherwise."""
+    models = run.get("models") or [run.get("model")]
+    trials = run.get("trials", 1)
+    if len(models) == 1 and trials == 1:
+        results_by_id = {task_id: result for (_, _, task_id), result in results.items()}
+        return render_report(qa_pairs, results_by_id, run)
+    return render_comparison(qa_pairs, results, run, models, trials)
+
+
+async def run_evaluation(
+    eval_path: Path,
+    connection: Any,
+    model: str | list[str] = "claude-3-7-sonnet-20250219",
+    concurrency: int = 1,
+    prompt_cache: bool = True,
+    checkpoint: Path | None = None,
+    resume: bool = False,
+    server: dict[str, Any] | None = None,
+    cassette: Cassette | None = None,
+    backend: ModelBackend | None = None,
+    trials: int = 1,
+) -> tuple[str, dict[str, Any]]:
+    """Run evaluation with MCP server tools; returns the markdown report and the metrics.
+
+    Every question runs `trials` times with each model in `model` (one name
+    or a list). The evaluation file is parsed and the tool list fetched once
+    for all of them. Up to `concurrency` task runs happen at once, across
+    models and trials; the report keeps the order of the evaluation file
+    regardless of completion order. `connection` is an
+    MCPConnection or an MCPConnectionPool; each task leases a connection
+    for its whole agent loop.
+
+    Each finished task is appended to `checkpoint` (JSONL) right away. With
+    `resume`, tasks already in the checkpoint are not run again. `server`
+    describes the MCP server in the metrics.
+
+    With a `cassette`, model turns are recorded or replayed; wrap `connection`
+    in a CassetteConnection to do the same for tool calls. `backend` produces
+    the model turns (default: the Messages API).
+    """
+    print("🚀 Starting Evaluation")
+    models = [model] if isinstance(model, str) else list(model)
+
+    # Replayed model turns need no API client
+    if backend is None and not (cassette and cassette.replays_model):
+        backend = AnthropicBackend()
+
+    tools = await connection.list_tools()
+    print(f"📋 Loaded {len(tools)} tools from MCP server")
+
+    qa_pairs = parse_evaluation_file(eval_path)
+    assign_task_ids(qa_pairs)
+    print(f"📋 Loaded {len(qa_pairs)} evaluation tasks")
+
+    # Models interleaved within each trial, so they see the same conditions over the run
+    runs = [(model_name, trial, i, qa_pair)
+            for trial in range(1, trials + 1) for i, qa_pair in enumerate(qa_pairs) for model_name in models]
+    results = {}
+    if checkpoint and resume:
+        done, _ = load_checkpoint(checkpoint)
+        results = {(m, t, qa["task_id"]): done[(m, t, qa["task_id"])]
+                   for m, t, _, qa in runs if (m, t, qa["task_id"]) in done}
+        print(f"⏭️  {len(results)} task runs already done in {checkpoint}")
+    elif checkpoint:
+        checkpoint.write_text("")
+    pending = [(m, t, i, qa) for m, t, i, qa in runs if (m, t, qa["task_id"]) not in results]
+
+    session_startup_times = getattr(connection, "session_startup_times", None) or [connection.startup_time]
+    run = {
+        "models": models,
+        "trials": trials,
+        "server": server,
+        "eval_file": str(eval_path),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "concurrency": concurrency,
+        "prompt_cache": prompt_cache,
+        "sessions": len(session_startup_times),
+        "session_startup_time": connection.startup_time,
+        "session_startup_times": session_startup_times,
+        "cassette": cassette.describe() if cassette else None,
+        "backend": type(backend).__name__ if backend else None,
+    }
+    if checkpoint:
+        append_checkpoint(checkpoint, {"type": "run", "run": run})
+
+    semaphore = asyncio.Semaphore(concurrency)
+    completed = 0
+    start_time = time.time()
+
+    async def run_task(model_name: str, trial: int, i: int, qa_pair: dict[str, Any]) -> None:
+        nonlocal completed
+        async with semaphore:
+            label = f" ({model_name}, trial {trial})" if len(runs) > len(qa_pairs) else ""
+            print(f"Processing task {i + 1}/{len(qa_pairs)}{label}")
+            async with connection.lease() as task_connection:
+                result = await evaluate_single_task(
+                    backend, model_name, qa_pair, tools, task_connection, i, prompt_cache, cassette
+                )
+        result["model"], result["trial"] = model_name, trial
+        results[(model_name, trial, qa_pair["task_id"])] = result
+        if checkpoint:
+            append_checkpoint(checkpoint, {"type": "task", "task_id": qa_pair["task_id"], "result": result})
+        completed += 1
+        elapsed = time.time() - start_time
+        print(f"⏱️  {completed}/{len(pending)} tasks completed in {elapsed:.1f}s "
+              f"({completed / max(elapsed, 1e-9) * 60:.1f} tasks/min)")
+
+    await asyncio.gather(*(run_task(*pending_run) for pending_run in pending))
+
+    run["wall_time"] = time.time() - start_time
+    run["replaced"] = getattr(connection, "replaced", 0)
+    if checkpoint:
+        append_checkpoint(checkpoint, {"type": "run", "run": run})
+    return build_report(qa_pairs, results, run)
+
+
+def report_from_checkpoint(eval_path: Path, checkpoint: Path) -> tuple[str, dict[str, Any]]:
+    """Rebuild the report and metrics from a checkpoint without running anything."""
+    qa_pairs = parse_evaluation_file(eval_path)
+    assign_task_ids(qa_pairs)
+    results, run = load_checkpoint(checkpoint)
+    models = run.get("models") or [run.get("model")]
+    expected = len(qa_pairs) * len(models) * run.get("trials", 1)
+    done = sum(1 for m, t, task_id in results if m in models and t <= run.get("trials", 1))
+    if done < expected:
+        print(f"⚠️  {expected - done} of {expected} task runs have no result in {checkpoint}; they are left out")
+    return build_report(qa_pairs, results, run)
 
 
 def parse_headers(header_list: list[str]) -> dict[str, str]:
@@ -302,6 +662,20 @@ def parse_env_vars(env_list: list[str]) -> dict[str, str]:
     return env
 
 
+def write_outputs(args: argparse.Namespace, report: str, metrics: dict[str, Any]) -> None:
+    """Write the report (or print it) and the metrics JSON."""
+    if args.output:
+        args.output.write_text(report)
+        print(f"\n✅ Report saved to {args.output}")
+    else:
+        print("\n" + report)
+
+    metrics_path = args.metrics or (args.output.with_suffix(".metrics.json") if args.output else None)
+    if metrics_path:
+        metrics_path.write_text(json.dumps(metrics, indent=2))
+        print(f"✅ Metrics saved to {metrics_path}")
+
+
 async def main():
     parser = argparse.ArgumentParser(
         description="Evaluate MCP servers using test questions",
@@ -316,12 +690,38 @@ Examples:
 
   # Evaluate an HTTP MCP server with custom model
   python evaluation.py -t http -u https://example.com/mcp -m claude-3-5-sonnet-20241022 eval.xml
+
+  # Run up to 8 tasks at a time
+  python evaluation.py -t stdio -c python -a my_server.py --concurrency 8 eval.xml
+
+  # Compare two models over 5 trials per question
+  python evaluation.py -t stdio -c python -a my_server.py -m claude-sonnet-4-5 -m claude-haiku-4-5 --trials 5 -j 8 eval.xml
+
+  # Continue an interrupted run (tasks in report.checkpoint.jsonl are skipped)
+  python evaluation.py -t stdio -c python -a my_server.py -o report.md --resume eval.xml
+
+  # Rebuild report.md from report.checkpoint.jsonl without running anything
+  python evaluation.py -o report.md --report-only eval.xml
+
+  # Record model turns and tool calls, then replay them without the API or the server
+  python evaluation.py -t stdio -c python -a my_server.py --record run.cassette.jsonl eval.xml
+  python evaluation.py --replay run.cassette.jsonl eval.xml
+
+  # Replay the model but call the real server (measures tool latency alone)
+  python evaluation.py -t stdio -c python -a my_server.py --hybrid run.cassette.jsonl eval.xml
+
+  # Drive the server with a scripted model instead of the API (no network)
+  python evaluation.py -t stdio -c python -a my_server.py --backend scripted --script script.json eval.xml
         """,
     )
 
     parser.add_argument("eval_file", type=Path, help="Path to evaluation XML file")
     parser.add_argument("-t", "--transport", choices=["stdio", "sse", "http"], default="stdio", help="Transport type (default: stdio)")
-    parser.add_argument("-m", "--model", default="claude-3-7-sonnet-20250219", help="Claude model to use (default: claude-3-7-sonnet-20250219)")
+    parser.add_argument("-m", "--model", action="append", dest="models",
+                        help="Claude model to use; repeat to compare models (default: claude-3-7-sonnet-20250219)")
+    parser.add_argument("--trials", type=int, default=1, help="Runs per question and model (default: 1)")
+    parser.add_argument("--backend", choices=BACKENDS, default="anthropic", help="Model backend (default: anthropic)")
+    parser.add_argument("--script", type=Path, help="JSON script for the scripted backend (default: answer NOT_FOUND without tool calls)")
 
     stdio_group = parser.add_argument_group("stdio options")
     stdio_group.add_argument("-c", "--command", help="Command to run MCP server (stdio only)")
@@ -333,18 +733,74 @@ Examples:
     remote_group.add_argument("-H", "--header", nargs="+", dest="headers", help="HTTP headers in 'Key: Value' format (sse/http only)")
 
     parser.add_argument("-o", "--output", type=Path, help="Output file for evaluation report (default: stdout)")
+    parser.add_argument("--metrics", type=Path, help="Output file for raw metrics JSON (default: next to --output, as .metrics.json)")
+    parser.add_argument("-j", "--concurrency", type=int, default=1, help="Number of tasks to run at once (default: 1)")
+    parser.add_argument("--no-prompt-cache", action="store_true", help="Disable prompt caching (to compare latency and token usage)")
+    parser.add_argument("--checkpoint", type=Path, help="JSONL file each finished task is written to (default: next to --output, as .checkpoint.jsonl)")
+    parser.add_argument("--resume", action="store_true", help="Skip tasks already in the checkpoint")
+    parser.add_argument("--report-only", action="store_true", help="Rebuild the report from the checkpoint without running tasks")
+
+    cassette_group = parser.add_argument_group("cassette options").add_mutually_exclusive_group()
+    cassette_group.add_argument("--record", type=Path, metavar="CASSETTE", help="Save model turns and tool calls to a cassette file")
+    cassette_group.add_argument("--replay", type=Path, metavar="CASSETTE", help="Serve model turns and tool calls from a cassette (no API, no server)")
+    cassette_group.add_argument("--hybrid", type=Path, metavar="CASSETTE", help="Serve model turns from a cassette, call the real server")
 
     args = parser.parse_args()
 
+    if args.concurrency < 1:
+        print("Error: --concurrency must be at least 1")
+        sys.exit(1)
+    if args.trials < 1:
+        print("Error: --trials must be at least 1")
+        sys.exit(1)
+    models = list(dict.fromkeys(args.models or ["claude-3-7-sonnet-20250219"]))
+
     if not args.eval_file.exists():
         print(f"Error: Evaluation file not found: {args.eval_file}")
         sys.exit(1)
 
+    checkpoint = args.checkpoint or (args.output.with_suffix(".checkpoint.jsonl") if args.output else None)
+    if (args.resume or args.report_only) and not checkpoint:
+        print("Error: --resume and --report-only need --checkpoint or --output")
+        sys.exit(1)
+
+    if args.report_only:
+        if not checkpoint.exists():
+            print(f"Error: Checkpoint not found: {checkpoint}")
+            sys.exit(1)
+        report, metrics = report_from_checkpoint(args.eval_file, checkpoint)
+        write_outputs(args, report, metrics)
+        return
+
+    backend = None
+    if args.backend == "scripted":
+        try:
+            backend = ScriptedBackend.from_file(args.script) if args.script else ScriptedBackend()
+        except (OSError, ValueError, TypeError) as e:
+            print(f"Error: Cannot load script {args.script}: {e}")
+            sys.exit(1)
+    elif args.script:
+        print("Error: --script needs --backend scripted")
+        sys.exit(1)
+
+    cassette = None
+    for mode in ("record", "replay", "hybrid"):
+        if getattr(args, mode):
+            cassette = Cassette(getattr(args, mode), mode)
+    if cassette and cassette.replays_model:
+        if not cassette.path.exists():
+            print(f"Error: Cassette not found: {cassette.path}")
+            sys.exit(1)
+        cassette.load()
+    elif cassette:
+        # A resumed run adds the remaining tasks to the same recording
+        cassette.start(append=args.resume)
+
     headers = parse_headers(args.headers) if args.headers else None
     env_vars = parse_env_vars(args.env) if args.env else None
 
-    try:
-        connection = create_connection(
+    def connect():
+        return create_connection(
             transport=args.transport,
             command=args.command,
             args=args.args,
@@ -352,21 +808,36 @@ Examples:
             url=args.url,
             headers=headers,
         )
-    except ValueError as e:
-        print(f"Error: {e}")
-        sys.exit(1)
 
-    print(f"🔗 Connecting to MCP server via {args.transport}...")
+    if cassette and cassette.replays_tools:
+        connection = CassetteConnection(cassette)
+        print(f"📼 Replaying tool calls from {cassette.path}")
+    else:
+        try:
+            connection = connect()
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+
+        if args.concurrency > 1:
+            # One session per concurrent task, so tasks do not queue on a single server pipe
+            connection = MCPConnectionPool(connect, size=args.concurrency)
+            print(f"🔗 Connecting to MCP server via {args.transport} ({args.concurrency} sessions)...")
+        else:
+            print(f"🔗 Connecting to MCP server via {args.transport}...")
+        if cassette:
+            connection = CassetteConnection(cassette, connection)
 
     async with connection:
-        print("✅ Connected successfully")
-        report = await run_evaluation(args.eval_file, connection, args.model)
-
-        if args.output:
-            args.output.write_text(report)
-            print(f"\n✅ Report saved to {args.output}")
-        else:
-            print("\n" + report)
+        print(f"✅ Connected successfully in {connection.startup_time:.2f}s")
+        server = {"transport": args.transport, "command": args.command, "args": args.args, "url": args.url}
+        report, metrics = await run_evaluation(
+            args.eval_file, connection, models, args.concurrency, not args.no_prompt_cache,
+            checkpoint, args.resume, server, cassette, backend, args.trials,
+        )
+        write_outputs(args, report, metrics)
+    if cassette:
+        print(f"📼 {cassette.recorded} exchanges recorded, {cassette.replayed} replayed ({cassette.path})")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,295 @@
+"""Latency and token accounting for evaluation runs.
+
+Each task result carries its model turns (latency, tokens) and, per turn, the
+tool calls made in response (latency, response size), with start offsets
+relative to the task start. This module summarizes them per phase and per
+tool, renders per-task timelines, and builds the JSON document written next
+to the report so a tool server's performance can be compared across releases.
+For repeated trials and several models it adds mean, variance and 95%
+confidence intervals per model, and a side-by-side comparison table.
+"""
+
+from typing import Any
+
+PHASES = ("model", "tool", "harness")
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Percentile with linear interpolation between closest ranks."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: list[float]) -> dict[str, float]:
+    """Count, mean, p50/p90/p99 and max of a list of values."""
+    if not values:
+        return {"count": 0}
+    summary = {"count": len(values), "mean": sum(values) / len(values)}
+    for pct in PERCENTILES:
+        summary[f"p{pct}"] = percentile(values, pct)
+    summary["max"] = max(values)
+    return summary
+
+
+def task_phases(turns: list[dict[str, Any]], total_duration: float) -> dict[str, float]:
+    """Split a task's duration into model time, tool time and harness overhead.
+
+    Tool calls of one turn run concurrently, so each turn counts the wall time
+    from its first call's start to its last call's end. Everything not spent
+    waiting on the model or the tools is harness overhead.
+    """
+    model = sum(turn["duration"] for turn in turns)
+    tool = 0.0
+    for turn in turns:
+        calls = turn.get("tool_calls") or []
+        if calls:
+            tool += max(c["start"] + c["duration"] for c in calls) - min(c["start"] for c in calls)
+    return {"model": model, "tool": tool, "harness": max(0.0, total_duration - model - tool)}
+
+
+def build_metrics(results: list[dict[str, Any]], run: dict[str, Any]) -> dict[str, Any]:
+    """Raw and summarized metrics of an evaluation run, as a JSON-serializable dict."""
+    turns = [turn for r in results for turn in r["turns"]]
+    calls = [call for turn in turns for call in turn.get("tool_calls") or []]
+
+    tools = {}
+    for name in sorted({call["name"] for call in calls}):
+        tool_calls = [call for call in calls if call["name"] == name]
+        tools[name] = {
+            "latency": summarize([call["duration"] for call in tool_calls]),
+            "response_bytes": summarize([call["bytes"] for call in tool_calls]),
+            "errors": sum(1 for call in tool_calls if call["error"]),
+        }
+
+    return {
+        "run": run,
+        "phases": {phase: summarize([r["phases"][phase] for r in results]) for phase in PHASES},
+        "task_duration": summarize([r["total_duration"] for r in results]),
+        "turns": {
+            "latency": summarize([turn["duration"] for turn in turns]),
+            "ttft": summarize([turn["ttft"] for turn in turns]),
+            "generation_time": summarize([turn["generation_time"] for turn in turns]),
+            "per_task": summarize([len(r["turns"]) for r in results]),
+        },
+        "tools": tools,
+        "tokens": {
+            "input": sum(turn["input_tokens"] for turn in turns),
+            "cache_read_input": sum(turn["cache_read_input_tokens"] for turn in turns),
+            "cache_creation_input": sum(turn["cache_creation_input_tokens"] for turn in turns),
+            "output": sum(turn["output_tokens"] for turn in turns),
+            "tool_response_bytes": sum(call["bytes"] for call in calls),
+        },
+        "tasks": [
+            {
+                "task": i + 1,
+                "task_id": r.get("task_id"),
+                "model": r.get("model"),
+                "trial": r.get("trial"),
+                "question": r["question"],
+                "score": r["score"],
+                "total_duration": r["total_duration"],
+                "phases": r["phases"],
+                "turns": r["turns"],
+            }
+            for i, r in enumerate(results)
+        ],
+    }
+
+
+def _row(label: str, summary: dict[str, float], fmt: str = "{:.2f}s") -> str:
+    if not summary["count"]:
+        return f"| {label} | 0 | - | - | - | - | - |"
+    cells = [fmt.format(summary[key]) for key in ("mean", "p50", "p90", "p99", "max")]
+    return f"| {label} | {summary['count']} | " + " | ".join(cells) + " |"
+
+
+def render_latency_section(metrics: dict[str, Any]) -> str:
+    """Markdown tables of per-phase, per-turn and per-tool latency, plus token totals."""
+    lines = [
+        "",
+        "## Latency and Tokens",
+        "",
+        "Per task, by phase (harness = time not spent waiting on the model or tools):",
+        "",
+        "| Phase | Tasks | Mean | p50 | p90 | p99 | Max |",
+        "|---|---|---|---|---|---|---|",
+    ]
+    lines += [_row(phase, metrics["phases"][phase]) for phase in PHASES]
+    lines.append(_row("total", metrics["task_duration"]))
+
+    lines += [
+        "",
+        "Per model turn:",
+        "",
+        "| Measure | Turns | Mean | p50 | p90 | p99 | Max |",
+        "|---|---|---|---|---|---|---|",
+        _row("latency", metrics["turns"]["latency"]),
+        _row("time to first token", metrics["turns"]["ttft"]),
+        _row("generation", metrics["turns"]["generation_time"]),
+    ]
+
+    if metrics["tools"]:
+        lines += [
+            "",
+            "Per tool call:",
+            "",
+            "| Tool | Calls | Errors | Mean | p50 | p90 | p99 | Max | p50 bytes | Max bytes |",
+            "|---|---|---|---|---|---|---|---|---|---|",
+        ]
+        for name, tool in metrics["tools"].items():
+            latency, size = tool["latency"], tool["response_bytes"]
+            cells = [f"{latency[key]:.2f}s" for key in ("mean", "p50", "p90", "p99", "max")]
+            lines.append(f"| {name} | {latency['count']} | {tool['errors']} | " + " | ".join(cells)
+                         + f" | {size['p50']:,.0f} | {size['max']:,.0f} |")
+
+    tokens = metrics["tokens"]
+    lines += [
+        "",
+        f"**Tokens**: {tokens['input']:,} uncached input, {tokens['cache_read_input']:,} cache read, "
+        f"{tokens['cache_creation_input']:,} cache write, {tokens['output']:,} output; "
+        f"{tokens['tool_response_bytes']:,} bytes of tool responses",
+        "",
+        "---",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def render_timeline(turns: list[dict[str, Any]]) -> str:
+    """One line per model turn and tool call, with start offsets from the task start."""
+    lines = []
+    for turn in turns:
+        tokens = f"in {turn['input_tokens']:,} / out {turn['output_tokens']:,} tok"
+        if turn["cache_read_input_tokens"]:
+            tokens += f", cache read {turn['cache_read_input_tokens']:,}"
+        lines.append(f"+{turn['start']:7.2f}s  model  {turn['duration']:6.2f}s  "
+                     f"(ttft {turn['ttft']:.2f}s, {tokens})")
+        for call in turn.get("tool_calls") or []:
+            status = " error" if call["error"] else ""
+            lines.append(f"+{call['start']:7.2f}s  tool   {call['duration']:6.2f}s  "
+                         f"{call['name']} ({call['bytes']:,} bytes{status})")
+    return "\n".join(lines)
+
+
+# Two-sided 95% critical values of Student's t by degrees of freedom; 1.96 beyond
+T_CRITICAL_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262, 10: 2.228,
+    11: 2.201, 12: 2.179, 13: 2.160, 14: 2.145, 15: 2.131, 16: 2.120, 17: 2.110, 18: 2.101, 19: 2.093,
+    20: 2.086, 21: 2.080, 22: 2.074, 23: 2.069, 24: 2.064, 25: 2.060, 26: 2.056, 27: 2.052, 28: 2.048,
+    29: 2.045, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980,
+}
+
+
+def t_critical(df: int) -> float:
+    """95% two-sided t critical value (the next smaller tabulated df, so slightly conservative)."""
+    return T_CRITICAL_95[max(d for d in T_CRITICAL_95 if d <= df)] if df <= 120 else 1.96
+
+
+def describe(values: list[float]) -> dict[str, float]:
+    """Count, mean, sample variance, standard deviation and 95% confidence interval of the mean."""
+    n = len(values)
+    if not n:
+        return {"count": 0}
+    mean = sum(values) / n
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1) if n > 1 else 0.0
+    half_width = t_critical(n - 1) * (variance / n) ** 0.5 if n > 1 else 0.0
+    return {
+        "count": n,
+        "mean": mean,
+        "variance": variance,
+        "stdev": variance ** 0.5,
+        "ci95": [mean - half_width, mean + half_width],
+    }
+
+
+def wilson_interval(successes: int, n: int, z: float = 1.96) -> list[float]:
+    """95% Wilson score interval of a success rate; stays within [0, 1] even at 0 or n successes."""
+    if not n:
+        return [0.0, 0.0]
+    p = successes / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half_width = z * ((p * (1 - p) + z * z / (4 * n)) / n) ** 0.5 / (1 + z * z / n)
+    return [max(0.0, center - half_width), min(1.0, center + half_width)]
+
+
+def aggregate_trials(trials: list[list[dict[str, Any]]]) -> dict[str, Any]:
+    """Statistics of one model over repeated trials (each a list of task results).
+
+    Accuracy is pooled over every task run, with a Wilson interval, and also
+    given per trial. Duration, tool calls and turns are described per task
+    run across all trials.
+    """
+    results = [r for trial in trials for r in trial]
+    correct = sum(r["score"] for r in results)
+    turns = [turn for r in results for turn in r["turns"]]
+    per_trial = describe([sum(r["score"] for r in trial) / len(trial) for trial in trials if trial])
+    if per_trial["count"]:
+        per_trial["ci95"] = [max(0.0, per_trial["ci95"][0]), min(1.0, per_trial["ci95"][1])]
+    return {
+        "trials": len(trials),
+        "task_runs": len(results),
+        "accuracy": {
+            "correct": correct,
+            "rate": correct / len(results) if results else 0.0,
+            "ci95": wilson_interval(correct, len(results)),
+            "per_trial": per_trial,
+        },
+        "task_duration": describe([r["total_duration"] for r in results]),
+        "tool_calls": describe([r["num_tool_calls"] for r in results]),
+        "turns": describe([len(r["turns"]) for r in results]),
+        "model_latency": describe([turn["duration"] for turn in turns]),
+        "tokens_per_task": describe([
+            sum(t["input_tokens"] + t["cache_read_input_tokens"] + t["cache_creation_input_tokens"] + t["output_tokens"]
+                for t in r["turns"])
+            for r in results
+        ]),
+    }
+
+
+def _mean_ci(stats: dict[str, Any], fmt: str) -> str:
+    if not stats["count"]:
+        return "-"
+    low, high = stats["ci95"]
+    return f"{fmt.format(stats['mean'])} [{fmt.format(low)}, {fmt.format(high)}]"
+
+
+def _percent(stats: dict[str, Any]) -> dict[str, Any]:
+    if not stats["count"]:
+        return stats
+    return {**stats, "mean": stats["mean"] * 100, "ci95": [v * 100 for v in stats["ci95"]]}
+
+
+def render_comparison_section(aggregates: dict[str, dict[str, Any]]) -> str:
+    """Side-by-side table of per-model statistics (mean [95% CI], variance)."""
+    models = list(aggregates)
+    rows = [
+        ("Task runs", lambda a: f"{a['task_runs']} ({a['trials']} trials)"),
+        ("Accuracy (pooled)", lambda a: f"{a['accuracy']['rate'] * 100:.1f}% "
+                                        f"[{a['accuracy']['ci95'][0] * 100:.1f}%, {a['accuracy']['ci95'][1] * 100:.1f}%]"),
+        ("Accuracy per trial", lambda a: _mean_ci(_percent(a["accuracy"]["per_trial"]), "{:.1f}%")),
+        ("Task duration", lambda a: _mean_ci(a["task_duration"], "{:.2f}s")
+            + f", var {a['task_duration'].get('variance', 0):.2f}"),
+        ("Tool calls per task", lambda a: _mean_ci(a["tool_calls"], "{:.2f}")
+            + f", var {a['tool_calls'].get('variance', 0):.2f}"),
+        ("Turns per task", lambda a: _mean_ci(a["turns"], "{:.2f}")),
+        ("Model latency per turn", lambda a: _mean_ci(a["model_latency"], "{:.2f}s")),
+        ("Tokens per task", lambda a: _mean_ci(a["tokens_per_task"], "{:,.0f}")),
+    ]
+    lines = [
+        "",
+        "## Model Comparison",
+        "",
+        "Mean [95% confidence interval]. Accuracy is pooled over all task runs (Wilson interval) and per trial (t interval).",
+        "",
+        "| | " + " | ".join(models) + " |",
+        "|---|" + "---|" * len(models),
+    ]
+    for label, cell in rows:
+        lines.append(f"| {label} | " + " | ".join(cell(aggregates[m]) for m in models) + " |")
+    lines += ["", "---"]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Fetch avatars for many users into a content-addressed disk cache.
+
+Users are resolved with query_indexer's batch lookup (concurrent, pooled,
+TTL-cached), then every avatar pin not yet on disk is streamed to
+objects/<sha[:2]>/<sha256><ext>. Avatar pins are immutable, so an avatar whose
+pinId is already in the index is not downloaded again; identical images
+under different pins share one file.
+
+Directory: METAFS_AVATAR_DIR, default ~/.cache/metabot-file/avatars
+    index.sqlite3            avatarPinId -> sha256, path, contentType, size
+    objects/ab/ab12...png    image files named by content SHA-256
+
+Usage:
+    python avatar_cache.py --address <a1> --address <a2> [--metaid <m>] [--globalmetaid <g>]
+    python avatar_cache.py --input keys.txt [--workers 16]     # lines <type>:<value>
+    python avatar_cache.py stats
+
+Stdout: one JSON line per user, in input order, with the local "path".
+"""
+
+import argparse
+import hashlib
+import json
+import mimetypes
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from query_indexer import (
+    BASE_URL,
+    BATCH_WORKERS,
+    add_cache_options,
+    add_key_options,
+    new_session,
+    open_cache,
+    read_batch_keys,
+    resolve_batch,
+)
+
+AVATAR_DIR = os.environ.get(
+    "METAFS_AVATAR_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "metabot-file", "avatars"),
+)
+USER_KEYS = ("address", "metaid", "globalmetaid")
+DOWNLOAD_BLOCK_SIZE = 64 * 1024
+DOWNLOAD_TIMEOUT = 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS avatars (
+    pin_id TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    path TEXT NOT NULL,
+    content_type TEXT,
+    size INTEGER NOT NULL,
+    fetched_at INTEGER NOT NULL
+)
+"""
+
+
+def avatar_url(pin_id):
+    return f"{BASE_URL}/content/{pin_id}"
+
+
+def extension_for(content_type):
+    ext = mimetypes.guess_extension((content_type or "").split(";")[0].strip()) if content_type else None
+    return ext or ".bin"
+
+
+class AvatarCache:
+    """Content-addressed avatar store with a pinId index."""
+
+    def __init__(self, directory=AVATAR_DIR):
+        self.directory = directory
+        self.objects = os.path.join(directory, "objects")
+        os.makedirs(self.objects, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(os.path.join(directory, "index.sqlite3"), timeout=30,
+                                    isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get(self, pin_id):
+        """Cached entry for an avatar pin, or None if unknown or its file is gone."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT sha256, path, content_type, size FROM avatars WHERE pin_id = ?", (pin_id,)
+            ).fetchone()
+        if not row or not os.path.exists(row[1]):
+            return None
+        return {"sha256": row[0], "path": row[1], "contentType": row[2], "size": row[3]}
+
+    def fetch(self, session, pin_id):
+        """
+        Stream an avatar to disk, hashing it on the way, and index it.
+
+        The file is written to a temp file in the cache directory and renamed
+        to its content address, so readers never see a partial image.
+        """
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.objects, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f, session.get(avatar_url(pin_id), stream=True,
+                                                       timeout=DOWNLOAD_TIMEOUT) as resp:
+                resp.raise_for_status()
+                content_type = resp.headers.get("Content-Type")
+                for block in resp.iter_content(DOWNLOAD_BLOCK_SIZE):
+                    f.write(block)
+                    digest.update(block)
+                    size += len(block)
+            sha256 = digest.hexdigest()
+            shard = os.path.join(self.objects, sha256[:2])
+            os.makedirs(shard, exist_ok=True)
+            path = os.path.join(shard, sha256 + extension_for(content_type))
+            if os.path.exists(path):
+                os.remove(tmp_path)
+            else:
+                os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO avatars (pin_id, sha256, path, content_type, size, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (pin_id, sha256, path, content_type, size, int(time.time())),
+            )
+        return {"sha256": sha256, "path": path, "contentType": content_type, "size": size}
+
+    def stats(self):
+        with self.lock:
+            pins, objects, total = self.conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT sha256), "
+                "COALESCE((SELECT SUM(size) FROM (SELECT DISTINCT sha256, size FROM avatars)), 0) FROM avatars"
+            ).fetchone()
+        return {"directory": self.directory, "pins": pins, "objects": objects, "bytes": total}
+
+
+def fetch_avatars(keys, workers=BATCH_WORKERS, cache=None, directory=AVATAR_DIR):
+    """
+    Resolve users and make sure each one's avatar is on disk.
+
+    Yields one result per key, in input order: the user lookup fields plus
+    avatarPinId, path and status (cached / downloaded / none / error). Keys
+    that do not name a user (pinid) are reported as errors.
+    """
+    user_keys = [key for key in keys if key[0] in USER_KEYS]
+    resolved = iter(resolve_batch(user_keys, workers, cache) if user_keys else ())
+    users = []
+    for key_type, value in keys:
+        if key_type in USER_KEYS:
+            users.append(next(resolved))
+        else:
+            users.append({"key": key_type, "value": value, "ok": False,
+                          "error": f"not a user key; use {', '.join(USER_KEYS)}"})
+    pin_ids = []
+    for user in users:
+        data = user.get("data") or {}
+        pin_id = data.get("avatarId") or data.get("avatarPinId")
+        user["avatarPinId"] = pin_id
+        if pin_id:
+            pin_ids.append(pin_id)
+
+    with AvatarCache(directory) as avatars:
+        entries = {}
+        missing = []
+        for pin_id in dict.fromkeys(pin_ids):
+            entry = avatars.get(pin_id)
+            if entry:
+                entries[pin_id] = ("cached", entry)
+            else:
+                missing.append(pin_id)
+
+        if missing:
+            session = new_session(workers)
+
+            def download(pin_id):
+                try:
+                    return pin_id, ("downloaded", avatars.fetch(session, pin_id))
+                except (requests.RequestException, OSError) as e:
+                    return pin_id, ("error", {"error": str(e)})
+
+            try:
+                with ThreadPoolExecutor(max_workers=workers) as pool:
+                    entries.update(pool.map(download, missing))
+            finally:
+                session.close()
+
+    for user in users:
+        result = {"key": user["key"], "value": user["value"], "avatarPinId": user["avatarPinId"]}
+        if not user["ok"]:
+            yield {**result, "status": "error", "error": user["error"]}
+        elif not user["avatarPinId"]:
+            yield {**result, "status": "none", "path": None}
+        else:
+            status, entry = entries[user["avatarPinId"]]
+            yield {**result, "status": status, "path": entry.get("path"), **entry}
+
+
+def cmd_stats(args):
+    with AvatarCache(args.dir) as avatars:
+        print(json.dumps(avatars.stats()))
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "stats":
+        parser = argparse.ArgumentParser(prog="avatar_cache.py stats", description="Show avatar cache size.")
+        parser.add_argument("--dir", default=AVATAR_DIR, help=f"Cache directory (default: {AVATAR_DIR})")
+        cmd_stats(parser.parse_args(sys.argv[2:]))
+        return
+
+    parser = argparse.ArgumentParser(description="Fetch avatars for many users into a local content-addressed cache.")
+    add_key_options(parser, USER_KEYS)
+    parser.add_argument("--input", metavar="FILE", help="Keys as <type>:<value> lines; - for stdin")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS,
+                        help=f"Concurrent lookups and downloads (default: {BATCH_WORKERS})")
+    parser.add_argument("--dir", default=AVATAR_DIR, help=f"Cache directory (default: {AVATAR_DIR})")
+    add_cache_options(parser)
+    args = parser.parse_args()
+
+    if args.workers <= 0:
+        print("Error: --workers must be positive", file=sys.stderr)
+        sys.exit(1)
+    try:
+        keys = read_batch_keys(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not keys:
+        print("Error: No users given (use --address/--metaid/--globalmetaid or --input)", file=sys.stderr)
+        sys.exit(1)
+
+    started = time.perf_counter()
+    counts = {"cached": 0, "downloaded": 0, "none": 0, "error": 0}
+    cache = open_cache(args)
+    try:
+        for result in fetch_avatars(keys, args.workers, cache, args.dir):
+            counts[result["status"]] += 1
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+    finally:
+        if cache is not None:
+            cache.close()
+    print(f"🖼️  {len(keys)} users: {counts['downloaded']} downloaded, {counts['cached']} cached, "
+          f"{counts['none']} without avatar, {counts['error']} failed "
+          f"in {time.perf_counter() - started:.2f}s", file=sys.stderr)
+    if counts["error"]:
+        sys.exit(2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Offline benchmarks against fake_metafile_server.py.
+
+Benchmarks:
+    download   query_indexer.py download with 1..N connections against a
+               bandwidth-throttled server; checks the downloaded bytes.
+    monitor    monitor_task.monitor_tasks tracking N concurrent tasks per
+               status strategy (fixed/adaptive polling, long poll, event
+               stream): wall/CPU time, status requests sent and
+               detection latency (time from a task finishing on the server
+               to its result line). The server runs in a separate process so
+               it does not compete with the monitor for the GIL.
+
+Usage:
+    python bench_metafile.py download [--size 32M] [--throttle 2048] [--connections 1,4,8,16]
+    python bench_metafile.py monitor [--tasks 10,100,1000] [--strategies fixed,adaptive,longpoll,sse] [--no-push]
+
+Stdout: one JSON line per run, then a summary line. Stderr: a table.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+import monitor_task
+import query_indexer
+from fake_metafile_server import INDEXER_PREFIX, UPLOADER_PREFIX, FakeMetafile, parse_size, start_server, synthetic_content
+
+# monitor_tasks keyword arguments per status strategy
+MONITOR_STRATEGIES = {
+    "fixed": {"adaptive": False, "mode": "poll"},
+    "adaptive": {"adaptive": True, "mode": "poll"},
+    "longpoll": {"mode": "longpoll"},
+    "sse": {"mode": "sse"},
+    "auto": {"mode": "auto"},
+}
+
+
+def parse_int_list(text):
+    return [int(v) for v in text.split(",") if v.strip()]
+
+
+def bench_download(args):
+    pin_id = "bench"
+    data = synthetic_content(pin_id, parse_size(args.size))
+    expected = hashlib.sha256(data).hexdigest()
+    state = FakeMetafile(throttle_kbps=args.throttle, latency=args.latency)
+    state.add_content(pin_id, data)
+    server = start_server(state, port=0)
+    query_indexer.BASE_URL = f"http://127.0.0.1:{server.server_address[1]}{INDEXER_PREFIX}"
+
+    runs = []
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for connections in args.connections:
+                output = os.path.join(tmp, f"{pin_id}-{connections}")
+                state.reset_stats()
+                result = query_indexer.download_content(
+                    pin_id, output, args.accelerate, connections, args.segment_size,
+                )
+                with open(output, "rb") as f:
+                    result["match"] = hashlib.sha256(f.read()).hexdigest() == expected
+                result["requests"] = state.snapshot()["requests"]
+                runs.append(result)
+                print(json.dumps(result), flush=True)
+    finally:
+        server.shutdown()
+
+    baseline = runs[0]["seconds"] if runs else None
+    print(f"\n{'conns':>5} {'seconds':>8} {'MB/s':>8} {'speedup':>8} {'requests':>8} match", file=sys.stderr)
+    for run in runs:
+        speedup = baseline / run["seconds"] if run["seconds"] else 0
+        print(f"{run['connections']:>5} {run['seconds']:>8.2f} {run['throughputMBps']:>8.2f} "
+              f"{speedup:>7.1f}x {run['requests']:>8} {'✅' if run['match'] else '❌'}", file=sys.stderr)
+    print(json.dumps({"type": "summary", "benchmark": "download", "size": len(data),
+                      "throttleKBps": args.throttle, "allMatch": all(r["match"] for r in runs)}))
+    if not all(r["match"] for r in runs):
+        sys.exit(1)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+def start_server_process(server_args):
+    """Run fake_metafile_server.py on a free port; returns (process, base URL)."""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_metafile_server.py")
+    proc = subprocess.Popen([sys.executable, script, "--port", "0", *server_args],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    line = proc.stdout.readline()
+    if not line:
+        proc.kill()
+        raise RuntimeError("fake_metafile_server.py did not start")
+    return proc, json.loads(line)["baseUrl"]
+
+
+class ResultRecorder:
+    """File-like sink for monitor_tasks that timestamps each task's result line."""
+
+    def __init__(self):
+        self.detected = {}
+        self.results = {}
+
+    def write(self, text):
+        now = time.time()
+        for line in text.splitlines():
+            if line.strip():
+                result = json.loads(line)
+                self.detected[result["taskId"]] = now
+                self.results[result["taskId"]] = result
+
+    def flush(self):
+        pass
+
+
+def run_monitor(base, task_ids, strategy, args):
+    """Monitor task_ids with one strategy; returns the measurement row."""
+    session = requests.Session()
+    session.get(f"{base}/stats?reset=1", timeout=10)
+    recorder = ResultRecorder()
+    started, cpu_started = time.perf_counter(), time.process_time()
+    with contextlib.redirect_stderr(io.StringIO()):
+        asyncio.run(monitor_task.monitor_tasks(
+            task_ids, timeout=args.timeout, interval=args.interval, concurrency=args.concurrency,
+            out=recorder, push_limit=args.push_limit, **MONITOR_STRATEGIES[strategy],
+        ))
+    seconds, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+
+    stats = session.get(f"{base}/stats", timeout=10).json()
+    tasks = session.get(f"{base}/stats/tasks", timeout=10).json()
+    session.close()
+    latencies = [recorder.detected[tid] - tasks[tid]["terminalAt"]
+                 for tid in task_ids if tid in recorder.detected and tid in tasks
+                 and recorder.results[tid].get("error") != "Task monitoring timeout"]
+    finished = sum(1 for r in recorder.results.values() if r.get("error") != "Task monitoring timeout")
+    # Status requests: polls and long polls, plus one per opened event stream
+    requests_sent = stats["routes"].get("task", 0) + stats["routes"].get("taskStream", 0)
+    row = {
+        "strategy": strategy,
+        "tasks": len(task_ids),
+        "finished": finished,
+        "seconds": round(seconds, 2),
+        "cpuSeconds": round(cpu, 2),
+        "requests": requests_sent,
+        "requestsPerTask": round(requests_sent / len(task_ids), 1),
+    }
+    if latencies:
+        row.update({
+            "latencyMean": round(sum(latencies) / len(latencies), 3),
+            "latencyP50": round(percentile(latencies, 50), 3),
+            "latencyP95": round(percentile(latencies, 95), 3),
+            "latencyMax": round(max(latencies), 3),
+        })
+    return row
+
+
+def bench_monitor(args):
+    unknown = [s for s in args.strategies if s not in MONITOR_STRATEGIES]
+    if unknown:
+        print(f"Error: unknown strategies {unknown}; choose from {sorted(MONITOR_STRATEGIES)}", file=sys.stderr)
+        sys.exit(1)
+    server_args = ["--stages", args.stages, "--jitter", str(args.jitter)]
+    if args.no_push:
+        server_args.append("--no-push")
+    proc, base = start_server_process(server_args)
+    monitor_task.API_BASE = base + UPLOADER_PREFIX
+
+    rows = []
+    try:
+        for count in args.tasks:
+            for strategy in args.strategies:
+                # Fresh IDs per run: tasks start on their first status request
+                prefix = f"task_{strategy}_{count}_{int(time.time() * 1000)}"
+                task_ids = [f"{prefix}_{i}" for i in range(count)]
+                row = run_monitor(base, task_ids, strategy, args)
+                rows.append(row)
+                print(json.dumps(row), flush=True)
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    print(f"\n{'strategy':>10} {'tasks':>6} {'done':>6} {'seconds':>8} {'cpu':>6} {'requests':>9} "
+          f"{'req/task':>8} {'lat p50':>8} {'lat p95':>8}", file=sys.stderr)
+    for row in rows:
+        print(f"{row['strategy']:>10} {row['tasks']:>6} {row['finished']:>6} {row['seconds']:>8.2f} "
+              f"{row['cpuSeconds']:>6.2f} {row['requests']:>9} {row['requestsPerTask']:>8.1f} "
+              f"{row.get('latencyP50', float('nan')):>8.2f} {row.get('latencyP95', float('nan')):>8.2f}",
+              file=sys.stderr)
+    print(json.dumps({"type": "summary", "benchmark": "monitor", "stages": args.stages, "push": not args.no_push,
+                      "allFinished": all(r["finished"] == r["tasks"] for r in rows)}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks against the fake metafile server.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    dl_p = sub.add_parser("download", help="Parallel ranged download throughput by connection count")
+    dl_p.add_argument("--size", default="32M", help="Content size, e.g. 32M (default: 32M)")
+    dl_p.add_argument("--throttle", type=int, default=2048,
+                      help="Per-connection bandwidth limit in KiB/s, 0 = unlimited (default: 2048)")
+    dl_p.add_argument("--latency", type=float, default=0.0, help="Server delay per request, seconds")
+    dl_p.add_argument("--connections", type=parse_int_list, default=[1, 4, 8, 16],
+                      help="Comma-separated connection counts (default: 1,4,8,16)")
+    dl_p.add_argument("--segment-size", type=query_indexer.segment_size_bytes, default=1024 * 1024,
+                      help="Segment size in MB (default: 1)")
+    dl_p.add_argument("--accelerate", action="store_true", help="Go through the 307 accelerate redirect")
+    dl_p.set_defaults(func=bench_download)
+
+    mon_p = sub.add_parser("monitor", help="Concurrent task tracking and polling traffic per strategy")
+    mon_p.add_argument("--tasks", type=parse_int_list, default=[10, 100, 1000],
+                       help="Comma-separated task counts (default: 10,100,1000)")
+    mon_p.add_argument("--strategies", type=lambda v: [s.strip() for s in v.split(",") if s.strip()],
+                       default=["fixed", "adaptive", "longpoll", "sse"],
+                       help=f"Comma-separated strategies from {','.join(MONITOR_STRATEGIES)} "
+                            "(default: fixed,adaptive,longpoll,sse)")
+    mon_p.add_argument("--stages", default="merge=1,chunk_broadcast=6,index_broadcast=1",
+                       help="Server task stages, name=seconds,... (default: merge=1,chunk_broadcast=6,index_broadcast=1)")
+    mon_p.add_argument("--jitter", type=float, default=0.3, help="Per-task duration jitter (default: 0.3)")
+    mon_p.add_argument("--interval", type=float, default=monitor_task.DEFAULT_INTERVAL,
+                       help=f"Initial/fixed poll interval (default: {monitor_task.DEFAULT_INTERVAL})")
+    mon_p.add_argument("--concurrency", type=int, default=monitor_task.DEFAULT_CONCURRENCY,
+                       help=f"Max in-flight status requests (default: {monitor_task.DEFAULT_CONCURRENCY})")
+    mon_p.add_argument("--push-limit", type=int, default=monitor_task.MAX_PUSH_STREAMS,
+                       help=f"Max tasks on push channels at once (default: {monitor_task.MAX_PUSH_STREAMS})")
+    mon_p.add_argument("--no-push", action="store_true",
+                       help="Server without event stream / long poll, to measure the polling fallback")
+    mon_p.add_argument("--timeout", type=float, default=120, help="Per-run monitoring timeout (default: 120)")
+    mon_p.set_defaults(func=bench_monitor)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,28 @@ MetaID = SHA256(address)
 
 Usage:
     python calculate_metaid.py <address>
+    python calculate_metaid.py --batch [file|-] [--workers N]
+    python calculate_metaid.py --benchmark [count] [--workers N]
     
 Example:
     python calculate_metaid.py 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa
+    cat addresses.txt | python calculate_metaid.py --batch > metaids.ndjson
 """
 
+import argparse
 import hashlib
-import sys
 import json
+import os
+import sys
+import time
+from itertools import islice
+from multiprocessing import Pool
+
+
+# Batch mode hashes addresses in chunks. Input that fits in one chunk is hashed
+# in-process: starting worker processes would cost more than it saves.
+BATCH_CHUNK_SIZE = 20000
+DEFAULT_BENCHMARK_COUNT = 1000000
 
 
 def calculate_metaid(address):
@@ -29,15 +43,160 @@ def calculate_metaid(address):
     return metaid
 
 
+def format_ndjson_chunk(addresses):
+    """
+    Hash a chunk of addresses and render it as NDJSON.
+
+    Args:
+        addresses: List of stripped, non-empty addresses
+
+    Returns:
+        NDJSON text, one {"address", "metaId"} object per line
+    """
+    sha256 = hashlib.sha256
+    dumps = json.dumps
+    return ''.join(
+        f'{{"address":{dumps(address)},"metaId":"{sha256(address.encode("utf-8")).hexdigest()}"}}\n'
+        for address in addresses
+    )
+
+
+def iter_address_chunks(lines, chunk_size=BATCH_CHUNK_SIZE):
+    """Yield lists of at most chunk_size stripped, non-empty addresses."""
+    addresses = (line.strip() for line in lines)
+    addresses = (address for address in addresses if address)
+    while True:
+        chunk = list(islice(addresses, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def calculate_metaid_batch(lines, out, workers=None, chunk_size=BATCH_CHUNK_SIZE):
+    """
+    Hash addresses from an iterable of lines and write NDJSON to out.
+
+    Output order always matches input order. Input larger than one chunk is
+    spread across worker processes.
+
+    Args:
+        lines: Iterable of text lines, one address per line (blank lines skipped)
+        out: Writable text stream
+        workers: Number of worker processes (default: CPU count)
+        chunk_size: Addresses per chunk handed to a worker
+
+    Returns:
+        Number of addresses written
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = iter_address_chunks(lines, chunk_size)
+    first = next(chunks, None)
+    if first is None:
+        return 0
+
+    count = 0
+
+    def counted(all_chunks):
+        nonlocal count
+        for chunk in all_chunks:
+            count += len(chunk)
+            yield chunk
+
+    pending = counted(_prepend(first, chunks))
+
+    if len(first) < chunk_size or workers == 1:
+        for chunk in pending:
+            out.write(format_ndjson_chunk(chunk))
+        return count
+
+    with Pool(processes=workers) as pool:
+        # imap (not imap_unordered) keeps output order stable
+        for text in pool.imap(format_ndjson_chunk, pending):
+            out.write(text)
+    return count
+
+
+def _prepend(first, rest):
+    yield first
+    yield from rest
+
+
+def run_benchmark(count=DEFAULT_BENCHMARK_COUNT, workers=None):
+    """
+    Measure batch throughput in addresses per second, serial vs parallel.
+
+    Synthetic 34-character addresses are generated up front so that only
+    hashing and NDJSON formatting are timed; output goes to os.devnull.
+
+    Returns:
+        Dictionary with timings and addresses/second for each mode
+    """
+    workers = workers or os.cpu_count() or 1
+    addresses = [
+        '1' + hashlib.sha256(str(i).encode()).hexdigest()[:33]
+        for i in range(count)
+    ]
+
+    result = {"addresses": count, "workers": workers, "chunkSize": BATCH_CHUNK_SIZE}
+    with open(os.devnull, 'w') as sink:
+        for mode, mode_workers in (("serial", 1), ("parallel", workers)):
+            start = time.perf_counter()
+            calculate_metaid_batch(addresses, sink, workers=mode_workers)
+            elapsed = time.perf_counter() - start
+            result[f"{mode}Seconds"] = round(elapsed, 3)
+            result[f"{mode}AddressesPerSec"] = int(count / elapsed) if elapsed > 0 else None
+    return result
+
+
 def main():
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(
+        description="Calculate MetaID (SHA256 of the address) for one or many MVC addresses."
+    )
+    parser.add_argument("address", nargs="?", help="MVC address")
+    parser.add_argument("--batch", nargs="?", const="-", metavar="FILE",
+                        help="Read addresses (one per line) from FILE or stdin ('-') and write NDJSON")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes for large batches (default: CPU count)")
+    parser.add_argument("--benchmark", nargs="?", type=int, const=DEFAULT_BENCHMARK_COUNT, metavar="COUNT",
+                        help=f"Measure batch throughput on COUNT synthetic addresses (default: {DEFAULT_BENCHMARK_COUNT})")
+    args = parser.parse_args()
+
+    if args.workers is not None and args.workers <= 0:
+        print("Error: --workers must be positive", file=sys.stderr)
+        sys.exit(1)
+
+    if args.benchmark is not None:
+        result = run_benchmark(args.benchmark, args.workers)
+        print(json.dumps(result, indent=2))
+        return
+
+    if args.batch is not None:
+        try:
+            if args.batch == "-":
+                count = calculate_metaid_batch(sys.stdin, sys.stdout, args.workers)
+            else:
+                with open(args.batch, encoding='utf-8') as f:
+                    count = calculate_metaid_batch(f, sys.stdout, args.workers)
+        except FileNotFoundError:
+            print(f"Error: File not found: {args.batch}", file=sys.stderr)
+            sys.exit(1)
+        except BrokenPipeError:
+            # The reader went away (e.g. `| head`): stop quietly. Point stdout at
+            # devnull so the interpreter's final flush does not raise again.
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+        print(f"✅ Calculated {count:,} MetaIDs", file=sys.stderr)
+        return
+
+    if args.address is None:
         print("Error: Address required", file=sys.stderr)
         print("\nUsage: python calculate_metaid.py <address>", file=sys.stderr)
+        print("       python calculate_metaid.py --batch [file|-]", file=sys.stderr)
         print("\nExample:", file=sys.stderr)
         print("  python calculate_metaid.py 1A1zP1eP5QGefi2DMPTfTL5SLmv7DivfNa", file=sys.stderr)
         sys.exit(1)
     
-    address = sys.argv[1].strip()
+    address = args.address.strip()
     
     if not address:
         print("Error: Address cannot be empty", file=sys.stderr)
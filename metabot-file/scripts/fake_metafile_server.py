@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the metafile uploader and indexer, for offline testing and benchmarks.
+
+Serves the routes the scripts use under the same paths as
+https://file.metaid.io, so they can be pointed at it through the base URL
+environment variables:
+
+    METAFS_UPLOADER_BASE_URL=http://127.0.0.1:8780/metafile-uploader
+    METAFS_INDEXER_BASE_URL=http://127.0.0.1:8780/metafile-indexer
+
+Uploader routes:
+    POST /metafile-uploader/api/v1/files/chunked-upload-task        create a task (body ignored)
+    GET  /metafile-uploader/api/v1/files/task/{taskId}              task status
+    GET  .../task/{taskId}?wait=S&status=..&stage=..&progress=..    long poll: answers once the task
+                                                                    differs from the given state (or after S
+                                                                    seconds); sets X-Task-Wait
+    GET  .../task/{taskId}/stream                                   server-sent events, one "status" event
+                                                                    per change, closed after the final one
+
+Indexer routes:
+    GET /metafile-indexer/api/info/{address|metaid|globalmetaid}/{value}   user info
+    GET /metafile-indexer/api/v1/files/{pinId}                      file metadata
+    GET /metafile-indexer/api/v1/files/content/{pinId}              content (200 / 206)
+    GET /metafile-indexer/api/v1/files/accelerate/content/{pinId}   307 to /oss/{pinId}
+    GET /metafile-indexer/content/{pinId}                           avatar image
+    GET /oss/{pinId}                                                content (200 / 206)
+
+Test helpers:
+    GET /stats[?reset=1]     request counters by route (JSON)
+    GET /stats/tasks         every task with createdAt, terminalAt (epoch seconds) and polls
+
+Tasks move through --stages (name=seconds, in order) and then succeed;
+progress grows linearly over the total duration. Any task ID starting with
+"task_" is created on its first status request, so benchmarks can invent
+IDs; IDs containing "fail" fail halfway through the last stage. A
+successful task's pin ({indexTxId}i0) gets file metadata and synthetic
+content. Any address has a user (those starting with "noavatar" have no
+avatar); metaid/globalmetaid lookups find users already seen by address.
+
+Pushed updates (long poll, event stream) go out on every status or stage
+change, but progress-only changes at most once per second.
+
+--no-push disables the long poll and the event stream (wait is ignored and
+/stream is 404), like a server that only supports plain polling.
+
+Content is registered with --file PINID=PATH, or generated with
+--synthetic PINID=SIZE (deterministic pseudo-random bytes; SIZE accepts K/M/G).
+--throttle limits the bandwidth of each connection, which is how a real
+CDN/OSS behaves and what makes parallel ranged downloads worthwhile.
+
+Usage:
+    python fake_metafile_server.py --synthetic demo=64M --throttle 2048
+    python fake_metafile_server.py --stages merge=1,chunk_broadcast=8,index_broadcast=1 --jitter 0.3
+    python fake_metafile_server.py --port 0 --file video=res/file/video.mp4 --no-ranges
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DEFAULT_PORT = 8780
+SEND_BLOCK_SIZE = 64 * 1024
+INDEXER_PREFIX = "/metafile-indexer"
+UPLOADER_PREFIX = "/metafile-uploader"
+DEFAULT_STAGES = (("merge", 2.0), ("chunk_broadcast", 6.0), ("index_broadcast", 2.0))
+DEFAULT_TASK_FILE_SIZE = 1024 * 1024
+TASK_NOT_FOUND = 1008
+MAX_LONG_POLL_WAIT = 60
+STREAM_PING_INTERVAL = 15
+PUSH_PROGRESS_INTERVAL = 1.0  # progress-only changes are pushed at most this often
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+SIZE_RE = re.compile(r"^(\d+)([KMG]?)B?$", re.IGNORECASE)
+SIZE_UNITS = {"": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+
+
+def parse_size(text):
+    """'64M' -> 67108864."""
+    match = SIZE_RE.match(text.strip())
+    if not match:
+        raise ValueError(f"Invalid size: {text}")
+    return int(match.group(1)) * SIZE_UNITS[match.group(2).upper()]
+
+
+def parse_stages(text):
+    """'merge=2,chunk_broadcast=6' -> [('merge', 2.0), ('chunk_broadcast', 6.0)]."""
+    stages = []
+    for item in text.split(","):
+        name, sep, seconds = item.partition("=")
+        if not sep or not name.strip():
+            raise ValueError(f"Expected name=seconds, got: {item}")
+        if float(seconds) <= 0:
+            raise ValueError(f"Stage duration must be positive: {item}")
+        stages.append((name.strip(), float(seconds)))
+    return stages
+
+
+def synthetic_content(pin_id, size):
+    """Deterministic pseudo-random bytes for pin_id, so clients can recompute them."""
+    return random.Random(pin_id).randbytes(size)
+
+
+def iso_time(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+def parse_range(header, total):
+    """
+    Parse a single 'bytes=a-b' range.
+
+    Returns:
+        (start, end) inclusive, or None if the range is not satisfiable
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        # Suffix range: last N bytes
+        length = int(last)
+        if length == 0:
+            return None
+        return max(total - length, 0), total - 1
+    start = int(first)
+    end = min(int(last), total - 1) if last else total - 1
+    if start >= total or end < start:
+        return None
+    return start, end
+
+
+class FakeTask:
+    """A chunked upload task whose status is a pure function of the time since creation."""
+
+    def __init__(self, task_id, stages, fail=False, created=None):
+        self.task_id = task_id
+        self.stages = list(stages)
+        self.fail = fail
+        self.created = time.time() if created is None else created
+        self.total = sum(seconds for _, seconds in self.stages)
+        self.polls = 0
+        self.index_tx_id = hashlib.sha256(task_id.encode()).hexdigest()
+
+    @property
+    def terminal_at(self):
+        """Epoch time at which the task succeeds or fails."""
+        if self.fail:
+            return self.created + self.total - self.stages[-1][1] / 2
+        return self.created + self.total
+
+    def next_change(self, now, min_tick=0.0):
+        """
+        Earliest time after now at which snapshot() can differ (progress tick,
+        stage end or finish), or None. min_tick coarsens progress-only ticks.
+        """
+        if now >= self.terminal_at:
+            return None
+        tick = max(self.total / 100, min_tick)
+        candidates = [self.terminal_at, self.created + (int((now - self.created) / tick) + 1) * tick]
+        boundary = self.created
+        for _, seconds in self.stages:
+            boundary += seconds
+            if boundary > now:
+                candidates.append(boundary)
+                break
+        return min(candidates)
+
+    def snapshot(self, now=None):
+        """Task data as returned by GET /api/v1/files/task/{id} (snake_case, like the real API)."""
+        now = time.time() if now is None else now
+        data = {"task_id": self.task_id, "created_at": iso_time(self.created), "updated_at": iso_time(now)}
+        if now >= self.terminal_at:
+            if self.fail:
+                return {**data, "status": "failed", "stage": self.stages[-1][0],
+                        "progress": int((self.terminal_at - self.created) / self.total * 100),
+                        "message": "Failed to broadcast index transaction: insufficient balance",
+                        "failed_at": iso_time(self.terminal_at)}
+            return {**data, "status": "success", "progress": 100, "stage": "completed",
+                    "message": "Upload completed successfully", "index_tx_id": self.index_tx_id,
+                    "chunk_tx_ids": [hashlib.sha256(f"{self.task_id}:{i}".encode()).hexdigest() for i in range(3)],
+                    "completed_at": iso_time(self.terminal_at)}
+        elapsed = max(0.0, now - self.created)
+        stage, passed = self.stages[-1][0], 0.0
+        for name, seconds in self.stages:
+            if elapsed < passed + seconds:
+                stage = name
+                break
+            passed += seconds
+        return {**data, "status": "processing", "stage": stage,
+                "progress": min(99, int(elapsed / self.total * 100)),
+                "message": f"{stage} in progress"}
+
+
+class FakeMetafile:
+    """State shared by all request handlers: tasks, users, files, content and counters."""
+
+    def __init__(self, throttle_kbps=0, latency=0.0, ranges=True, stages=DEFAULT_STAGES, jitter=0.0,
+                 task_file_size=DEFAULT_TASK_FILE_SIZE, push=True):
+        self.throttle_bps = throttle_kbps * 1024
+        self.latency = latency
+        self.ranges = ranges
+        self.push = push
+        self.stages = list(stages)
+        self.jitter = jitter
+        self.task_file_size = task_file_size
+        self.contents = {}
+        self.content_types = {}
+        self.files = {}
+        self.tasks = {}
+        self.users = {}
+        self.user_keys = {}
+        self.lock = threading.Lock()
+        self.reset_stats()
+
+    def add_content(self, pin_id, data, content_type="application/octet-stream"):
+        self.contents[pin_id] = data
+        self.content_types[pin_id] = content_type
+
+    def etag(self, pin_id):
+        return '"' + hashlib.sha256(pin_id.encode() + str(len(self.contents[pin_id])).encode()).hexdigest()[:16] + '"'
+
+    def create_task(self, task_id=None, stages=None, fail=None):
+        """Register a task; stages default to the server's, scaled by a per-task jitter factor."""
+        task_id = task_id or f"task_{uuid.uuid4().hex[:16]}"
+        if stages is None:
+            scale = random.Random(task_id).uniform(1 - self.jitter, 1 + self.jitter) if self.jitter else 1.0
+            stages = [(name, seconds * scale) for name, seconds in self.stages]
+        task = FakeTask(task_id, stages, fail="fail" in task_id if fail is None else fail)
+        with self.lock:
+            return self.tasks.setdefault(task_id, task)
+
+    def get_task(self, task_id):
+        """Existing task, a new one for an unknown task_... ID, or None."""
+        with self.lock:
+            task = self.tasks.get(task_id)
+        if task is None and task_id.startswith("task_"):
+            task = self.create_task(task_id)
+        return task
+
+    def poll_task(self, task, now=None):
+        """Task data for a status request (counted in the task's polls)."""
+        with self.lock:
+            task.polls += 1
+        data = task.snapshot(now)
+        if data["status"] == "success":
+            self.register_task_file(task)
+        return data
+
+    def register_task_file(self, task):
+        pin_id = f"{task.index_tx_id}i0"
+        with self.lock:
+            if pin_id in self.files:
+                return
+            self.files[pin_id] = {
+                "pin_id": pin_id, "tx_id": task.index_tx_id, "path": "/file", "operation": "create",
+                "content_type": "application/octet-stream", "file_type": "file", "file_extension": ".bin",
+                "file_name": f"{task.task_id}.bin", "file_size": self.task_file_size,
+                "chain_name": "mvc", "timestamp": int(task.terminal_at),
+            }
+
+    def content(self, pin_id):
+        """Stored content for pin_id; content of uploaded task files is generated on first use."""
+        data = self.contents.get(pin_id)
+        if data is None and pin_id in self.files:
+            data = synthetic_content(pin_id, self.files[pin_id]["file_size"])
+            self.add_content(pin_id, data)
+        return data
+
+    def user(self, key_type, value):
+        """MetaIDUserInfo for a lookup, or None. Any address is a user; other keys need a prior address lookup."""
+        with self.lock:
+            if key_type != "address":
+                address = self.user_keys.get(value)
+                return self.users.get(address) if address else None
+            if value not in self.users:
+                metaid = hashlib.sha256(value.encode()).hexdigest()
+                global_metaid = "idq1" + hashlib.sha256(b"global:" + value.encode()).hexdigest()[:38]
+                avatar_id = None
+                if not value.startswith("noavatar"):
+                    avatar_id = hashlib.sha256(b"avatar:" + value.encode()).hexdigest() + "i0"
+                    self.add_content(avatar_id, b"\x89PNG\r\n\x1a\n" + synthetic_content(avatar_id, 2048), "image/png")
+                self.users[value] = {
+                    "globalMetaId": global_metaid, "metaid": metaid, "name": f"user-{value[:8]}",
+                    "address": value, "avatar": f"/content/{avatar_id}" if avatar_id else "",
+                    "avatarId": avatar_id or "",
+                }
+                self.user_keys[metaid] = value
+                self.user_keys[global_metaid] = value
+            return self.users[value]
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {"requests": 0, "bytesSent": 0, "routes": {}}
+
+    def count(self, route):
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["routes"][route] = self.stats["routes"].get(route, 0) + 1
+
+    def count_bytes(self, sent):
+        with self.lock:
+            self.stats["bytesSent"] += sent
+
+    def snapshot(self):
+        with self.lock:
+            return json.loads(json.dumps(self.stats))
+
+    def task_report(self):
+        with self.lock:
+            tasks = list(self.tasks.values())
+        return {task.task_id: {"createdAt": task.created, "terminalAt": task.terminal_at,
+                               "fail": task.fail, "polls": task.polls} for task in tasks}
+
+
+class FakeMetafileHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "FakeMetafile/1.0"
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_body(self, body):
+        """Write body, pacing it to the per-connection throttle."""
+        view = memoryview(body)
+        rate = self.state.throttle_bps
+        started = time.monotonic()
+        sent = 0
+        try:
+            while sent < len(view):
+                block = view[sent:sent + SEND_BLOCK_SIZE]
+                self.wfile.write(block)
+                sent += len(block)
+                if rate:
+                    ahead = sent / rate - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        self.state.count_bytes(sent)
+
+    def serve_content(self, pin_id, head=False):
+        data = self.state.content(pin_id)
+        if data is None:
+            self.send_json(404, {"code": 404, "message": f"pin not found: {pin_id}"})
+            return
+        total = len(data)
+        headers = {"ETag": self.state.etag(pin_id), "Content-Type": self.state.content_types[pin_id]}
+        if self.state.ranges:
+            headers["Accept-Ranges"] = "bytes"
+        range_header = self.headers.get("Range")
+        status, body = 200, data
+        if range_header and self.state.ranges:
+            span = parse_range(range_header, total)
+            if span is None:
+                self.send_json(416, {"code": 416, "message": "range not satisfiable"},
+                               {"Content-Range": f"bytes */{total}"})
+                return
+            start, end = span
+            status, body = 206, memoryview(data)[start:end + 1]
+            headers["Content-Range"] = f"bytes {start}-{end}/{total}"
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.send_body(body)
+
+    # Route handlers: (query, head, *path groups)
+
+    def handle_stats(self, query, head):
+        if "reset" in query:
+            self.state.reset_stats()
+        self.send_json(200, self.state.snapshot())
+
+    def handle_task_report(self, query, head):
+        self.send_json(200, self.state.task_report())
+
+    def handle_task(self, query, head, task_id):
+        task = self.state.get_task(task_id)
+        if task is None:
+            self.send_json(200, {"code": TASK_NOT_FOUND, "message": "Task not found"})
+            return
+        if "wait" not in query or not self.state.push:
+            self.send_json(200, {"code": 0, "message": "success", "data": self.state.poll_task(task)})
+            return
+
+        # Long poll: hold the request until the task differs from what the client last saw
+        try:
+            wait = min(max(float(query["wait"][0]), 0.0), MAX_LONG_POLL_WAIT)
+        except ValueError:
+            wait = 0.0
+        seen = tuple(query.get(k, [""])[0] for k in ("status", "stage", "progress"))
+        arrived = time.time()
+        deadline = arrived + wait
+        # Progress that moved on while the client was reconnecting waits for the next push tick
+        progress_due = task.next_change(arrived, PUSH_PROGRESS_INTERVAL) or arrived
+        while True:
+            now = time.time()
+            data = task.snapshot(now)
+            if (data["status"], data["stage"]) != seen[:2] or now >= deadline:
+                break
+            if str(data["progress"]) != seen[2] and now >= progress_due:
+                break
+            wake = task.next_change(now, PUSH_PROGRESS_INTERVAL)
+            # +1ms so float rounding cannot wake us just before the change
+            time.sleep(max(0.0, min(wake or deadline, deadline) - now) + 0.001)
+        data = self.state.poll_task(task)
+        self.send_json(200, {"code": 0, "message": "success", "data": data}, {"X-Task-Wait": f"{wait:g}"})
+
+    def write_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def handle_task_stream(self, query, head, task_id):
+        task = self.state.get_task(task_id)
+        if task is None or not self.state.push:
+            self.send_json(404, {"code": 404, "message": "Task stream not available"})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        last = None
+        next_ping = time.time() + STREAM_PING_INTERVAL
+        try:
+            while True:
+                now = time.time()
+                data = task.snapshot(now)
+                key = (data["status"], data["stage"], data["progress"])
+                if key != last:
+                    if data["status"] == "success":
+                        self.state.register_task_file(task)
+                    event = json.dumps({"code": 0, "message": "success", "data": data}, separators=(",", ":"))
+                    self.write_chunk(f"event: status\ndata: {event}\n\n".encode())
+                    last = key
+                if data["status"] in ("success", "failed"):
+                    break
+                if now >= next_ping:
+                    self.write_chunk(b": ping\n\n")
+                    next_ping = now + STREAM_PING_INTERVAL
+                time.sleep(max(0.0, min(task.next_change(now, PUSH_PROGRESS_INTERVAL) or now, next_ping) - now) + 0.001)
+            self.write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def handle_create_task(self, query, head):
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+        task = self.state.create_task()
+        self.send_json(200, {"code": 0, "data": {"taskId": task.task_id, "status": "created",
+                                                 "message": "Task created successfully"}})
+
+    def handle_info(self, query, head, key_type, value):
+        user = self.state.user(key_type, value)
+        if user is None:
+            self.send_json(404, {"code": 404, "message": "user not found"})
+            return
+        self.send_json(200, {"code": 1, "data": user})
+
+    def handle_file(self, query, head, pin_id):
+        self.state.content(pin_id)
+        meta = self.state.files.get(pin_id)
+        if meta is None and pin_id in self.state.contents:
+            meta = {"pin_id": pin_id, "file_name": pin_id, "file_size": len(self.state.contents[pin_id]),
+                    "content_type": self.state.content_types[pin_id]}
+        if meta is None:
+            self.send_json(404, {"code": 404, "message": f"file not found: {pin_id}"})
+            return
+        self.send_json(200, {"code": 0, "data": meta})
+
+    def handle_accelerate(self, query, head, pin_id):
+        self.send_response(307)
+        self.send_header("Location", f"/oss/{pin_id}")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def handle_content(self, query, head, pin_id):
+        self.serve_content(pin_id, head)
+
+    ROUTES = (
+        ("GET", r"/stats", "stats", "handle_stats"),
+        ("GET", r"/stats/tasks", "stats", "handle_task_report"),
+        ("GET", r"/oss/([^/]+)", "oss", "handle_content"),
+        ("GET", UPLOADER_PREFIX + r"/api/v1/files/task/([^/]+)", "task", "handle_task"),
+        ("GET", UPLOADER_PREFIX + r"/api/v1/files/task/([^/]+)/stream", "taskStream", "handle_task_stream"),
+        ("POST", UPLOADER_PREFIX + r"/api/v1/files/chunked-upload-task", "createTask", "handle_create_task"),
+        ("GET", INDEXER_PREFIX + r"/api/info/(address|metaid|globalmetaid)/([^/]+)", "info", "handle_info"),
+        ("GET", INDEXER_PREFIX + r"/api/v1/files/accelerate/content/([^/]+)", "accelerate", "handle_accelerate"),
+        ("GET", INDEXER_PREFIX + r"/api/v1/files/content/([^/]+)", "content", "handle_content"),
+        ("GET", INDEXER_PREFIX + r"/api/v1/files/([^/]+)", "file", "handle_file"),
+        ("GET", INDEXER_PREFIX + r"/content/([^/]+)", "avatar", "handle_content"),
+    )
+    COMPILED_ROUTES = [(method, re.compile(pattern + "$"), name, handler) for method, pattern, name, handler in ROUTES]
+
+    def route(self, method, head=False):
+        if self.state.latency:
+            time.sleep(self.state.latency)
+        url = urlsplit(self.path)
+        for route_method, pattern, name, handler in self.COMPILED_ROUTES:
+            match = pattern.match(url.path)
+            if match and route_method == method:
+                if name != "stats":
+                    self.state.count(name)
+                query = parse_qs(url.query, keep_blank_values=True)
+                getattr(self, handler)(query, head, *(unquote(g) for g in match.groups()))
+                return
+        self.state.count("notFound")
+        self.send_json(404, {"code": 404, "message": f"no route: {method} {url.path}"})
+
+    def do_GET(self):
+        self.route("GET")
+
+    def do_HEAD(self):
+        self.route("GET", head=True)
+
+    def do_POST(self):
+        self.route("POST")
+
+
+def start_server(state, host="127.0.0.1", port=DEFAULT_PORT, verbose=False):
+    """
+    Start the fake server in a daemon thread.
+
+    Returns:
+        The running ThreadingHTTPServer; its base URL is
+        f"http://{host}:{server.server_address[1]}". Call shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), FakeMetafileHandler)
+    server.daemon_threads = True
+    server.request_queue_size = 128
+    server.state = state
+    server.verbose = verbose
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def parse_assignment(text):
+    pin_id, sep, value = text.partition("=")
+    if not sep or not pin_id or not value:
+        raise ValueError(f"Expected PINID=VALUE, got: {text}")
+    return pin_id, value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the metafile uploader and indexer.")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"Port, 0 picks a free one (default: {DEFAULT_PORT})")
+    parser.add_argument("--file", action="append", default=[], metavar="PINID=PATH",
+                        help="Serve a local file as pinId (repeatable)")
+    parser.add_argument("--synthetic", action="append", default=[], metavar="PINID=SIZE",
+                        help="Serve SIZE deterministic random bytes as pinId, e.g. demo=64M (repeatable)")
+    parser.add_argument("--stages", type=parse_stages, default=list(DEFAULT_STAGES),
+                        help="Task stages as name=seconds,... (default: merge=2,chunk_broadcast=6,index_broadcast=2)")
+    parser.add_argument("--jitter", type=float, default=0.0,
+                        help="Scale each task's stage durations by a random factor in [1-J, 1+J]")
+    parser.add_argument("--task-file-size", default="1M", help="Size of the file behind a finished task (default: 1M)")
+    parser.add_argument("--throttle", type=int, default=0, metavar="KBPS",
+                        help="Per-connection bandwidth limit in KiB/s (default: unlimited)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay before each response, seconds")
+    parser.add_argument("--no-ranges", action="store_true", help="Ignore Range headers (always 200)")
+    parser.add_argument("--no-push", action="store_true",
+                        help="Plain polling only: no long poll, no /stream event stream")
+    parser.add_argument("--verbose", action="store_true", help="Log every request to stderr")
+    args = parser.parse_args()
+
+    if not 0 <= args.jitter < 1:
+        print("Error: --jitter must be in [0, 1)", file=sys.stderr)
+        sys.exit(1)
+    try:
+        state = FakeMetafile(args.throttle, args.latency, ranges=not args.no_ranges, stages=args.stages,
+                             jitter=args.jitter, task_file_size=parse_size(args.task_file_size),
+                             push=not args.no_push)
+        for item in args.file:
+            pin_id, path = parse_assignment(item)
+            with open(path, "rb") as f:
+                state.add_content(pin_id, f.read())
+        for item in args.synthetic:
+            pin_id, size = parse_assignment(item)
+            state.add_content(pin_id, synthetic_content(pin_id, parse_size(size)))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    server = start_server(state, args.host, args.port, args.verbose)
+    base = f"http://{args.host}:{server.server_address[1]}"
+    print(json.dumps({"baseUrl": base, "indexerBaseUrl": base + INDEXER_PREFIX,
+                      "uploaderBaseUrl": base + UPLOADER_PREFIX,
+                      "pins": {pin: len(data) for pin, data in state.contents.items()}}), flush=True)
+    print(f"🧪 Fake metafile server on {base} (Ctrl-C to stop)", file=sys.stderr)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,587 @@
+#!/usr/bin/env python3
+"""
+Local identity index: address <-> metaId <-> globalMetaId <-> name.
+
+Any lookup (by address, metaid, globalmetaid or name) fills in every key of the
+identity it resolves, so later lookups by any other key are answered locally.
+Misses are resolved through the metafs-indexer /api/info/* routes (see query_indexer.py).
+
+Files (directory from METAFS_IDENTITY_DIR, default ~/.cache/metabot-file/identity):
+    identities.ndjson  append-only log of identity records (later lines win)
+    metaid.idx         sorted fixed-width metaId -> (address, log offset) table;
+                       memory-mapped and binary-searched for reverse lookups
+                       without loading the log
+    index.lock         lock file serialising appends and compaction across processes
+
+Lookups only append to the log. Compaction (warm, the compact command, or once
+more than DIRTY_THRESHOLD records were appended since the last one) rewrites the
+log with one merged line per identity and rebuilds metaid.idx from it, under the
+lock and from the log on disk, so records written by other processes are kept.
+
+A lookup by metaId reads metaid.idx first: a hit reads the identity's line at
+its offset in the log plus the lines appended since the table was built (at
+most about DIRTY_THRESHOLD), never the whole log. Only a miss loads the log,
+then asks the indexer.
+
+Usage:
+    python identity_index.py lookup --address <address>
+    python identity_index.py lookup --metaid <metaId> [--offline]
+    python identity_index.py lookup --globalmetaid <globalMetaId>
+    python identity_index.py lookup --name <name> --offline
+    python identity_index.py warm [file|-] [--workers N] [--refresh]
+    python identity_index.py compact
+    python identity_index.py stats
+"""
+
+import argparse
+import contextlib
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from calculate_metaid import calculate_metaid
+from query_indexer import IndexerError, fetch_json, get_url, user_info_path
+
+INDEX_DIR = os.environ.get(
+    "METAFS_IDENTITY_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "metabot-file", "identity"),
+)
+RECORDS_FILE = "identities.ndjson"
+METAID_TABLE_FILE = "metaid.idx"
+LOCK_FILE = "index.lock"
+
+# metaid.idx layout: 8-byte magic, uint32 record count, uint64 size of the log it
+# was built from, then fixed-width records of 32-byte raw metaId + NUL-padded
+# ASCII address + uint64 offset of the identity's line in that log, sorted by metaId.
+TABLE_MAGIC = b"MIDXv3\x00\x00"
+TABLE_HEADER = struct.Struct("<8sIQ")
+METAID_BYTES = 32
+ADDRESS_BYTES = 64
+OFFSET = struct.Struct("<Q")
+TABLE_RECORD_SIZE = METAID_BYTES + ADDRESS_BYTES + OFFSET.size
+
+DEFAULT_WARM_WORKERS = 16
+DIRTY_THRESHOLD = 256  # log records appended since the last compaction before the next one
+IDENTITY_KEYS = ("address", "metaId", "globalMetaId", "name", "avatarId")
+
+
+def record_from_user_info(data):
+    """
+    Normalise an indexer user info payload into an identity record.
+
+    Both the MetaID format (/api/info/*: metaid, avatarId) and the v1 format
+    (metaId, avatarPinId) are accepted. A missing metaId is derived from the
+    address, since MetaID = SHA256(address).
+    """
+    address = data.get("address") or None
+    record = {
+        "address": address,
+        "metaId": data.get("metaid") or data.get("metaId") or (calculate_metaid(address) if address else None),
+        "globalMetaId": data.get("globalMetaId") or data.get("globalMetaID") or None,
+        "name": data.get("name") or None,
+        "avatarId": data.get("avatarId") or data.get("avatarPinId") or None,
+    }
+    return record
+
+
+class MetaIdTable:
+    """Read-only view of metaid.idx: memory-mapped, binary-searched."""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._map = None
+        self.count = 0
+        self.log_size = 0
+
+    def __enter__(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) <= TABLE_HEADER.size:
+            return self
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, log_size = TABLE_HEADER.unpack_from(self._map, 0)
+        if magic[:4] != TABLE_MAGIC[:4]:
+            raise ValueError(f"Not a metaId table: {self.path}")
+        if magic == TABLE_MAGIC:
+            # Tables of an older layout are treated as empty until the next compaction
+            self.count = count
+            self.log_size = log_size
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._map = None
+        self._file = None
+
+    def _key_at(self, i):
+        offset = TABLE_HEADER.size + i * TABLE_RECORD_SIZE
+        return self._map[offset:offset + METAID_BYTES]
+
+    def lookup(self, metaid):
+        """Return the address for metaid (hex string), or None."""
+        found = self.find(metaid)
+        return found[0] if found else None
+
+    def find(self, metaid):
+        """Return (address, log offset) for metaid (hex string), or None."""
+        if not self.count:
+            return None
+        try:
+            key = bytes.fromhex(metaid)
+        except ValueError:
+            return None
+        if len(key) != METAID_BYTES:
+            return None
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._key_at(lo) == key:
+            offset = TABLE_HEADER.size + lo * TABLE_RECORD_SIZE + METAID_BYTES
+            address = self._map[offset:offset + ADDRESS_BYTES].rstrip(b"\x00").decode("ascii")
+            (log_offset,) = OFFSET.unpack_from(self._map, offset + ADDRESS_BYTES)
+            return address, log_offset
+        return None
+
+
+def write_metaid_table(path, entries, log_size=0):
+    """Write (metaId hex, address, log offset) entries as a sorted table; replaces path atomically."""
+    rows = []
+    for metaid, address, log_offset in entries:
+        try:
+            key = bytes.fromhex(metaid)
+            value = address.encode("ascii")
+        except (ValueError, UnicodeEncodeError):
+            continue
+        if len(key) != METAID_BYTES or len(value) > ADDRESS_BYTES:
+            continue
+        rows.append(key + value.ljust(ADDRESS_BYTES, b"\x00") + OFFSET.pack(log_offset))
+    rows.sort()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(TABLE_HEADER.pack(TABLE_MAGIC, len(rows), log_size))
+        f.writelines(rows)
+    os.replace(tmp_path, path)
+    return len(rows)
+
+
+@contextlib.contextmanager
+def index_lock(index_dir):
+    """Exclusive lock on the index directory, held across processes."""
+    os.makedirs(index_dir, exist_ok=True)
+    with open(os.path.join(index_dir, LOCK_FILE), "a+b") as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+class IdentityIndex:
+    """
+    In-memory view of the identity log with lookups by every key.
+
+    Records are merged by address (or metaId/globalMetaId when the address is
+    unknown). The log is loaded on first use; metaId lookups answered by the
+    metaId table never load it. New records are appended to the log on save();
+    compact() rewrites the log and rebuilds the metaId table.
+    """
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = index_dir
+        self.records_path = os.path.join(index_dir, RECORDS_FILE)
+        self.table_path = os.path.join(index_dir, METAID_TABLE_FILE)
+        self.by_address = {}
+        self.by_metaid = {}
+        self.by_globalmetaid = {}
+        self.by_name = {}
+        self._pending = []
+        self._loaded = False
+
+    def load(self):
+        """Read the whole log into the in-memory view (once)."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if os.path.exists(self.records_path):
+            with open(self.records_path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        self._merge(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        # Records remembered before the log was read are newer than any line in it
+        for record in self._pending:
+            self._merge(record)
+
+    def _table_record(self, metaid):
+        """
+        Record for metaid from the metaId table: its line in the log merged with
+        the lines appended since the table was built. None on a miss, or if the
+        log no longer matches the table (replaced by a concurrent compaction).
+        """
+        with MetaIdTable(self.table_path) as table:
+            found = table.find(metaid)
+            log_size = table.log_size
+        if not found:
+            return None
+        address, offset = found
+        try:
+            with open(self.records_path, "rb") as f:
+                if os.fstat(f.fileno()).st_size < log_size:
+                    return None
+                f.seek(offset)
+                record = json.loads(f.readline())
+                if record.get("metaId") != metaid:
+                    return None
+                f.seek(log_size)
+                for line in f:
+                    try:
+                        update = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if update.get("address") == address or update.get("metaId") == metaid:
+                        record.update((k, v) for k, v in update.items() if v is not None)
+        except (OSError, ValueError):
+            return None
+        return record
+
+    def _merge(self, record):
+        existing = None
+        if record.get("address"):
+            existing = self.by_address.get(record["address"])
+        if existing is None and record.get("metaId"):
+            existing = self.by_metaid.get(record["metaId"])
+        if existing is None and record.get("globalMetaId"):
+            existing = self.by_globalmetaid.get(record["globalMetaId"])
+        if existing is None:
+            existing = {}
+        if existing.get("name") and record.get("name") and existing["name"] != record["name"]:
+            names = self.by_name.get(existing["name"], [])
+            names[:] = [r for r in names if r is not existing]
+        for key, value in record.items():
+            if value is not None:
+                existing[key] = value
+
+        if existing.get("address"):
+            self.by_address[existing["address"]] = existing
+        if existing.get("metaId"):
+            self.by_metaid[existing["metaId"]] = existing
+        if existing.get("globalMetaId"):
+            self.by_globalmetaid[existing["globalMetaId"]] = existing
+        if existing.get("name"):
+            names = self.by_name.setdefault(existing["name"], [])
+            if not any(r is existing for r in names):
+                names.append(existing)
+        return existing
+
+    def remember(self, record):
+        """Merge record into the index and queue it for the next save()."""
+        record = {k: record.get(k) for k in IDENTITY_KEYS if record.get(k) is not None}
+        if not record:
+            return None
+        record["updatedAt"] = int(time.time())
+        self._pending.append(record)
+        return self._merge(record)
+
+    def save(self):
+        """Append queued records to the log; compacts once enough records are not in the table yet."""
+        if not self._pending:
+            return 0
+        text = "".join(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in self._pending)
+        saved = len(self._pending)
+        with index_lock(self.index_dir):
+            # Appends happen under the lock so compaction never replaces the log under a writer
+            with open(self.records_path, "a", encoding="utf-8") as f:
+                f.write(text)
+            self._pending = []
+            if self._dirty_records() > DIRTY_THRESHOLD:
+                self._compact_locked()
+        return saved
+
+    def _dirty_records(self):
+        """Log records appended after the log size the metaId table was built from."""
+        with MetaIdTable(self.table_path) as table:
+            covered = table.log_size
+        if not os.path.exists(self.records_path):
+            return 0
+        with open(self.records_path, "rb") as f:
+            if covered > os.fstat(f.fileno()).st_size:
+                covered = 0  # log replaced behind the table's back
+            f.seek(covered)
+            return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+
+    def compact(self):
+        """Rewrite the log with one line per identity and rebuild the metaId table."""
+        self.save()
+        with index_lock(self.index_dir):
+            return self._compact_locked()
+
+    def _compact_locked(self):
+        # Merge from the log on disk, not from this process's view, so records
+        # other processes appended since this one loaded are kept
+        disk = IdentityIndex(self.index_dir)
+        disk.load()
+        records = list({id(r): r for r in (*disk.by_address.values(), *disk.by_metaid.values(),
+                                           *disk.by_globalmetaid.values())}.values())
+        records.sort(key=lambda r: r.get("updatedAt", 0))
+        lines = [(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+                 for r in records]
+        entries = []
+        offset = 0
+        for record, line in zip(records, lines):
+            if record.get("metaId") and record.get("address"):
+                entries.append((record["metaId"], record["address"], offset))
+            offset += len(line)
+        tmp_path = f"{self.records_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.writelines(lines)
+        os.replace(tmp_path, self.records_path)
+        table_records = write_metaid_table(self.table_path, entries, log_size=offset)
+        self.by_address, self.by_metaid = disk.by_address, disk.by_metaid
+        self.by_globalmetaid, self.by_name = disk.by_globalmetaid, disk.by_name
+        self._loaded = True
+        for record in self._pending:
+            self._merge(record)
+        return {"identities": len(records), "metaIdTableRecords": table_records}
+
+    def get(self, key_type, value):
+        """Look up a record locally. key_type: address, metaid, globalmetaid or name."""
+        self.load()
+        if key_type == "address":
+            return self.by_address.get(value)
+        if key_type == "metaid":
+            return self.by_metaid.get(value) or self.by_globalmetaid.get(value)
+        if key_type == "globalmetaid":
+            return self.by_globalmetaid.get(value)
+        if key_type == "name":
+            matches = self.by_name.get(value)
+            return matches[-1] if matches else None
+        raise ValueError(f"Unknown key type: {key_type}")
+
+    def resolve(self, key_type, value, offline=False, refresh=False):
+        """
+        Resolve an identity, fetching from the indexer on a local miss.
+
+        A metaId is looked up in the metaId table first; the log is only loaded
+        when the table misses.
+
+        Returns:
+            (record or None, source) where source is "table", "local", "computed" or "indexer"
+        """
+        if not refresh:
+            record, source = None, "local"
+            if key_type == "metaid" and not self._loaded:
+                record = self._table_record(value)
+                if record:
+                    record, source = self._merge(record), "table"
+            if record is None:
+                record = self.get(key_type, value)
+            if record and record.get("globalMetaId"):
+                return record, source
+            if record and offline:
+                return record, source
+        if key_type == "name":
+            # The indexer has no lookup by name
+            return self.get(key_type, value), "local"
+        if offline:
+            if key_type == "address":
+                return self.remember({"address": value, "metaId": calculate_metaid(value)}), "computed"
+            return None, "local"
+
+        fetched = fetch_user_record(key_type, value)
+        if fetched is None:
+            if key_type == "address":
+                return self.remember({"address": value, "metaId": calculate_metaid(value)}), "computed"
+            return None, "indexer"
+        return self.remember(fetched), "indexer"
+
+
+def fetch_user_record(key_type, value):
+    """Fetch user info from the indexer and return an identity record (None if unknown)."""
+    try:
+        out = fetch_json(get_url(user_info_path(key_type, value)))
+    except IndexerError as e:
+        if e.status == 404:
+            return None
+        raise
+    data = out.get("data") if isinstance(out, dict) else None
+    if not data:
+        return None
+    record = record_from_user_info(data)
+    if key_type == "address" and not record["address"]:
+        record["address"] = value
+        record["metaId"] = record["metaId"] or calculate_metaid(value)
+    return record
+
+
+def lookup_metaid_address(metaid, index_dir=INDEX_DIR):
+    """Reverse metaId -> address lookup through the memory-mapped table only."""
+    with MetaIdTable(os.path.join(index_dir, METAID_TABLE_FILE)) as table:
+        return table.lookup(metaid)
+
+
+def warm(index, addresses, workers=DEFAULT_WARM_WORKERS, refresh=False):
+    """
+    Resolve many addresses concurrently and add them to the index.
+
+    Returns:
+        Dictionary with counts of fetched, cached and failed addresses
+    """
+    todo = []
+    cached = 0
+    seen = set()
+    for address in addresses:
+        if address in seen:
+            continue
+        seen.add(address)
+        record = index.get("address", address)
+        if record and record.get("globalMetaId") and not refresh:
+            cached += 1
+        else:
+            todo.append(address)
+
+    def fetch(address):
+        try:
+            return address, fetch_user_record("address", address), None
+        except IndexerError as e:
+            return address, None, str(e)
+
+    fetched = 0
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for address, record, error in pool.map(fetch, todo):
+            if error:
+                failed.append({"address": address, "error": error})
+                continue
+            index.remember(record or {"address": address, "metaId": calculate_metaid(address)})
+            fetched += 1
+    index.compact()
+    return {"requested": len(seen), "cached": cached, "fetched": fetched, "failed": failed}
+
+
+def cmd_lookup(args):
+    index = IdentityIndex(args.index_dir)
+    for key_type in ("address", "metaid", "globalmetaid", "name"):
+        value = getattr(args, key_type)
+        if value:
+            break
+    try:
+        record, source = index.resolve(key_type, value, offline=args.offline, refresh=args.refresh)
+    except IndexerError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    index.save()
+    if not record:
+        print(f"Not found: {key_type}={value}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps({**record, "source": source}, ensure_ascii=False))
+
+
+def cmd_warm(args):
+    if args.file == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        try:
+            with open(args.file, encoding="utf-8") as f:
+                lines = f.read().splitlines()
+        except FileNotFoundError:
+            print(f"Error: File not found: {args.file}", file=sys.stderr)
+            sys.exit(1)
+    addresses = [line.strip() for line in lines if line.strip()]
+
+    index = IdentityIndex(args.index_dir)
+    start = time.perf_counter()
+    summary = warm(index, addresses, workers=args.workers, refresh=args.refresh)
+    summary["seconds"] = round(time.perf_counter() - start, 3)
+    print(json.dumps(summary, ensure_ascii=False))
+    print(
+        f"✅ Warmed {summary['fetched']} / cached {summary['cached']} / failed {len(summary['failed'])}",
+        file=sys.stderr,
+    )
+
+
+def cmd_compact(args):
+    index = IdentityIndex(args.index_dir)
+    print(json.dumps(index.compact()))
+
+
+def cmd_stats(args):
+    index = IdentityIndex(args.index_dir)
+    index.load()
+    with MetaIdTable(index.table_path) as table:
+        table_count = table.count
+    print(json.dumps({
+        "indexDir": args.index_dir,
+        "identities": len({id(r) for r in (*index.by_address.values(), *index.by_metaid.values(),
+                                           *index.by_globalmetaid.values())}),
+        "addresses": len(index.by_address),
+        "globalMetaIds": len(index.by_globalmetaid),
+        "names": len(index.by_name),
+        "metaIdTableRecords": table_count,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Local address <-> metaId <-> globalMetaId <-> name index."
+    )
+    parser.add_argument("--index-dir", default=INDEX_DIR, help=f"Index directory (default: {INDEX_DIR})")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    lookup_p = sub.add_parser("lookup", help="Resolve an identity by any one key")
+    g = lookup_p.add_mutually_exclusive_group(required=True)
+    g.add_argument("--address", help="User address")
+    g.add_argument("--metaid", help="User metaId")
+    g.add_argument("--globalmetaid", help="User globalMetaId")
+    g.add_argument("--name", help="Display name (local index only)")
+    lookup_p.add_argument("--offline", action="store_true", help="Never call the indexer")
+    lookup_p.add_argument("--refresh", action="store_true", help="Always re-fetch from the indexer")
+    lookup_p.set_defaults(func=cmd_lookup)
+
+    warm_p = sub.add_parser("warm", help="Bulk-resolve addresses (one per line) into the index")
+    warm_p.add_argument("file", nargs="?", default="-", help="Address list file, or '-' for stdin")
+    warm_p.add_argument("--workers", type=int, default=DEFAULT_WARM_WORKERS,
+                        help=f"Concurrent indexer requests (default: {DEFAULT_WARM_WORKERS})")
+    warm_p.add_argument("--refresh", action="store_true", help="Re-fetch addresses already indexed")
+    warm_p.set_defaults(func=cmd_warm)
+
+    compact_p = sub.add_parser("compact", help="Rewrite the log (one line per identity) and rebuild the metaId table")
+    compact_p.set_defaults(func=cmd_compact)
+
+    stats_p = sub.add_parser("stats", help="Show index size")
+    stats_p.set_defaults(func=cmd_stats)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
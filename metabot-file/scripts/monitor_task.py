@@ -3,113 +3,525 @@
 Monitor file upload task progress.
 
 Usage:
-    python monitor_task.py <task_id> [timeout] [interval]
+    python monitor_task.py <task_id> [timeout] [interval] [--fixed] [--push]
+    python monitor_task.py multi [task_id ...] [--file FILE] [--timeout N] [--interval N] [--mode MODE]
+    python monitor_task.py resume [--timeout N]
+    python monitor_task.py journal [--all]
     
 Arguments:
     task_id: Task ID returned from chunked upload
     timeout: Maximum time to wait in seconds (default: 300)
-    interval: Polling interval in seconds (default: 5)
+    interval: Initial polling interval in seconds (default: 5)
+    --fixed: Poll at a fixed interval instead of the adaptive schedule
+    --push: Try the server's status stream / long poll before polling
+
+Status is polled by default. With --push (multi/resume: --mode auto, sse or
+longpoll) updates are taken from the server when it offers them: first a
+server-sent event stream (GET .../task/{id}/stream), then a long poll
+(?wait=S returns as soon as the task changes). If neither is offered, or a
+stream breaks, the polling loop below takes over.
+
+Polling is adaptive by default: the next poll is scheduled near the estimated
+end of the current stage (merge, chunk_broadcast, ...) from that stage's own
+progress rate, bounded to [1s, 30s], and network/API errors back off
+exponentially.
+
+Every watched task is recorded in a journal (SQLite; METAFS_MONITOR_JOURNAL,
+default ~/.cache/metabot-file/monitor_journal.sqlite3) with its last seen
+status/progress/stage. `resume` monitors every unfinished task in it
+concurrently, e.g. after the process died or timed out.
+
+Endpoints can be overridden with METAFS_UPLOADER_BASE_URL and
+METAFS_INDEXER_BASE_URL (used for the viewUrls in the result).
     
 Example:
     python monitor_task.py abc123def456 300 5
+    cat task_ids.txt | python monitor_task.py multi --timeout 1800
 """
 
+import argparse
+import asyncio
+import os
+import random
 import requests
+import sqlite3
 import time
 import sys
 import json
+from concurrent.futures import ThreadPoolExecutor
+
+from query_indexer import new_session
 
 
-# API Configuration
-API_BASE = "https://file.metaid.io/metafile-uploader"
+# API Configuration (override the endpoints, e.g. to test against fake_metafile_server.py)
+API_BASE = os.environ.get(
+    "METAFS_UPLOADER_BASE_URL", "https://file.metaid.io/metafile-uploader"
+).rstrip("/")
+INDEXER_BASE = os.environ.get(
+    "METAFS_INDEXER_BASE_URL", "https://file.metaid.io/metafile-indexer"
+).rstrip("/")
 DEFAULT_TIMEOUT = 300  # 5 minutes
 DEFAULT_INTERVAL = 5   # 5 seconds
+DEFAULT_CONCURRENCY = 32  # max in-flight status requests in multi mode
+MIN_POLL_INTERVAL = 1    # adaptive schedule bounds (seconds)
+MAX_POLL_INTERVAL = 30
+JOURNAL_PATH = os.environ.get(
+    "METAFS_MONITOR_JOURNAL",
+    os.path.join(os.path.expanduser("~"), ".cache", "metabot-file", "monitor_journal.sqlite3"),
+)
+TERMINAL_STATUSES = ('success', 'failed', 'error')
+STATUS_MODES = ('auto', 'sse', 'longpoll', 'poll')
+LONG_POLL_WAIT = 25        # seconds the server may hold a long-poll request
+STREAM_READ_TIMEOUT = 45   # longer than the server's keep-alive ping interval
+MAX_PUSH_STREAMS = 256     # multi mode: tasks beyond this many open streams are polled
+
+JOURNAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    task_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    stage TEXT,
+    message TEXT,
+    result TEXT,
+    created_at INTEGER NOT NULL,
+    updated_at INTEGER NOT NULL
+)
+"""
+
+
+class TaskJournal:
+    """
+    Persistent record of watched tasks and their last seen status.
+
+    Backed by SQLite in WAL mode so several monitor processes can share it.
+    Journal failures never interrupt monitoring: after the first error a
+    warning is printed and the journal disables itself.
+    """
+
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self.conn = None
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute(JOURNAL_SCHEMA)
+        except (OSError, sqlite3.Error) as e:
+            self._disable(e)
+
+    def _disable(self, error):
+        print(f"\n⚠️  Task journal disabled ({self.path}): {error}", file=sys.stderr)
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = None
+
+    def _execute(self, sql, params=()):
+        if self.conn is None:
+            return None
+        try:
+            return self.conn.execute(sql, params)
+        except sqlite3.Error as e:
+            self._disable(e)
+            return None
+
+    def watch(self, task_id):
+        """Start tracking a task (keeps its last seen state if already journaled)."""
+        now = int(time.time())
+        self._execute(
+            "INSERT INTO tasks (task_id, status, created_at, updated_at) VALUES (?, 'pending', ?, ?) "
+            "ON CONFLICT(task_id) DO NOTHING",
+            (task_id, now, now),
+        )
+
+    def update(self, task_id, status, progress=0, stage=None, message=None, result=None):
+        """Record the latest status of a task (result: formatted JSON for terminal states)."""
+        self._execute(
+            "UPDATE tasks SET status = ?, progress = ?, stage = ?, message = ?, result = ?, updated_at = ? "
+            "WHERE task_id = ?",
+            (status, int(progress or 0), stage, message,
+             json.dumps(result, separators=(',', ':')) if result is not None else None,
+             int(time.time()), task_id),
+        )
 
+    def entries(self, unfinished_only=False):
+        sql = "SELECT task_id, status, progress, stage, message, result, created_at, updated_at FROM tasks"
+        if unfinished_only:
+            sql += f" WHERE status NOT IN ({', '.join('?' * len(TERMINAL_STATUSES))})"
+        cursor = self._execute(sql + " ORDER BY created_at",
+                               TERMINAL_STATUSES if unfinished_only else ())
+        if cursor is None:
+            return []
+        return [
+            {
+                "taskId": task_id, "status": status, "progress": progress, "stage": stage,
+                "message": message, "result": json.loads(result) if result else None,
+                "createdAt": created_at, "updatedAt": updated_at,
+            }
+            for task_id, status, progress, stage, message, result, created_at, updated_at in cursor
+        ]
 
-def monitor_task(task_id, timeout=DEFAULT_TIMEOUT, interval=DEFAULT_INTERVAL):
+    def unfinished(self):
+        """Task IDs not yet seen in a terminal state."""
+        return [entry["taskId"] for entry in self.entries(unfinished_only=True)]
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+class PollScheduler:
+    """
+    Adaptive poll schedule for one task.
+
+    The progress rate is measured from the start of the current stage, so a
+    stage change resets the estimate. The next poll is scheduled at the
+    estimated end of the current stage (where the next transition, or the
+    end of the task, shows up), clamped to [min_interval, max_interval].
+    Progress is reported for the whole task, so a stage's end is the progress
+    at which it was seen ending before, in this task or in another one sharing
+    the same stage_ends dict (one per monitoring run); for a stage not seen
+    ending yet, the next poll is no later
+    than the time already spent in it. Until a rate
+    is known the initial interval is used. Consecutive errors back off
+    exponentially (with jitter) up to max_interval.
+    """
+
+    def __init__(self, interval=DEFAULT_INTERVAL, min_interval=MIN_POLL_INTERVAL,
+                 max_interval=MAX_POLL_INTERVAL, adaptive=True, stage_ends=None):
+        self.interval = interval
+        self.min_interval = min(min_interval, interval)
+        self.max_interval = max(max_interval, interval)
+        self.adaptive = adaptive
+        self.stage_ends = {} if stage_ends is None else stage_ends
+        self.stage = None
+        self.stage_start = None  # (time, progress) of the first sample in the current stage
+        self.last = None         # (time, progress) of the latest sample
+        self.errors = 0
+
+    def observe(self, progress, stage, now=None):
+        """Record a successful status poll."""
+        now = time.time() if now is None else now
+        progress = progress or 0
+        self.errors = 0
+        if stage != self.stage or self.stage_start is None or progress < self.stage_start[1]:
+            if self.stage is not None and stage != self.stage and self.stage_start[1] <= progress < 100:
+                # The stage ended at or before this sample; keep the earliest end seen
+                self.stage_ends[self.stage] = min(progress, self.stage_ends.get(self.stage, progress))
+            self.stage = stage
+            self.stage_start = (now, progress)
+        self.last = (now, progress)
+
+    def observe_error(self):
+        """Record a failed status poll (network error, timeout, bad response)."""
+        self.errors += 1
+
+    def rate(self):
+        """Progress (percent per second) in the current stage, or None if unknown."""
+        if not self.stage_start or not self.last:
+            return None
+        (t0, p0), (t1, p1) = self.stage_start, self.last
+        if t1 <= t0 or p1 <= p0:
+            return None
+        return (p1 - p0) / (t1 - t0)
+
+    def eta(self, now=None):
+        """Estimated seconds until progress reaches 100%, or None if unknown."""
+        rate = self.rate()
+        if not rate:
+            return None
+        now = time.time() if now is None else now
+        t1, p1 = self.last
+        return max(0.0, (100 - p1) / rate - (now - t1))
+
+    def stage_eta(self, now=None):
+        """Estimated seconds until the current stage ends, or None if unknown."""
+        rate = self.rate()
+        if not rate:
+            return None
+        now = time.time() if now is None else now
+        t1, p1 = self.last
+        end = self.stage_ends.get(self.stage)
+        if end is not None and end > p1:
+            return max(0.0, (end - p1) / rate - (now - t1))
+        # End unknown (or already passed): poll by the time the stage is twice as old
+        return min(max(0.0, (100 - p1) / rate - (now - t1)), max(0.0, now - self.stage_start[0]))
+
+    def next_delay(self, now=None):
+        """Seconds to wait before the next poll."""
+        if self.errors:
+            backoff = min(self.max_interval, self.interval * 2 ** (self.errors - 1))
+            return backoff * random.uniform(0.8, 1.2)
+        if not self.adaptive:
+            return self.interval
+        eta = self.stage_eta(now)
+        if eta is None:
+            return self.interval
+        return min(self.max_interval, max(self.min_interval, eta))
+
+
+def format_eta(seconds):
+    """Human-readable ETA for progress lines."""
+    if seconds is None:
+        return "ETA --"
+    seconds = int(round(seconds))
+    if seconds >= 60:
+        return f"ETA {seconds // 60}m{seconds % 60:02d}s"
+    return f"ETA {seconds}s"
+
+
+class TaskApiError(Exception):
+    """Task API returned a non-zero code."""
+
+
+class PushUnsupported(Exception):
+    """The server offers no status stream / long poll for tasks."""
+
+
+def task_data(result):
+    """
+    Task data from a status response body; raises TaskApiError on a non-zero
+    code and ValueError (like a non-JSON body) if the body or its data is not
+    a JSON object.
+    """
+    if not isinstance(result, dict):
+        raise ValueError(f"status response is not a JSON object: {type(result).__name__}")
+    if result.get('code') != 0:
+        raise TaskApiError(result.get('message', 'Unknown error'))
+    data = result.get('data') or {}
+    if not isinstance(data, dict):
+        raise ValueError(f"task data is not a JSON object: {type(data).__name__}")
+    return data
+
+
+def fetch_task(session, task_id):
+    """
+    Query task status once.
+
+    Args:
+        session: requests.Session (or the requests module)
+        task_id: Task ID
+
+    Returns:
+        Task data dict (snake_case, as returned by the API)
+    """
+    url = f"{API_BASE}/api/v1/files/task/{task_id}"
+    response = session.get(url, timeout=10)
+    return task_data(response.json())
+
+
+def iter_task_events(session, task_id, deadline):
+    """Yield task data from the server-sent event stream until it closes or deadline passes."""
+    url = f"{API_BASE}/api/v1/files/task/{task_id}/stream"
+    with session.get(url, headers={'Accept': 'text/event-stream'}, stream=True,
+                     timeout=(10, STREAM_READ_TIMEOUT)) as response:
+        content_type = response.headers.get('Content-Type', '')
+        if response.status_code != 200 or not content_type.startswith('text/event-stream'):
+            raise PushUnsupported(f"no event stream (HTTP {response.status_code})")
+        buffer = b''
+        data_lines = []
+        for chunk in response.iter_content(chunk_size=None):
+            buffer += chunk
+            while b'\n' in buffer:
+                line, buffer = buffer.split(b'\n', 1)
+                line = line.rstrip(b'\r').decode('utf-8')
+                if not line:
+                    # Blank line ends an event
+                    if data_lines:
+                        yield task_data(json.loads('\n'.join(data_lines)))
+                        data_lines = []
+                elif line.startswith('data:'):
+                    data_lines.append(line[5:].lstrip())
+                # event:, id:, retry: and ": ping" comments need no handling
+            if time.time() >= deadline:
+                return
+
+
+def iter_task_long_poll(session, task_id, deadline, wait=LONG_POLL_WAIT):
+    """
+    Yield task data from long-poll requests, each answered when the task changes.
+
+    A server without long poll answers at once without X-Task-Wait; that first
+    answer is still yielded before PushUnsupported is raised.
+    """
+    url = f"{API_BASE}/api/v1/files/task/{task_id}"
+    last = None
+    while time.time() < deadline:
+        params = {'wait': max(1, int(min(wait, deadline - time.time())))}
+        if last:
+            params.update(status=last.get('status') or '', stage=last.get('stage') or '',
+                          progress=last.get('progress') or 0)
+        response = session.get(url, params=params, timeout=(10, params['wait'] + 15))
+        task = task_data(response.json())
+        yield task
+        if 'X-Task-Wait' not in response.headers:
+            raise PushUnsupported("no long poll")
+        if task.get('status') in ('success', 'failed'):
+            return
+        last = task
+
+
+def iter_task_updates(session, task_id, deadline, mode='auto', unsupported=None):
+    """
+    Yield (channel, task data) pushed by the server: event stream, else long poll.
+
+    Returns when the stream ends (final status, deadline or server closed it);
+    raises PushUnsupported when no channel allowed by mode is offered.
+    unsupported is a set of channels the server turned out not to offer; it is
+    skipped and updated, so tasks of one monitoring run probe each channel once.
+    """
+    unsupported = set() if unsupported is None else unsupported
+    if mode in ('auto', 'sse') and 'sse' not in unsupported:
+        try:
+            for task in iter_task_events(session, task_id, deadline):
+                yield 'sse', task
+            return
+        except PushUnsupported:
+            unsupported.add('sse')
+    if mode in ('auto', 'longpoll') and 'longpoll' not in unsupported:
+        try:
+            for task in iter_task_long_poll(session, task_id, deadline):
+                yield 'longpoll', task
+            return
+        except PushUnsupported:
+            unsupported.add('longpoll')
+    raise PushUnsupported(f"server offers no status push ({mode})")
+
+
+def monitor_task(task_id, timeout=DEFAULT_TIMEOUT, interval=DEFAULT_INTERVAL, adaptive=True, journal=None,
+                 mode='poll'):
     """
     Monitor task status until completion or failure.
     
     Args:
         task_id: Task ID to monitor
         timeout: Maximum time to wait (seconds)
-        interval: Polling interval (seconds)
+        interval: Initial polling interval (seconds); the fixed interval if adaptive is False
+        adaptive: Schedule polls from the observed progress rate (see PollScheduler)
+        journal: Optional TaskJournal that records the last seen status
+        mode: Status channel: poll (default), or auto (event stream, then long poll, then polling),
+            sse or longpoll
         
     Returns:
         Task data if successful, None if failed or timeout
     """
     start_time = time.time()
     attempt = 0
+    scheduler = PollScheduler(interval, adaptive=adaptive)
+    if journal:
+        journal.watch(task_id)
     
     print(f"🔍 Monitoring task: {task_id}", file=sys.stderr)
-    print(f"⏰ Timeout: {timeout}s | Interval: {interval}s\n", file=sys.stderr)
+    schedule = "adaptive" if adaptive else "fixed"
+    print(f"⏰ Timeout: {timeout}s | Interval: {interval}s ({schedule}) | Status: {mode}\n", file=sys.stderr)
+
+    def wait():
+        remaining = timeout - (time.time() - start_time)
+        time.sleep(max(0, min(scheduler.next_delay(), remaining)))
+
+    def report(task):
+        """Display and journal one status; True once the task succeeded or failed."""
+        elapsed = int(time.time() - start_time)
+        status = task.get('status', 'unknown')
+        progress = task.get('progress', 0)
+        stage = task.get('stage', 'unknown')
+        message = task.get('message', '')
+        
+        scheduler.observe(progress, stage)
+        if journal:
+            journal.update(task_id, status, progress, stage, message,
+                           format_task_result(task) if status == 'success' else None)
+        
+        # Display progress
+        progress_bar = create_progress_bar(progress)
+        print(f"\r[{elapsed}s] {progress_bar} {progress}% | {status} | {stage} | {format_eta(scheduler.eta())}   ",
+              end='', file=sys.stderr)
+        
+        # Check terminal states (API returns snake_case: index_tx_id, chunk_tx_ids)
+        if status == 'success':
+            index_tx_id = task.get('index_tx_id') or task.get('indexTxId') or 'N/A'
+            pin_id = f"{index_tx_id}i0" if index_tx_id and index_tx_id != 'N/A' else 'N/A'
+            print(f"\n\n✅ Upload completed successfully!", file=sys.stderr)
+            print(f"📦 Index TxID: {index_tx_id}", file=sys.stderr)
+            print(f"📌 PinID: {pin_id}", file=sys.stderr)
+            chunk_ids = task.get('chunk_tx_ids') or task.get('chunkTxIds')
+            if chunk_ids:
+                if isinstance(chunk_ids, str):
+                    try:
+                        chunk_ids = json.loads(chunk_ids)
+                    except (json.JSONDecodeError, TypeError):
+                        chunk_ids = []
+                if isinstance(chunk_ids, list):
+                    print(f"🧩 Chunk transactions: {len(chunk_ids)}", file=sys.stderr)
+            return True
+        
+        elif status == 'failed':
+            print(f"\n\n❌ Upload failed: {message or 'Unknown error'}", file=sys.stderr)
+            return True
+        return False
+
+    def api_error(e):
+        print(f"\n❌ API Error: {e}", file=sys.stderr)
+        if journal:
+            journal.update(task_id, 'error', message=str(e))
+
+    # Pushed updates first; polling below covers servers without push and broken streams
+    if mode != 'poll':
+        session = requests.Session()
+        try:
+            channel = None
+            for channel, task in iter_task_updates(session, task_id, start_time + timeout, mode):
+                if report(task):
+                    return task if task.get('status') == 'success' else None
+            if channel:
+                print(f"\nℹ️  Status stream ({channel}) ended, polling", file=sys.stderr)
+        except PushUnsupported as e:
+            print(f"ℹ️  {e}, polling", file=sys.stderr)
+        except TaskApiError as e:
+            api_error(e)
+            return None
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"\n⚠️  Status stream interrupted ({e}), polling", file=sys.stderr)
+        finally:
+            session.close()
     
     while time.time() - start_time < timeout:
         attempt += 1
-        elapsed = int(time.time() - start_time)
         
         try:
             # Query task status
-            url = f"{API_BASE}/api/v1/files/task/{task_id}"
-            response = requests.get(url, timeout=10)
-            result = response.json()
-            
-            if result.get('code') != 0:
-                error_msg = result.get('message', 'Unknown error')
-                print(f"\n❌ API Error: {error_msg}", file=sys.stderr)
-                return None
-            
-            task = result.get('data', {})
-            status = task.get('status', 'unknown')
-            progress = task.get('progress', 0)
-            stage = task.get('stage', 'unknown')
-            message = task.get('message', '')
-            
-            # Display progress
-            progress_bar = create_progress_bar(progress)
-            print(f"\r[{elapsed}s] {progress_bar} {progress}% | {status} | {stage}", 
-                  end='', file=sys.stderr)
-            
-            # Check terminal states (API returns snake_case: index_tx_id, chunk_tx_ids)
-            if status == 'success':
-                index_tx_id = task.get('index_tx_id') or task.get('indexTxId') or 'N/A'
-                pin_id = f"{index_tx_id}i0" if index_tx_id and index_tx_id != 'N/A' else 'N/A'
-                print(f"\n\n✅ Upload completed successfully!", file=sys.stderr)
-                print(f"📦 Index TxID: {index_tx_id}", file=sys.stderr)
-                print(f"📌 PinID: {pin_id}", file=sys.stderr)
-                chunk_ids = task.get('chunk_tx_ids') or task.get('chunkTxIds')
-                if chunk_ids:
-                    if isinstance(chunk_ids, str):
-                        try:
-                            chunk_ids = json.loads(chunk_ids)
-                        except (json.JSONDecodeError, TypeError):
-                            chunk_ids = []
-                    if isinstance(chunk_ids, list):
-                        print(f"🧩 Chunk transactions: {len(chunk_ids)}", file=sys.stderr)
-                return task
-            
-            elif status == 'failed':
-                print(f"\n\n❌ Upload failed: {message or 'Unknown error'}", file=sys.stderr)
-                return None
+            task = fetch_task(requests, task_id)
+            if report(task):
+                return task if task.get('status') == 'success' else None
             
             # Wait before next poll
-            time.sleep(interval)
+            wait()
+            
+        except TaskApiError as e:
+            api_error(e)
+            return None
             
         except requests.exceptions.Timeout:
             print(f"\n⚠️  Request timeout, retrying...", file=sys.stderr)
-            time.sleep(interval)
+            scheduler.observe_error()
+            wait()
             
         except requests.exceptions.RequestException as e:
             print(f"\n⚠️  Network error: {e}", file=sys.stderr)
-            time.sleep(interval)
+            scheduler.observe_error()
+            wait()
             
         except Exception as e:
             print(f"\n❌ Unexpected error: {e}", file=sys.stderr)
-            time.sleep(interval)
+            scheduler.observe_error()
+            wait()
     
     # Timeout reached
     print(f"\n\n⏰ Timeout after {timeout} seconds", file=sys.stderr)
-    print(f"Task may still be processing. Check status manually with:", file=sys.stderr)
+    print(f"Task may still be processing. Resume monitoring or check status manually with:", file=sys.stderr)
+    print(f"  python monitor_task.py resume", file=sys.stderr)
     print(f"  curl {API_BASE}/api/v1/files/task/{task_id}", file=sys.stderr)
     return None
 
@@ -135,7 +547,6 @@ def format_task_result(task):
             chunk_tx_ids = []
     if not isinstance(chunk_tx_ids, list):
         chunk_tx_ids = []
-    indexer_base = "https://file.metaid.io/metafile-indexer"
     result = {
         "success": True,
         "taskId": task.get('task_id') or task.get('taskId'),
@@ -144,31 +555,348 @@ def format_task_result(task):
         "pinId": pin_id,
         "chunkTxIds": chunk_tx_ids,
         "chunkCount": len(chunk_tx_ids),
-        "viewUrls": {
-            "transaction": f"https://www.mvcscan.com/tx/{index_tx_id}" if index_tx_id else None,
-            "pin": f"https://man.metaid.io/pin/{pin_id}" if pin_id else None,
-            "content": f"{indexer_base}/api/v1/files/content/{pin_id}" if pin_id else None,
-            "accelerate": f"{indexer_base}/api/v1/files/accelerate/content/{pin_id}" if pin_id else None,
-        }
+        "viewUrls": build_view_urls(index_tx_id, pin_id),
     }
     return result
 
 
+def build_view_urls(index_tx_id, pin_id):
+    """Explorer, pin, content and accelerate URLs for an uploaded file."""
+    indexer_base = INDEXER_BASE
+    return {
+        "transaction": f"https://www.mvcscan.com/tx/{index_tx_id}" if index_tx_id else None,
+        "pin": f"https://man.metaid.io/pin/{pin_id}" if pin_id else None,
+        "content": f"{indexer_base}/api/v1/files/content/{pin_id}" if pin_id else None,
+        "accelerate": f"{indexer_base}/api/v1/files/accelerate/content/{pin_id}" if pin_id else None,
+    }
+
+
+def failure_result(task_id, error, task=None):
+    """Single-line failure JSON, same shape as the single-task mode's error output."""
+    result = {"success": False, "error": error, "taskId": task_id}
+    if task:
+        result["status"] = task.get('status')
+    return result
+
+
+def format_aggregate_progress(states, elapsed, eta=None):
+    """One-line summary of many tasks for the stderr progress display."""
+    total = len(states)
+    succeeded = sum(1 for s in states.values() if s['status'] == 'success')
+    failed = sum(1 for s in states.values() if s['status'] in ('failed', 'error', 'timeout'))
+    running = total - succeeded - failed
+    avg_progress = sum(s['progress'] for s in states.values()) / total if total else 0
+    bar = create_progress_bar(avg_progress)
+    return (f"[{int(elapsed)}s] {bar} {avg_progress:.0f}% | "
+            f"✅ {succeeded} ❌ {failed} ⏳ {running} / {total} | {format_eta(eta)}   ")
+
+
+async def monitor_tasks(task_ids, timeout=DEFAULT_TIMEOUT, interval=DEFAULT_INTERVAL,
+                        concurrency=DEFAULT_CONCURRENCY, out=sys.stdout, adaptive=True, journal=None,
+                        mode='poll', push_limit=MAX_PUSH_STREAMS):
+    """
+    Monitor many tasks from one event loop over a shared keep-alive session.
+
+    Each task is followed independently; a single-line JSON result is written to
+    out as soon as the task reaches success/failed (or times out), so output
+    order is completion order. One aggregate progress line is kept on stderr.
+
+    Unless mode is 'poll', up to push_limit tasks hold a status stream (or long
+    poll) on threads of their own; the rest, and any task whose stream is not
+    offered or breaks, are polled.
+
+    Args:
+        task_ids: Task IDs to monitor (duplicates are ignored)
+        timeout: Maximum time to wait for each task (seconds)
+        interval: Initial polling interval (seconds); the fixed interval if adaptive is False
+        concurrency: Max in-flight status requests
+        out: Stream for the per-task JSON lines
+        adaptive: Schedule each task's polls from its progress rate (see PollScheduler)
+        journal: Optional TaskJournal that records each task's last seen status
+        mode: Status channel: poll (default), auto, sse or longpoll (see monitor_task)
+        push_limit: Max tasks followed over push channels at once
+
+    Returns:
+        Dict of task_id -> formatted result (success or failure JSON)
+    """
+    task_ids = list(dict.fromkeys(task_ids))
+    states = {tid: {'status': 'pending', 'progress': 0, 'stage': ''} for tid in task_ids}
+    stage_ends = {}
+    schedulers = {tid: PollScheduler(interval, adaptive=adaptive, stage_ends=stage_ends) for tid in task_ids}
+    unsupported_push = set()
+    results = {}
+    session = new_session(concurrency)
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    start_time = time.time()
+    push = mode != 'poll' and push_limit > 0
+    if push:
+        # Streams block a thread each for the task's lifetime, apart from the polling pool
+        push_session = new_session(min(len(task_ids), push_limit) or 1)
+        push_executor = ThreadPoolExecutor(max_workers=min(len(task_ids), push_limit) or 1)
+        push_slots = asyncio.Semaphore(push_limit)
+
+    print(f"🔍 Monitoring {len(task_ids)} tasks", file=sys.stderr)
+    schedule = "adaptive" if adaptive else "fixed"
+    print(f"⏰ Timeout: {timeout}s | Interval: {interval}s ({schedule}) | Concurrency: {concurrency} "
+          f"| Status: {mode}\n", file=sys.stderr)
+
+    if journal:
+        for tid in task_ids:
+            journal.watch(tid)
+
+    def emit(task_id, result):
+        results[task_id] = result
+        state = states[task_id]
+        if journal and state['status'] in TERMINAL_STATUSES:
+            journal.update(task_id, state['status'], state['progress'], state['stage'],
+                           result.get('error'), result)
+        out.write(json.dumps(result, separators=(',', ':')) + '\n')
+        out.flush()
+
+    async def wait(scheduler):
+        remaining = timeout - (time.time() - start_time)
+        await asyncio.sleep(max(0, min(scheduler.next_delay(), remaining)))
+
+    def observe(task_id, task):
+        """Record one status of task_id; True (and the result emitted) once it succeeded or failed."""
+        state = states[task_id]
+        state['status'] = task.get('status', 'unknown')
+        state['progress'] = task.get('progress', 0) or 0
+        state['stage'] = task.get('stage', '')
+        schedulers[task_id].observe(state['progress'], state['stage'])
+        if journal and state['status'] not in TERMINAL_STATUSES:
+            journal.update(task_id, state['status'], state['progress'], state['stage'],
+                           task.get('message'))
+        if state['status'] == 'success':
+            state['progress'] = 100
+            emit(task_id, format_task_result(task))
+            return True
+        if state['status'] == 'failed':
+            emit(task_id, failure_result(task_id, task.get('message') or 'Upload failed', task))
+            return True
+        return False
+
+    def follow(task_id):
+        """
+        Runs on a push thread: hand each intermediate status to the loop (the
+        journal connection belongs to the loop thread) and return the final one.
+        """
+        for _, task in iter_task_updates(push_session, task_id, start_time + timeout, mode, unsupported_push):
+            if task.get('status') in ('success', 'failed'):
+                return task
+            loop.call_soon_threadsafe(observe, task_id, task)
+        return None
+
+    async def watch(task_id):
+        state = states[task_id]
+        scheduler = schedulers[task_id]
+        if push and not push_slots.locked():
+            async with push_slots:
+                try:
+                    task = await loop.run_in_executor(push_executor, follow, task_id)
+                    if task:
+                        observe(task_id, task)
+                        return
+                except TaskApiError as e:
+                    state['status'] = 'error'
+                    emit(task_id, failure_result(task_id, f"API Error: {e}"))
+                    return
+                except (PushUnsupported, requests.exceptions.RequestException, ValueError):
+                    # No push offered, or the stream broke: poll from here on
+                    pass
+
+        while time.time() - start_time < timeout:
+            try:
+                async with semaphore:
+                    task = await loop.run_in_executor(executor, fetch_task, session, task_id)
+            except TaskApiError as e:
+                state['status'] = 'error'
+                emit(task_id, failure_result(task_id, f"API Error: {e}"))
+                return
+            except (requests.exceptions.RequestException, ValueError):
+                # Network error or non-JSON response: back off and retry
+                scheduler.observe_error()
+                await wait(scheduler)
+                continue
+
+            if observe(task_id, task):
+                return
+            await wait(scheduler)
+
+        state['status'] = 'timeout'
+        emit(task_id, failure_result(task_id, "Task monitoring timeout"))
+
+    async def watch_guarded(task_id):
+        """watch, but an unexpected error fails only this task instead of the whole gather."""
+        try:
+            await watch(task_id)
+        except Exception as e:
+            if task_id not in results:
+                states[task_id]['status'] = 'error'
+                emit(task_id, failure_result(task_id, f"Unexpected error: {e}"))
+
+    def overall_eta():
+        etas = [schedulers[tid].eta() for tid, s in states.items()
+                if s['status'] not in ('success', 'failed', 'error', 'timeout')]
+        known = [e for e in etas if e is not None]
+        return max(known) if known and len(known) == len(etas) else None
+
+    async def display():
+        while True:
+            line = format_aggregate_progress(states, time.time() - start_time, overall_eta())
+            print(f"\r{line}", end='', file=sys.stderr, flush=True)
+            await asyncio.sleep(1)
+
+    display_task = asyncio.create_task(display())
+    try:
+        await asyncio.gather(*(watch_guarded(tid) for tid in task_ids))
+    finally:
+        display_task.cancel()
+        executor.shutdown(wait=False)
+        session.close()
+        if push:
+            push_executor.shutdown(wait=False)
+            push_session.close()
+    print(f"\r{format_aggregate_progress(states, time.time() - start_time)}\n", file=sys.stderr)
+    return results
+
+
+def read_task_ids(ids, file_path=None):
+    """Collect task IDs from argv, a file and/or stdin ('-' or nothing given)."""
+    task_ids = [i.strip() for i in ids if i.strip() and i.strip() != '-']
+    if file_path:
+        with open(file_path, encoding='utf-8') as f:
+            task_ids.extend(line.strip() for line in f if line.strip())
+    if '-' in ids or (not ids and not file_path):
+        task_ids.extend(line.strip() for line in sys.stdin if line.strip())
+    return task_ids
+
+
+def add_multi_options(parser):
+    """Options shared by the multi and resume commands."""
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT,
+                        help=f"Max wait per task in seconds (default: {DEFAULT_TIMEOUT})")
+    parser.add_argument("--interval", type=int, default=DEFAULT_INTERVAL,
+                        help=f"Initial polling interval in seconds (default: {DEFAULT_INTERVAL})")
+    parser.add_argument("--fixed", action="store_true",
+                        help="Poll at a fixed interval instead of the adaptive schedule")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Max in-flight status requests (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("--mode", choices=STATUS_MODES, default='poll',
+                        help="Status channel: poll, or auto to try the event stream, then long poll, "
+                             "then poll (default: poll)")
+    parser.add_argument("--push-limit", type=int, default=MAX_PUSH_STREAMS,
+                        help=f"Max tasks on push channels at once; others are polled (default: {MAX_PUSH_STREAMS})")
+    parser.add_argument("--journal", default=JOURNAL_PATH, help=f"Task journal (default: {JOURNAL_PATH})")
+
+
+def run_multi(task_ids, args):
+    """Validate shared options, monitor task_ids concurrently and exit (0 if all succeeded)."""
+    if args.timeout <= 0:
+        print("Error: Timeout must be positive", file=sys.stderr)
+        sys.exit(1)
+    if args.interval <= 0 or args.interval > args.timeout:
+        print("Error: Invalid interval", file=sys.stderr)
+        sys.exit(1)
+    if args.concurrency <= 0:
+        print("Error: Concurrency must be positive", file=sys.stderr)
+        sys.exit(1)
+    if args.push_limit < 0:
+        print("Error: Push limit cannot be negative", file=sys.stderr)
+        sys.exit(1)
+
+    journal = TaskJournal(args.journal)
+    try:
+        results = asyncio.run(monitor_tasks(task_ids, args.timeout, args.interval, args.concurrency,
+                                            adaptive=not args.fixed, journal=journal,
+                                            mode=args.mode, push_limit=args.push_limit))
+    finally:
+        journal.close()
+    sys.exit(0 if all(r.get('success') for r in results.values()) else 1)
+
+
+def main_multi(argv):
+    parser = argparse.ArgumentParser(
+        prog="monitor_task.py multi",
+        description="Monitor many upload tasks concurrently; one JSON line per task on completion.",
+    )
+    parser.add_argument("task_ids", nargs="*", help="Task IDs ('-' or none: read from stdin)")
+    parser.add_argument("--file", help="File with one task ID per line")
+    add_multi_options(parser)
+    args = parser.parse_intermixed_args(argv)
+
+    try:
+        task_ids = read_task_ids(args.task_ids, args.file)
+    except FileNotFoundError:
+        print(f"Error: File not found: {args.file}", file=sys.stderr)
+        sys.exit(1)
+    if not task_ids:
+        print("Error: At least one task ID required", file=sys.stderr)
+        sys.exit(1)
+    run_multi(task_ids, args)
+
+
+def main_resume(argv):
+    parser = argparse.ArgumentParser(
+        prog="monitor_task.py resume",
+        description="Resume monitoring every unfinished task in the journal, concurrently.",
+    )
+    add_multi_options(parser)
+    args = parser.parse_args(argv)
+
+    journal = TaskJournal(args.journal)
+    task_ids = journal.unfinished()
+    journal.close()
+    if not task_ids:
+        print("✅ No unfinished tasks in the journal", file=sys.stderr)
+        sys.exit(0)
+    print(f"🔁 Resuming {len(task_ids)} unfinished tasks", file=sys.stderr)
+    run_multi(task_ids, args)
+
+
+def main_journal(argv):
+    parser = argparse.ArgumentParser(
+        prog="monitor_task.py journal",
+        description="List journaled tasks (unfinished only by default), one JSON line each.",
+    )
+    parser.add_argument("--all", action="store_true", help="Include finished tasks")
+    parser.add_argument("--journal", default=JOURNAL_PATH, help=f"Task journal (default: {JOURNAL_PATH})")
+    args = parser.parse_args(argv)
+
+    journal = TaskJournal(args.journal)
+    for entry in journal.entries(unfinished_only=not args.all):
+        print(json.dumps(entry, ensure_ascii=False, separators=(',', ':')))
+    journal.close()
+
+
 def main():
-    if len(sys.argv) < 2:
+    commands = {'multi': main_multi, 'resume': main_resume, 'journal': main_journal}
+    if len(sys.argv) > 1 and sys.argv[1] in commands:
+        commands[sys.argv[1]](sys.argv[2:])
+        return
+
+    argv = [a for a in sys.argv[1:] if a not in ('--fixed', '--push', '--poll')]
+    adaptive = '--fixed' not in sys.argv[1:]
+    mode = 'auto' if '--push' in sys.argv[1:] else 'poll'
+
+    if len(argv) < 1:
         print("Error: Task ID required", file=sys.stderr)
-        print("\nUsage: python monitor_task.py <task_id> [timeout] [interval]", file=sys.stderr)
+        print("\nUsage: python monitor_task.py <task_id> [timeout] [interval] [--fixed] [--push]", file=sys.stderr)
         print("\nArguments:", file=sys.stderr)
         print("  task_id   - Task ID (required)", file=sys.stderr)
         print("  timeout   - Max wait time in seconds (default: 300)", file=sys.stderr)
-        print("  interval  - Polling interval in seconds (default: 5)", file=sys.stderr)
+        print("  interval  - Initial polling interval in seconds (default: 5)", file=sys.stderr)
+        print("  --fixed   - Poll at a fixed interval instead of the adaptive schedule", file=sys.stderr)
+        print("  --push    - Try the server's status stream / long poll before polling", file=sys.stderr)
         print("\nExample:", file=sys.stderr)
         print("  python monitor_task.py abc123def456 300 5", file=sys.stderr)
         sys.exit(1)
     
-    task_id = sys.argv[1].strip()
-    timeout = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_TIMEOUT
-    interval = int(sys.argv[3]) if len(sys.argv) > 3 else DEFAULT_INTERVAL
+    task_id = argv[0].strip()
+    timeout = int(argv[1]) if len(argv) > 1 else DEFAULT_TIMEOUT
+    interval = int(argv[2]) if len(argv) > 2 else DEFAULT_INTERVAL
     
     # Validate parameters
     if not task_id:
@@ -184,7 +912,11 @@ def main():
         sys.exit(1)
     
     # Monitor task
-    task_result = monitor_task(task_id, timeout, interval)
+    journal = TaskJournal()
+    try:
+        task_result = monitor_task(task_id, timeout, interval, adaptive=adaptive, journal=journal, mode=mode)
+    finally:
+        journal.close()
     
     # Format and output result: single-line JSON to stdout for shell/jq parsing; progress goes to stderr
     if task_result:
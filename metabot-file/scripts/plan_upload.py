@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Plan the upload of a whole directory tree.
+
+Walks the tree with a thread pool and collects, for each file, the same
+information as read_file_base64.get_file_info (size, MIME type, contentType,
+uploadMethod) without reading file content. Content is only read when --hash
+is given.
+
+Usage:
+    python plan_upload.py <directory> [--hash] [--workers N] [--stream] [--include-hidden]
+
+Example:
+    python plan_upload.py res/file > plan.json
+    python plan_upload.py res/assets --hash --stream | jq -c 'select(.uploadMethod == "chunked")'
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from read_file_base64 import UPLOAD_THRESHOLD_MB, file_sha256, get_file_info
+
+
+DEFAULT_WORKERS = 16
+
+
+def iter_files(root, include_hidden=False):
+    """Yield file paths under root (depth-first, sorted per directory); symlinks are not followed."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            print(f"⚠️  Skipping {directory}: {e}", file=sys.stderr)
+            continue
+        subdirs = []
+        for entry in entries:
+            if not include_hidden and entry.name.startswith('.'):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry.path
+        stack.extend(reversed(subdirs))
+
+
+def plan_file(file_path, root, hash_files=False):
+    """Plan entry for one file: get_file_info plus relativePath (and sha256 with hash_files)."""
+    try:
+        info = get_file_info(file_path)
+        info.pop('uploadThresholdMB', None)
+        info['relativePath'] = os.path.relpath(file_path, root)
+        if hash_files:
+            info['sha256'] = file_sha256(file_path)
+        return info
+    except OSError as e:
+        return {'filePath': file_path, 'relativePath': os.path.relpath(file_path, root), 'error': str(e)}
+
+
+def iter_plan(root, workers=DEFAULT_WORKERS, hash_files=False, include_hidden=False):
+    """
+    Yield plan entries for every file under root, in walk order.
+
+    At most a few times `workers` files are in flight, so memory stays bounded
+    for trees with tens of thousands of files.
+    """
+    window = max(workers * 4, 1)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for file_path in iter_files(root, include_hidden):
+            pending.append(pool.submit(plan_file, file_path, root, hash_files))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def new_group():
+    return {'count': 0, 'totalBytes': 0}
+
+
+def summarize(root, groups, errors):
+    direct, chunked = groups['direct'], groups['chunked']
+    return {
+        'root': root,
+        'totalFiles': direct['count'] + chunked['count'],
+        'totalBytes': direct['totalBytes'] + chunked['totalBytes'],
+        'totalMB': round((direct['totalBytes'] + chunked['totalBytes']) / (1024 * 1024), 2),
+        'uploadThresholdMB': UPLOAD_THRESHOLD_MB,
+        'direct': direct,
+        'chunked': chunked,
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Plan a directory upload: size, MIME type and upload method per file."
+    )
+    parser.add_argument("directory", help="Directory to plan")
+    parser.add_argument("--hash", action="store_true", help="Also compute SHA-256 of each file (reads content)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"Threads used to stat/hash files (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--stream", action="store_true",
+                        help="Write one JSON line per file as it is planned, then a summary line")
+    parser.add_argument("--include-hidden", action="store_true", help="Include dotfiles and dot-directories")
+    args = parser.parse_args()
+
+    root = args.directory
+    if not os.path.isdir(root):
+        print(f"Error: Directory not found: {root}", file=sys.stderr)
+        sys.exit(1)
+    if args.workers <= 0:
+        print("Error: --workers must be positive", file=sys.stderr)
+        sys.exit(1)
+
+    groups = {'direct': new_group(), 'chunked': new_group()}
+    if not args.stream:
+        groups['direct']['files'] = []
+        groups['chunked']['files'] = []
+    errors = []
+
+    for entry in iter_plan(root, args.workers, args.hash, args.include_hidden):
+        if 'error' in entry:
+            errors.append(entry)
+            if args.stream:
+                print(json.dumps({'type': 'error', **entry}, ensure_ascii=False), flush=True)
+            continue
+        group = groups[entry['uploadMethod']]
+        group['count'] += 1
+        group['totalBytes'] += entry['fileSize']
+        if args.stream:
+            print(json.dumps({'type': 'file', **entry}, ensure_ascii=False), flush=True)
+        else:
+            group['files'].append(entry)
+
+    summary = summarize(root, groups, errors)
+    if args.stream:
+        print(json.dumps({'type': 'summary', **summary}, ensure_ascii=False))
+    else:
+        print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+    print(f"\n✅ Planned {summary['totalFiles']:,} files ({summary['totalMB']} MB)", file=sys.stderr)
+    print(f"🚀 Direct: {groups['direct']['count']:,} files, {groups['direct']['totalBytes']:,} bytes", file=sys.stderr)
+    print(f"🧩 Chunked: {groups['chunked']['count']:,} files, {groups['chunked']['totalBytes']:,} bytes", file=sys.stderr)
+    if errors:
+        print(f"⚠️  Errors: {len(errors)}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -3,12 +3,28 @@
 Query metafs-indexer API: user info (by address/metaid/globalmetaid) and file metadata (by pinid).
 Base URL: https://file.metaid.io/metafile-indexer (override with METAFS_INDEXER_BASE_URL).
 Stdout: JSON. Stderr: summary lines like AVATAR_URL=..., CONTENT_URL=..., ACCELERATE_URL=...
+
+`batch` resolves many user/file keys concurrently over pooled keep-alive
+connections and reports failures per item. Successful lookups are kept in a
+TTL cache (SQLite, METAFS_INDEXER_CACHE, default
+~/.cache/metabot-file/indexer_cache.sqlite3) shared by `user`, `file` and
+`batch` across runs; pass --no-cache to bypass it, and run `purge-cache` to
+drop expired entries.
+
+`download` fetches file content as concurrent HTTP Range segments into a
+preallocated file and resumes from a sidecar state file (<output>.part.state)
+after an interruption.
 """
 
 import argparse
 import json
 import os
+import sqlite3
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
 from urllib.error import HTTPError, URLError
 from urllib.parse import quote
 from urllib.request import Request, urlopen
@@ -16,19 +32,50 @@ from urllib.request import Request, urlopen
 BASE_URL = os.environ.get(
     "METAFS_INDEXER_BASE_URL", "https://file.metaid.io/metafile-indexer"
 ).rstrip("/")
+CACHE_PATH = os.environ.get(
+    "METAFS_INDEXER_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "metabot-file", "indexer_cache.sqlite3"),
+)
+DEFAULT_CACHE_TTL = 3600
+BATCH_WORKERS = 16
+BATCH_KEYS = ("address", "metaid", "globalmetaid", "pinid")
 
 
 def get_url(path: str) -> str:
     return f"{BASE_URL}{path}"
 
 
-def get_json(url: str) -> dict:
+class IndexerError(Exception):
+    """Request to the indexer failed (HTTP error, network error or invalid JSON)."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+def json_object(payload) -> dict:
+    """The decoded body if it is a JSON object; IndexerError otherwise."""
+    if not isinstance(payload, dict):
+        raise IndexerError(f"Expected a JSON object, got {type(payload).__name__}")
+    return payload
+
+
+def fetch_json(url: str, timeout: float = 30, session=None) -> dict:
+    """
+    GET url and decode the JSON body, which must be an object. Raises
+    IndexerError instead of exiting.
+
+    With a requests session (see new_session) the request reuses its pooled
+    keep-alive connections; otherwise a one-off urllib request is made.
+    """
+    if session is not None:
+        return fetch_json_pooled(session, url, timeout)
     req = Request(url, method="GET")
     req.add_header("Accept", "application/json")
     try:
-        with urlopen(req, timeout=30) as resp:
+        with urlopen(req, timeout=timeout) as resp:
             body = resp.read().decode()
-            return json.loads(body)
+            payload = json.loads(body)
     except HTTPError as e:
         body = e.read().decode() if e.fp else ""
         try:
@@ -36,29 +83,167 @@ def get_json(url: str) -> dict:
             msg = err.get("message", err.get("msg", body or str(e)))
         except Exception:
             msg = body or str(e)
-        print(f"Error {e.code}: {msg}", file=sys.stderr)
-        sys.exit(1)
-    except (URLError, json.JSONDecodeError) as e:
-        print(f"Error: {e}", file=sys.stderr)
+        raise IndexerError(msg, status=e.code) from e
+    except (URLError, OSError, json.JSONDecodeError) as e:
+        raise IndexerError(str(e)) from e
+    return json_object(payload)
+
+
+def fetch_json_pooled(session, url: str, timeout: float) -> dict:
+    import requests
+
+    try:
+        resp = session.get(url, headers={"Accept": "application/json"}, timeout=timeout)
+    except requests.RequestException as e:
+        raise IndexerError(str(e)) from e
+    if resp.status_code >= 400:
+        try:
+            err = resp.json()
+            msg = err.get("message", err.get("msg", resp.text or resp.reason))
+        except Exception:
+            msg = resp.text or resp.reason
+        raise IndexerError(msg, status=resp.status_code)
+    try:
+        payload = resp.json()
+    except ValueError as e:
+        raise IndexerError(str(e)) from e
+    return json_object(payload)
+
+
+def new_session(pool_size: int = BATCH_WORKERS):
+    """requests session whose keep-alive pool fits pool_size concurrent requests (shared by the scripts here)."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class ResponseCache:
+    """
+    TTL cache of successful indexer responses, keyed by URL.
+
+    SQLite in WAL mode, so several agent processes can share it. Only
+    responses with data are stored; errors and empty results are always
+    fetched again.
+    """
+
+    def __init__(self, path: str = CACHE_PATH, ttl: float = DEFAULT_CACHE_TTL):
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "url TEXT PRIMARY KEY, body TEXT NOT NULL, fetched_at REAL NOT NULL)"
+        )
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "ResponseCache":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def get(self, url: str) -> Optional[dict]:
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body FROM responses WHERE url = ? AND fetched_at >= ?",
+                (url, time.time() - self.ttl),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, url: str, payload: dict) -> None:
+        if not payload.get("data"):
+            return
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (url, body, fetched_at) VALUES (?, ?, ?)",
+                (url, json.dumps(payload, ensure_ascii=False, separators=(",", ":")), time.time()),
+            )
+
+    def purge(self) -> int:
+        """Drop expired entries; returns how many were removed."""
+        with self.lock:
+            return self.conn.execute(
+                "DELETE FROM responses WHERE fetched_at < ?", (time.time() - self.ttl,)
+            ).rowcount
+
+
+def open_cache(args: argparse.Namespace) -> Optional[ResponseCache]:
+    """ResponseCache for the command-line options, or None with --no-cache or if it cannot be opened."""
+    if args.no_cache:
+        return None
+    try:
+        return ResponseCache(args.cache, args.ttl)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Warning: cache disabled ({e})", file=sys.stderr)
+        return None
+
+
+def cached_fetch_json(url: str, cache: Optional[ResponseCache] = None, session=None) -> "tuple[dict, bool]":
+    """
+    fetch_json through the cache.
+
+    Returns:
+        (payload, served from cache)
+    """
+    if cache is not None:
+        payload = cache.get(url)
+        if payload is not None:
+            return payload, True
+    payload = fetch_json(url, session=session)
+    if cache is not None:
+        cache.put(url, payload)
+    return payload, False
+
+
+def get_json(url: str, cache: Optional[ResponseCache] = None) -> dict:
+    try:
+        return cached_fetch_json(url, cache)[0]
+    except IndexerError as e:
+        if e.status is not None:
+            print(f"Error {e.status}: {e}", file=sys.stderr)
+        else:
+            print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
 
 
+def user_info_path(key_type: str, value: str) -> str:
+    """Path of the MetaID-format user info route for key_type address/metaid/globalmetaid."""
+    return f"/api/info/{key_type}/{quote(value, safe='')}"
+
+
 def cmd_user(args: argparse.Namespace) -> None:
     if args.address:
-        path = f"/api/info/address/{quote(args.address, safe='')}"
+        path = user_info_path("address", args.address)
     elif args.metaid:
-        path = f"/api/info/metaid/{quote(args.metaid, safe='')}"
+        path = user_info_path("metaid", args.metaid)
     elif args.globalmetaid:
-        path = f"/api/info/globalmetaid/{quote(args.globalmetaid, safe='')}"
+        path = user_info_path("globalmetaid", args.globalmetaid)
     else:
         print("One of --address, --metaid, --globalmetaid is required.", file=sys.stderr)
         sys.exit(1)
 
-    out = get_json(get_url(path))
+    cache = open_cache(args)
+    try:
+        out = get_json(get_url(path), cache)
+    finally:
+        if cache is not None:
+            cache.close()
     print(json.dumps(out, ensure_ascii=False))
 
     data = out.get("data")
-    if not data:
+    if not isinstance(data, dict):
         return
     avatar_pin_id = data.get("avatarId") or data.get("avatarPinId")
     if avatar_pin_id:
@@ -72,7 +257,12 @@ def cmd_file(args: argparse.Namespace) -> None:
         sys.exit(1)
     pin_id = quote(args.pinid, safe="")
     path = f"/api/v1/files/{pin_id}"
-    out = get_json(get_url(path))
+    cache = open_cache(args)
+    try:
+        out = get_json(get_url(path), cache)
+    finally:
+        if cache is not None:
+            cache.close()
     print(json.dumps(out, ensure_ascii=False))
 
     data = out.get("data")
@@ -83,6 +273,430 @@ def cmd_file(args: argparse.Namespace) -> None:
         print(f"ACCELERATE_URL={accelerate_url}", file=sys.stderr)
 
 
+def lookup_path(key_type: str, value: str) -> str:
+    """Indexer path for a batch key: user info for address/metaid/globalmetaid, file metadata for pinid."""
+    if key_type == "pinid":
+        return f"/api/v1/files/{quote(value, safe='')}"
+    return user_info_path(key_type, value)
+
+
+def lookup_links(key_type: str, value: str, data: dict) -> dict:
+    """The same URLs the single commands print to stderr (AVATAR_URL / CONTENT_URL / ACCELERATE_URL)."""
+    if key_type == "pinid":
+        return {
+            "contentUrl": f"{BASE_URL}/api/v1/files/content/{value}",
+            "accelerateUrl": f"{BASE_URL}/api/v1/files/accelerate/content/{value}",
+        }
+    avatar_pin_id = data.get("avatarId") or data.get("avatarPinId")
+    return {"avatarUrl": f"{BASE_URL}/content/{avatar_pin_id}"} if avatar_pin_id else {}
+
+
+def resolve_batch(keys: "list[tuple[str, str]]", workers: int = BATCH_WORKERS,
+                  cache: Optional[ResponseCache] = None):
+    """
+    Resolve (key_type, value) pairs concurrently.
+
+    Duplicate keys are fetched once. Yields one result per input key, in input
+    order: {"key", "value", "ok", "cached", "data", ...links} on success,
+    {"key", "value", "ok": False, "error", "status"} on failure.
+    """
+    session = new_session(workers)
+
+    def resolve(key):
+        key_type, value = key
+        try:
+            payload, cached = cached_fetch_json(get_url(lookup_path(key_type, value)), cache, session)
+        except IndexerError as e:
+            return {"key": key_type, "value": value, "ok": False, "error": str(e), "status": e.status}
+        data = payload.get("data")
+        if not data:
+            return {"key": key_type, "value": value, "ok": False, "cached": cached,
+                    "error": payload.get("message") or payload.get("msg") or "not found", "status": None}
+        if not isinstance(data, dict):
+            return {"key": key_type, "value": value, "ok": False, "cached": cached,
+                    "error": f"Expected data to be an object, got {type(data).__name__}", "status": None}
+        return {"key": key_type, "value": value, "ok": True, "cached": cached, "data": data,
+                **lookup_links(key_type, value, data)}
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {}
+            for key in dict.fromkeys(keys):
+                futures[key] = pool.submit(resolve, key)
+            for key in keys:
+                yield futures[key].result()
+    finally:
+        session.close()
+
+
+class AppendKey(argparse.Action):
+    """Append (key_type, value) to args.keys, so repeated key options keep their command-line order."""
+
+    def __call__(self, parser, namespace, values, option_string=None):
+        keys = getattr(namespace, self.dest, None) or []
+        setattr(namespace, self.dest, [*keys, (self.const, values)])
+
+
+def add_key_options(p: argparse.ArgumentParser, key_types=BATCH_KEYS) -> None:
+    helps = {"address": "User address", "metaid": "User metaid",
+             "globalmetaid": "User globalMetaID", "pinid": "File PIN ID"}
+    for key_type in key_types:
+        p.add_argument(f"--{key_type}", dest="keys", action=AppendKey, const=key_type,
+                       metavar=key_type.upper(), help=f"{helps[key_type]} (repeatable)")
+
+
+def read_batch_keys(args: argparse.Namespace) -> "list[tuple[str, str]]":
+    """
+    Keys from the repeatable --address/--metaid/--globalmetaid/--pinid options
+    (see add_key_options) and then --input lines (type:value), in the order given.
+    """
+    keys = list(getattr(args, "keys", None) or [])
+    if args.input:
+        f = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+        try:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                key_type, sep, value = line.partition(":")
+                key_type = key_type.strip().lower()
+                if not sep or key_type not in BATCH_KEYS or not value.strip():
+                    raise ValueError(f"line {line_no}: expected <{'|'.join(BATCH_KEYS)}>:<value>, got {line!r}")
+                keys.append((key_type, value.strip()))
+        finally:
+            if f is not sys.stdin:
+                f.close()
+    return keys
+
+
+def cmd_batch(args: argparse.Namespace) -> None:
+    if args.workers <= 0:
+        print("--workers must be positive.", file=sys.stderr)
+        sys.exit(1)
+    try:
+        keys = read_batch_keys(args)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if not keys:
+        print("No keys given (use --address/--metaid/--globalmetaid/--pinid or --input).", file=sys.stderr)
+        sys.exit(1)
+
+    started = time.perf_counter()
+    ok = cached = 0
+    cache = open_cache(args)
+    try:
+        for result in resolve_batch(keys, args.workers, cache):
+            ok += result["ok"]
+            cached += bool(result.get("cached"))
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+    finally:
+        if cache is not None:
+            cache.close()
+    seconds = time.perf_counter() - started
+    print(f"✅ {ok}/{len(keys)} resolved ({cached} from cache, {len(keys) - ok} failed) in {seconds:.2f}s",
+          file=sys.stderr)
+    if ok < len(keys):
+        sys.exit(2)
+
+
+def cmd_purge_cache(args: argparse.Namespace) -> None:
+    try:
+        with ResponseCache(args.cache, args.ttl) as cache:
+            purged = cache.purge()
+    except (OSError, sqlite3.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps({"purged": purged}))
+    print(f"🧹 Removed {purged} cache entries older than {args.ttl:g}s", file=sys.stderr)
+
+
+def add_cache_options(p: argparse.ArgumentParser) -> None:
+    p.add_argument("--no-cache", action="store_true", help="Bypass the local response cache")
+    p.add_argument("--ttl", type=float, default=DEFAULT_CACHE_TTL,
+                   help=f"Cache entry lifetime in seconds (default: {DEFAULT_CACHE_TTL})")
+    p.add_argument("--cache", default=CACHE_PATH, help=argparse.SUPPRESS)
+
+
+DOWNLOAD_CONNECTIONS = 8
+DOWNLOAD_SEGMENT_SIZE = 4 * 1024 * 1024
+DOWNLOAD_BLOCK_SIZE = 256 * 1024
+DOWNLOAD_RETRIES = 3
+DOWNLOAD_TIMEOUT = 60
+
+
+def content_url(pin_id: str, accelerate: bool = False) -> str:
+    pin_id = quote(pin_id, safe="")
+    if accelerate:
+        return get_url(f"/api/v1/files/accelerate/content/{pin_id}")
+    return get_url(f"/api/v1/files/content/{pin_id}")
+
+
+def probe_content(url: str) -> dict:
+    """
+    Ask for the first byte to learn size, Range support and a validator.
+
+    Returns:
+        {"url": final URL after redirects, "size": int or None, "ranges": bool, "validator": ETag/Last-Modified}
+    """
+    req = Request(url, method="GET")
+    req.add_header("Range", "bytes=0-0")
+    try:
+        with urlopen(req, timeout=DOWNLOAD_TIMEOUT) as resp:
+            validator = resp.headers.get("ETag") or resp.headers.get("Last-Modified")
+            if resp.status == 206:
+                total = resp.headers.get("Content-Range", "").rpartition("/")[2]
+                if total.isdigit():
+                    return {"url": resp.geturl(), "size": int(total), "ranges": True, "validator": validator}
+            length = resp.headers.get("Content-Length", "")
+            return {"url": resp.geturl(), "size": int(length) if length.isdigit() else None,
+                    "ranges": False, "validator": validator}
+    except HTTPError as e:
+        total = (e.headers.get("Content-Range") or "").rpartition("/")[2] if e.headers else ""
+        if e.code == 416 and total == "0":
+            # Empty content: there is no first byte to ask for
+            return {"url": url, "size": 0, "ranges": False, "validator": None}
+        raise IndexerError(f"HTTP {e.code} for {url}", status=e.code) from e
+    except (URLError, OSError) as e:
+        raise IndexerError(str(e)) from e
+
+
+class DownloadState:
+    """
+    Sidecar file listing the finished segments of <output>.part.
+
+    A segment is only recorded after its bytes were written and synced, so a
+    rerun can trust every recorded segment and fetch just the rest.
+    """
+
+    def __init__(self, path: str, meta: dict):
+        self.path = path
+        self.meta = meta
+        self.done = set()
+        self.lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path: str, meta: dict) -> "DownloadState":
+        state = cls(path, meta)
+        try:
+            with open(path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return state
+        # Resume only if the remote content and the segmentation are unchanged
+        if all(saved.get(k) == v for k, v in meta.items()):
+            state.done = set(saved.get("done", []))
+        return state
+
+    def mark_done(self, index: int) -> None:
+        with self.lock:
+            self.done.add(index)
+            self.save()
+
+    def save(self) -> None:
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({**self.meta, "done": sorted(self.done)}, f)
+        os.replace(tmp, self.path)
+
+    def remove(self) -> None:
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def fetch_segment(url: str, fd: int, start: int, end: int, stop: threading.Event) -> None:
+    """Fetch bytes start..end (inclusive) and pwrite them at their offset; retried from the last written byte."""
+    offset = start
+    for attempt in range(DOWNLOAD_RETRIES):
+        req = Request(url, method="GET")
+        req.add_header("Range", f"bytes={offset}-{end}")
+        try:
+            with urlopen(req, timeout=DOWNLOAD_TIMEOUT) as resp:
+                if resp.status != 206:
+                    raise IndexerError(f"Expected 206 for bytes {offset}-{end}, got {resp.status}", status=resp.status)
+                while offset <= end:
+                    if stop.is_set():
+                        raise IndexerError("Download cancelled")
+                    block = resp.read(min(DOWNLOAD_BLOCK_SIZE, end - offset + 1))
+                    if not block:
+                        break
+                    view = memoryview(block)
+                    while view:
+                        written = os.pwrite(fd, view, offset)
+                        offset += written
+                        view = view[written:]
+            if offset > end:
+                return
+            error = IndexerError(f"Connection closed early at byte {offset} of segment {start}-{end}")
+        except HTTPError as e:
+            if e.code < 500:
+                raise IndexerError(f"HTTP {e.code} for bytes {offset}-{end}", status=e.code) from e
+            error = IndexerError(f"HTTP {e.code} for bytes {offset}-{end}", status=e.code)
+        except (URLError, OSError) as e:
+            error = IndexerError(str(e))
+        if stop.is_set():
+            raise error
+        time.sleep(0.5 * (attempt + 1))
+    raise error
+
+
+def download_stream(url: str, part_path: str) -> int:
+    """Single-connection fallback for servers without Range support; not resumable."""
+    received = 0
+    try:
+        with urlopen(Request(url, method="GET"), timeout=DOWNLOAD_TIMEOUT) as resp, open(part_path, "wb") as f:
+            for block in iter(lambda: resp.read(DOWNLOAD_BLOCK_SIZE), b""):
+                f.write(block)
+                received += len(block)
+            f.flush()
+            os.fsync(f.fileno())
+    except HTTPError as e:
+        raise IndexerError(f"HTTP {e.code} for {url}", status=e.code) from e
+    except (URLError, OSError) as e:
+        raise IndexerError(str(e)) from e
+    return received
+
+
+def segment_size_bytes(text: str) -> int:
+    """argparse type for --segment-size: megabytes (fractions allowed) as a positive byte count."""
+    try:
+        size = int(float(text) * 1024 * 1024)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size: {text!r}")
+    if size <= 0:
+        raise argparse.ArgumentTypeError(f"must be at least 1 byte, got {text!r} MB")
+    return size
+
+
+def download_content(pin_id: str, output: str, accelerate: bool = False,
+                     connections: int = DOWNLOAD_CONNECTIONS, segment_size: int = DOWNLOAD_SEGMENT_SIZE,
+                     resume: bool = True) -> dict:
+    """
+    Download the content of pin_id to output.
+
+    Content goes to <output>.part, preallocated to the full size and filled by
+    concurrent Range requests with positional writes; finished segments are
+    recorded in <output>.part.state. The .part file is renamed to output once
+    complete. Raises IndexerError, or ValueError for a non-positive
+    connections or segment_size.
+    """
+    if connections <= 0 or segment_size <= 0:
+        raise ValueError("connections and segment_size must be positive")
+    started = time.perf_counter()
+    probe = probe_content(content_url(pin_id, accelerate))
+    part_path = output + ".part"
+    state_path = part_path + ".state"
+    size = probe["size"]
+
+    if not probe["ranges"] or size is None:
+        print("⚠️  Server does not support Range requests; downloading on one connection", file=sys.stderr)
+        received = download_stream(probe["url"], part_path)
+        os.replace(part_path, output)
+        return download_result(pin_id, output, received, 1, 0, 1, False, received, started)
+
+    segments = [(i, start, min(start + segment_size, size) - 1)
+                for i, start in enumerate(range(0, size, segment_size))]
+    meta = {"pinId": pin_id, "size": size, "validator": probe["validator"], "segmentSize": segment_size}
+    state = DownloadState.load(state_path, meta) if resume else DownloadState(state_path, meta)
+    if not os.path.exists(part_path):
+        state.done.clear()
+    resumed = len(state.done)
+    todo = [seg for seg in segments if seg[0] not in state.done]
+    received = sum(end - start + 1 for _, start, end in todo)
+
+    fd = os.open(part_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        if os.fstat(fd).st_size != size:
+            os.ftruncate(fd, size)
+        if hasattr(os, "posix_fallocate") and size:
+            try:
+                # Reserve the blocks up front so a full disk fails now, not mid-download
+                os.posix_fallocate(fd, 0, size)
+            except OSError:
+                pass
+        state.save()
+        if resumed:
+            print(f"🔁 Resuming: {resumed}/{len(segments)} segments already downloaded", file=sys.stderr)
+
+        sync = getattr(os, "fdatasync", os.fsync)
+        stop = threading.Event()
+        progress = {"bytes": 0, "printed": 0.0}
+        progress_lock = threading.Lock()
+
+        def run(segment):
+            index, start, end = segment
+            fetch_segment(probe["url"], fd, start, end, stop)
+            sync(fd)
+            state.mark_done(index)
+            with progress_lock:
+                progress["bytes"] += end - start + 1
+                now = time.perf_counter()
+                if now - progress["printed"] < 1 and len(state.done) < len(segments):
+                    return
+                progress["printed"] = now
+                done_mb = progress["bytes"] / (1024 * 1024)
+                rate = done_mb / max(now - started, 1e-9)
+            print(f"📥 {len(state.done)}/{len(segments)} segments, {done_mb:.1f} MB ({rate:.1f} MB/s)",
+                  file=sys.stderr)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(connections, len(todo) or 1))) as pool:
+            futures = [pool.submit(run, seg) for seg in todo]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # Let in-flight segments stop at the next block; finished ones stay recorded
+                stop.set()
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        os.close(fd)
+
+    os.replace(part_path, output)
+    state.remove()
+    return download_result(pin_id, output, size, len(segments), resumed, connections, True, received, started)
+
+
+def download_result(pin_id: str, output: str, size: int, segments: int, resumed: int,
+                    connections: int, ranged: bool, received: int, started: float) -> dict:
+    seconds = time.perf_counter() - started
+    return {
+        "pinId": pin_id,
+        "path": os.path.abspath(output),
+        "size": size,
+        "ranged": ranged,
+        "connections": connections if ranged else 1,
+        "segments": segments,
+        "resumedSegments": resumed,
+        "bytes": received,
+        "seconds": round(seconds, 3),
+        "throughputMBps": round(received / (1024 * 1024) / seconds, 2) if seconds > 0 else None,
+    }
+
+
+def cmd_download(args: argparse.Namespace) -> None:
+    if args.connections <= 0:
+        print("--connections must be positive.", file=sys.stderr)
+        sys.exit(1)
+    output = args.output or args.pinid
+    try:
+        result = download_content(args.pinid, output, args.accelerate, args.connections,
+                                  args.segment_size, resume=not args.no_resume)
+    except IndexerError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if os.path.exists(output + ".part.state"):
+            print(f"Rerun the same command to resume from {output}.part.state", file=sys.stderr)
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print(f"\nInterrupted; rerun the same command to resume from {output}.part.state", file=sys.stderr)
+        sys.exit(130)
+    print(json.dumps(result, ensure_ascii=False))
+    print(f"FILE_PATH={result['path']}", file=sys.stderr)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Query metafs-indexer: user info or file metadata."
@@ -94,12 +708,39 @@ def main() -> None:
     g.add_argument("--address", help="User address")
     g.add_argument("--metaid", help="User metaid or globalMetaId (for /api/info/metaid)")
     g.add_argument("--globalmetaid", help="User globalMetaID")
+    add_cache_options(user_p)
     user_p.set_defaults(func=cmd_user)
 
     file_p = sub.add_parser("file", help="Query file metadata by pinid")
     file_p.add_argument("--pinid", required=True, help="File PIN ID")
+    add_cache_options(file_p)
     file_p.set_defaults(func=cmd_file)
 
+    batch_p = sub.add_parser("batch", help="Resolve many users/files concurrently (NDJSON, per-item errors)")
+    add_key_options(batch_p)
+    batch_p.add_argument("--input", metavar="FILE", help="Keys as <type>:<value> lines, e.g. address:1A1z...; - for stdin")
+    batch_p.add_argument("--workers", type=int, default=BATCH_WORKERS,
+                         help=f"Concurrent requests / pooled connections (default: {BATCH_WORKERS})")
+    add_cache_options(batch_p)
+    batch_p.set_defaults(func=cmd_batch)
+
+    purge_p = sub.add_parser("purge-cache", help="Remove expired entries from the response cache")
+    purge_p.add_argument("--ttl", type=float, default=DEFAULT_CACHE_TTL,
+                         help=f"Remove entries older than this many seconds (default: {DEFAULT_CACHE_TTL})")
+    purge_p.add_argument("--cache", default=CACHE_PATH, help=argparse.SUPPRESS)
+    purge_p.set_defaults(func=cmd_purge_cache)
+
+    dl_p = sub.add_parser("download", help="Download file content by pinid (parallel ranges, resumable)")
+    dl_p.add_argument("--pinid", required=True, help="File PIN ID")
+    dl_p.add_argument("--output", "-o", help="Output path (default: the pinid)")
+    dl_p.add_argument("--accelerate", action="store_true", help="Download via the accelerate (OSS) URL")
+    dl_p.add_argument("--connections", type=int, default=DOWNLOAD_CONNECTIONS,
+                      help=f"Concurrent range requests (default: {DOWNLOAD_CONNECTIONS})")
+    dl_p.add_argument("--segment-size", type=segment_size_bytes, default=DOWNLOAD_SEGMENT_SIZE,
+                      help=f"Segment size in MB (default: {DOWNLOAD_SEGMENT_SIZE // (1024 * 1024)})")
+    dl_p.add_argument("--no-resume", action="store_true", help="Ignore an existing .part.state and start over")
+    dl_p.set_defaults(func=cmd_download)
+
     args = parser.parse_args()
     args.func(args)
 
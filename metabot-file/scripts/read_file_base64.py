@@ -4,22 +4,46 @@ Read file and convert to base64 encoding.
 
 Usage:
     python read_file_base64.py <file_path>
+    python read_file_base64.py <file_path> --manifest [--workers N]
+    python read_file_base64.py <file_path> --verify <manifest.json>
+    python read_file_base64.py --self-test [--size 300M]
     
 Example:
     python read_file_base64.py res/file/image.png
+    python read_file_base64.py res/file/video.mp4 --manifest > video.manifest.json
 """
 
+import argparse
 import base64
+import hashlib
+import mmap
 import sys
 import os
 import json
 import mimetypes
+import shutil
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 
 
 # 5MB threshold for upload method selection
 UPLOAD_THRESHOLD_MB = 5
 UPLOAD_THRESHOLD_BYTES = UPLOAD_THRESHOLD_MB * 1024 * 1024  # 5,242,880 bytes
 
+# Streaming read size; a multiple of 3 so each block encodes to base64 without padding
+STREAM_BLOCK_SIZE = 3 * 256 * 1024  # 768 KB
+
+# OSS multipart part size used by metafs_chunked_upload.ts (MULTIPART_CHUNK_SIZE)
+OSS_PART_SIZE = 1 * 1024 * 1024  # 1MB
+# Whole-file hash is fed in slices this large so each update releases the GIL for long
+WHOLE_HASH_BLOCK_SIZE = 8 * 1024 * 1024
+# Read size for file_sha256
+HASH_BLOCK_SIZE = 1024 * 1024
+# File size streamed by --self-test and test_read_file_base64.py
+SELF_TEST_SIZE = 300 * 1024 * 1024
+
 
 def get_file_info(file_path):
     """
@@ -96,21 +120,314 @@ def read_file_as_base64(file_path):
     return result
 
 
+def write_file_as_base64(file_path, out, block_size=STREAM_BLOCK_SIZE):
+    """
+    Stream the same JSON document as read_file_as_base64 (indent=2) to out.
+
+    The file is read in fixed-size blocks and each block is base64-encoded and
+    written immediately, so peak memory is bounded by block_size regardless of
+    file size. The output is byte-identical to json.dumps(read_file_as_base64(...), indent=2).
+
+    Args:
+        file_path: Path to the file
+        out: Writable text stream (e.g. sys.stdout)
+        block_size: Bytes read per block; must be a multiple of 3
+
+    Returns:
+        Dictionary with file info and base64Length (without base64Content)
+    """
+    if block_size <= 0 or block_size % 3:
+        raise ValueError("block_size must be a positive multiple of 3")
+
+    file_info = get_file_info(file_path)
+    base64_length = 4 * ((file_info['fileSize'] + 2) // 3)
+
+    with open(file_path, 'rb') as f:
+        buf = bytearray(block_size)
+        view = memoryview(buf)
+        # Open and read the first block before writing anything, so a path that
+        # cannot be read (directory, permissions, I/O error) leaves out empty
+        n = f.readinto(buf)
+
+        start = out.tell() if out.seekable() else None
+        try:
+            out.write('{\n')
+            for key, value in file_info.items():
+                out.write(f'  {json.dumps(key)}: {json.dumps(value)},\n')
+            out.write('  "base64Content": "')
+            total = 0
+            while n:
+                # Only the final block can be short, so padding only appears at the end
+                out.write(base64.b64encode(view[:n]).decode('ascii'))
+                total += n
+                n = f.readinto(buf)
+            if total != file_info['fileSize']:
+                raise OSError(f"File changed while reading: expected {file_info['fileSize']} bytes, read {total}")
+        except BaseException:
+            # Drop the partial document where the stream allows it (see emit_file_as_base64)
+            if start is not None:
+                out.seek(start)
+                out.truncate()
+            raise
+    out.write(f'",\n  "base64Length": {base64_length}\n}}')
+
+    return {**file_info, 'base64Length': base64_length}
+
+
+def emit_file_as_base64(file_path, out, block_size=STREAM_BLOCK_SIZE):
+    """
+    write_file_as_base64, but out receives nothing at all if reading fails.
+
+    A seekable out (a file stdout is redirected to) is written directly and
+    truncated back on error. Anything else (a pipe, a terminal) is fed from a
+    temporary file once the whole document has been written, so a consumer
+    never sees half a JSON document. Memory stays bounded by block_size.
+
+    Returns:
+        Same as write_file_as_base64
+    """
+    if out.seekable():
+        return write_file_as_base64(file_path, out, block_size)
+    with tempfile.TemporaryFile('w+', encoding='utf-8') as spool:
+        result = write_file_as_base64(file_path, spool, block_size)
+        spool.seek(0)
+        shutil.copyfileobj(spool, out, block_size)
+    return result
+
+
+def parse_size(text):
+    """Parse a size such as 64M, 512K or 1G into bytes."""
+    units = {'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+    text = text.strip().upper()
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+def run_self_test(size=SELF_TEST_SIZE, block_size=STREAM_BLOCK_SIZE):
+    """
+    Check that streaming keeps memory bounded and matches the in-memory output.
+
+    Streams a temporary file of `size` bytes to os.devnull under tracemalloc and
+    compares the peak with the file size; a small file is also checked to be
+    byte-identical to json.dumps(read_file_as_base64(...), indent=2).
+
+    Returns:
+        Dictionary with the measurements and 'ok'
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        small = os.path.join(tmp, 'small.bin')
+        with open(small, 'wb') as f:
+            f.write(os.urandom(3 * block_size + 1))
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as streamed:
+            write_file_as_base64(small, streamed, block_size)
+            streamed.seek(0)
+            identical = streamed.read() == json.dumps(read_file_as_base64(small), indent=2)
+
+        large = os.path.join(tmp, 'large.bin')
+        with open(large, 'wb') as f:
+            chunk = os.urandom(1024 * 1024)
+            for _ in range(size // len(chunk)):
+                f.write(chunk)
+            f.write(chunk[:size % len(chunk)])
+
+        with open(os.devnull, 'w') as sink:
+            tracemalloc.start()
+            start = time.perf_counter()
+            write_file_as_base64(large, sink, block_size)
+            seconds = time.perf_counter() - start
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+    # One read buffer plus one encoded block (4/3 of it) and its str copy
+    limit = 4 * block_size
+    return {
+        'fileSize': size,
+        'blockSize': block_size,
+        'peakTracedBytes': peak,
+        'peakLimitBytes': limit,
+        'seconds': round(seconds, 3),
+        'identicalToInMemory': identical,
+        'ok': identical and peak <= limit,
+    }
+
+
+def file_sha256(file_path, block_size=HASH_BLOCK_SIZE):
+    """SHA-256 of a file, read in fixed-size blocks (used by plan_upload.py and upload_ledger.py)."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_chunk_manifest(file_path, part_size=OSS_PART_SIZE, workers=None):
+    """
+    Build a chunk manifest: per-part SHA-256 and offsets plus a whole-file SHA-256.
+
+    The file is memory-mapped and parts are hashed in a thread pool; hashlib
+    releases the GIL while hashing, so threads run in parallel. The whole-file
+    hash is computed concurrently in its own thread.
+
+    Args:
+        file_path: Path to the file
+        part_size: Part size in bytes (default: 1MB, the OSS multipart part size)
+        workers: Hashing threads (default: CPU count)
+
+    Returns:
+        Dictionary with file info, sha256, partSize, partCount and parts
+        (partNumber is 1-based, matching OSS part numbers)
+    """
+    if part_size <= 0:
+        raise ValueError("part_size must be positive")
+
+    file_info = get_file_info(file_path)
+    file_size = file_info['fileSize']
+    workers = workers or os.cpu_count() or 1
+
+    if file_size == 0:
+        return {
+            **file_info,
+            'sha256': hashlib.sha256().hexdigest(),
+            'partSize': part_size,
+            'partCount': 0,
+            'parts': [],
+        }
+
+    offsets = range(0, file_size, part_size)
+
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        def hash_part(offset):
+            end = min(offset + part_size, file_size)
+            with memoryview(mm) as view, view[offset:end] as part:
+                return hashlib.sha256(part).hexdigest()
+
+        def hash_whole():
+            digest = hashlib.sha256()
+            with memoryview(mm) as view:
+                for offset in range(0, file_size, WHOLE_HASH_BLOCK_SIZE):
+                    with view[offset:offset + WHOLE_HASH_BLOCK_SIZE] as block:
+                        digest.update(block)
+            return digest.hexdigest()
+
+        with ThreadPoolExecutor(max_workers=workers + 1) as pool:
+            whole = pool.submit(hash_whole)
+            part_hashes = list(pool.map(hash_part, offsets))
+            file_hash = whole.result()
+
+    parts = [
+        {
+            'partNumber': i + 1,
+            'offset': offset,
+            'size': min(part_size, file_size - offset),
+            'sha256': part_hash,
+        }
+        for i, (offset, part_hash) in enumerate(zip(offsets, part_hashes))
+    ]
+    return {
+        **file_info,
+        'sha256': file_hash,
+        'partSize': part_size,
+        'partCount': len(parts),
+        'parts': parts,
+    }
+
+
+def diff_manifests(expected, actual):
+    """
+    Compare two chunk manifests.
+
+    Returns:
+        List of partNumbers whose offset, size or hash differ (or that exist in
+        only one manifest); empty if the manifests describe identical content.
+    """
+    expected_parts = {p['partNumber']: p for p in expected.get('parts', [])}
+    actual_parts = {p['partNumber']: p for p in actual.get('parts', [])}
+    mismatched = []
+    for number in sorted(expected_parts.keys() | actual_parts.keys()):
+        a = expected_parts.get(number)
+        b = actual_parts.get(number)
+        if not a or not b or (a['offset'], a['size'], a['sha256']) != (b['offset'], b['size'], b['sha256']):
+            mismatched.append(number)
+    return mismatched
+
+
 def main():
-    if len(sys.argv) < 2:
+    parser = argparse.ArgumentParser(
+        description="Read a file as base64 JSON, or build/verify a chunk manifest."
+    )
+    parser.add_argument("file_path", nargs="?", help="Path to the file")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--manifest", action="store_true",
+                      help="Output a chunk manifest (per-part and whole-file SHA-256) instead of base64")
+    mode.add_argument("--verify", metavar="MANIFEST",
+                      help="Check the file against a manifest; exit 1 and list mismatched parts if it differs")
+    mode.add_argument("--self-test", action="store_true",
+                      help="Check that base64 streaming keeps memory bounded (tracemalloc) and output unchanged")
+    parser.add_argument("--workers", type=int, default=None, help="Hashing threads (default: CPU count)")
+    parser.add_argument("--size", default="300M", help="File size for --self-test, e.g. 300M (default: 300M)")
+    args = parser.parse_args()
+
+    if args.self_test:
+        result = run_self_test(parse_size(args.size))
+        print(json.dumps(result, indent=2))
+        if not result['ok']:
+            print("❌ Self-test failed", file=sys.stderr)
+            sys.exit(1)
+        print(f"✅ Peak traced memory {result['peakTracedBytes']:,} bytes for a "
+              f"{result['fileSize']:,}-byte file", file=sys.stderr)
+        return
+
+    if not args.file_path:
         print("Error: File path required", file=sys.stderr)
         print("\nUsage: python read_file_base64.py <file_path>", file=sys.stderr)
         print("\nExample:", file=sys.stderr)
         print("  python read_file_base64.py res/file/image.png", file=sys.stderr)
         sys.exit(1)
     
-    file_path = sys.argv[1].strip()
+    file_path = args.file_path.strip()
+
+    if args.manifest or args.verify:
+        try:
+            if args.verify:
+                with open(args.verify, encoding='utf-8') as f:
+                    expected = json.load(f)
+                part_size = expected.get('partSize', OSS_PART_SIZE)
+            else:
+                part_size = OSS_PART_SIZE
+            manifest = build_chunk_manifest(file_path, part_size, args.workers)
+        except FileNotFoundError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            sys.exit(1)
+        except (OSError, ValueError) as e:
+            print(f"Error reading file: {e}", file=sys.stderr)
+            sys.exit(1)
+
+        if args.manifest:
+            print(json.dumps(manifest, indent=2))
+            print(f"\n✅ Manifest: {manifest['partCount']} parts of {manifest['partSize']:,} bytes", file=sys.stderr)
+            print(f"🔐 SHA-256: {manifest['sha256']}", file=sys.stderr)
+            return
+
+        mismatched = diff_manifests(expected, manifest)
+        ok = not mismatched and expected.get('sha256') == manifest['sha256']
+        print(json.dumps({
+            'match': ok,
+            'sha256': manifest['sha256'],
+            'expectedSha256': expected.get('sha256'),
+            'mismatchedParts': mismatched,
+        }, separators=(',', ':')))
+        if not ok:
+            print(f"❌ File does not match manifest ({len(mismatched)} parts differ)", file=sys.stderr)
+            sys.exit(1)
+        print("✅ File matches manifest", file=sys.stderr)
+        return
     
     try:
-        result = read_file_as_base64(file_path)
-        
-        # Print result as JSON
-        print(json.dumps(result, indent=2))
+        # Stream the JSON result to stdout without holding the file in memory
+        result = emit_file_as_base64(file_path, sys.stdout)
+        sys.stdout.write('\n')
+        sys.stdout.flush()
         
         # Print summary to stderr for user visibility
         print(f"\n✅ File read successfully", file=sys.stderr)
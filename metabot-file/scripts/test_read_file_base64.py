@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Regression tests for read_file_base64.py streaming.
+
+Usage:
+    python -m pytest test_read_file_base64.py
+    python test_read_file_base64.py
+"""
+
+import errno
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+import unittest
+from unittest import mock
+
+import read_file_base64
+from read_file_base64 import (
+    SELF_TEST_SIZE,
+    STREAM_BLOCK_SIZE,
+    emit_file_as_base64,
+    read_file_as_base64,
+    write_file_as_base64,
+)
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'read_file_base64.py')
+# One read buffer plus one encoded block and its str copy; measured peak is ~2.9MB
+PEAK_LIMIT_BYTES = int(3.1 * 1024 * 1024)
+
+
+class PipeOutput(io.StringIO):
+    """Text stream that cannot seek, like stdout on a pipe."""
+
+    def seekable(self):
+        return False
+
+
+class FailingFile:
+    """Binary file whose readinto raises EIO after `blocks` successful reads."""
+
+    def __init__(self, f, blocks):
+        self.f = f
+        self.blocks = blocks
+
+    def readinto(self, buf):
+        if not self.blocks:
+            raise OSError(errno.EIO, 'Input/output error')
+        self.blocks -= 1
+        return self.f.readinto(buf)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.f.close()
+
+
+class StreamingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def make_file(self, name, size, random=True):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, 'wb') as f:
+            if random:
+                f.write(os.urandom(size))
+            else:
+                f.truncate(size)
+        return path
+
+    def failing_open(self, blocks):
+        real_open = open
+        return mock.patch.object(read_file_base64, 'open', create=True,
+                                 new=lambda path, mode: FailingFile(real_open(path, mode), blocks))
+
+    def test_output_matches_in_memory_json(self):
+        path = self.make_file('small.bin', 3 * STREAM_BLOCK_SIZE + 1)
+        out = io.StringIO()
+        write_file_as_base64(path, out)
+        self.assertEqual(out.getvalue(), json.dumps(read_file_as_base64(path), indent=2))
+
+    def test_peak_memory_is_bounded_for_large_file(self):
+        path = self.make_file('large.bin', SELF_TEST_SIZE, random=False)
+        with open(os.devnull, 'w') as sink:
+            tracemalloc.start()
+            try:
+                result = write_file_as_base64(path, sink)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+        self.assertEqual(result['fileSize'], SELF_TEST_SIZE)
+        self.assertLessEqual(peak, PEAK_LIMIT_BYTES)
+
+    def test_read_error_midway_leaves_seekable_output_empty(self):
+        path = self.make_file('mid.bin', 4 * STREAM_BLOCK_SIZE)
+        with tempfile.TemporaryFile('w+', encoding='utf-8') as out:
+            with self.failing_open(blocks=2), self.assertRaises(OSError):
+                emit_file_as_base64(path, out)
+            out.seek(0)
+            self.assertEqual(out.read(), '')
+
+    def test_read_error_midway_leaves_pipe_output_empty(self):
+        path = self.make_file('mid.bin', 4 * STREAM_BLOCK_SIZE)
+        out = PipeOutput()
+        with self.failing_open(blocks=2), self.assertRaises(OSError):
+            emit_file_as_base64(path, out)
+        self.assertEqual(out.getvalue(), '')
+
+    def test_pipe_output_matches_in_memory_json(self):
+        path = self.make_file('small.bin', 2 * STREAM_BLOCK_SIZE + 2)
+        out = PipeOutput()
+        emit_file_as_base64(path, out)
+        self.assertEqual(out.getvalue(), json.dumps(read_file_as_base64(path), indent=2))
+
+    def test_file_shrinking_while_read_is_an_error(self):
+        path = self.make_file('shrink.bin', 4 * STREAM_BLOCK_SIZE)
+        real_open = open
+
+        def open_then_shrink(p, mode):
+            f = real_open(p, mode)
+            os.truncate(p, STREAM_BLOCK_SIZE)
+            return f
+
+        out = PipeOutput()
+        with mock.patch.object(read_file_base64, 'open', create=True, new=open_then_shrink):
+            with self.assertRaises(OSError):
+                emit_file_as_base64(path, out)
+        self.assertEqual(out.getvalue(), '')
+
+    def test_cli_unreadable_path_writes_nothing_to_stdout(self):
+        proc = subprocess.run([sys.executable, SCRIPT, self.tmp.name], capture_output=True, text=True)
+        self.assertEqual(proc.returncode, 1)
+        self.assertEqual(proc.stdout, '')
+        self.assertIn('Error', proc.stderr)
+
+
+if __name__ == '__main__':
+    unittest.main()
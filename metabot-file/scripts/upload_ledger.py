@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Content-addressed upload ledger: reuse existing pins instead of re-uploading.
+
+Each successful upload is recorded under the SHA-256 of the file content,
+together with pinId, indexTxId and viewUrls (as produced by
+monitor_task.format_task_result). Before uploading, `check` answers with an
+indexed lookup (SQLite primary key) whether the same content is already on chain.
+
+The ledger is a SQLite database in WAL mode, so several processes (e.g.
+different agents) can check and record at the same time.
+Path: METAFS_LEDGER_PATH, default ~/.cache/metabot-file/upload_ledger.sqlite3
+
+Usage:
+    python upload_ledger.py check <file_path>
+    python monitor_task.py <task_id> | python upload_ledger.py record <file_path>
+    python upload_ledger.py list [--limit N]
+    python upload_ledger.py forget <sha256>
+
+Exit codes (check): 0 = already uploaded (JSON on stdout), 1 = not in ledger.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from monitor_task import build_view_urls
+from read_file_base64 import file_sha256
+
+LEDGER_PATH = os.environ.get(
+    "METAFS_LEDGER_PATH",
+    os.path.join(os.path.expanduser("~"), ".cache", "metabot-file", "upload_ledger.sqlite3"),
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    sha256 TEXT PRIMARY KEY,
+    file_size INTEGER NOT NULL,
+    file_name TEXT,
+    pin_id TEXT NOT NULL,
+    index_tx_id TEXT,
+    task_id TEXT,
+    view_urls TEXT,
+    created_at INTEGER NOT NULL
+)
+"""
+
+
+def row_to_entry(row):
+    sha256, file_size, file_name, pin_id, index_tx_id, task_id, view_urls, created_at = row
+    return {
+        "sha256": sha256,
+        "fileSize": file_size,
+        "fileName": file_name,
+        "pinId": pin_id,
+        "indexTxId": index_tx_id,
+        "taskId": task_id,
+        "viewUrls": json.loads(view_urls) if view_urls else build_view_urls(index_tx_id, pin_id),
+        "createdAt": created_at,
+    }
+
+
+class UploadLedger:
+    """SQLite-backed map from content SHA-256 to the pin it was uploaded as."""
+
+    def __init__(self, path=LEDGER_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # timeout: wait for other writers instead of failing with "database is locked"
+        self.conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def lookup(self, sha256):
+        """Return the ledger entry for a content hash, or None."""
+        row = self.conn.execute(
+            "SELECT sha256, file_size, file_name, pin_id, index_tx_id, task_id, view_urls, created_at "
+            "FROM uploads WHERE sha256 = ?",
+            (sha256,),
+        ).fetchone()
+        return row_to_entry(row) if row else None
+
+    def record(self, sha256, file_size, file_name, result, replace=False):
+        """
+        Record an upload result for a content hash.
+
+        Args:
+            result: monitor_task.py output (pinId, indexTxId, viewUrls, taskId) or
+                    direct upload output (txId, pinId)
+            replace: Overwrite an existing entry (default keeps the first pin)
+
+        Returns:
+            The entry now stored for sha256
+        """
+        pin_id = result.get("pinId")
+        if not pin_id:
+            raise ValueError("Upload result has no pinId")
+        index_tx_id = result.get("indexTxId") or result.get("txId")
+        view_urls = result.get("viewUrls") or build_view_urls(index_tx_id, pin_id)
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        self.conn.execute(
+            f"{verb} INTO uploads "
+            "(sha256, file_size, file_name, pin_id, index_tx_id, task_id, view_urls, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (sha256, file_size, file_name, pin_id, index_tx_id, result.get("taskId"),
+             json.dumps(view_urls, separators=(',', ':')), int(time.time())),
+        )
+        return self.lookup(sha256)
+
+    def forget(self, sha256):
+        return self.conn.execute("DELETE FROM uploads WHERE sha256 = ?", (sha256,)).rowcount
+
+    def entries(self, limit=None):
+        sql = ("SELECT sha256, file_size, file_name, pin_id, index_tx_id, task_id, view_urls, created_at "
+               "FROM uploads ORDER BY created_at DESC")
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+        return [row_to_entry(row) for row in self.conn.execute(sql)]
+
+
+def cmd_check(args):
+    sha256 = file_sha256(args.file_path)
+    with UploadLedger(args.ledger) as ledger:
+        entry = ledger.lookup(sha256)
+    if not entry:
+        print(f"ℹ️  Not in ledger: {args.file_path} ({sha256[:16]}...)", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps({"found": True, **entry}, separators=(',', ':')))
+    print(f"♻️  Already uploaded as {entry['pinId']}", file=sys.stderr)
+
+
+def cmd_record(args):
+    raw = sys.stdin.read().strip()
+    if not raw:
+        print("Error: Upload result JSON required on stdin", file=sys.stderr)
+        sys.exit(1)
+    try:
+        # Tolerate progress lines before the final single-line JSON
+        result = json.loads(raw.splitlines()[-1])
+    except json.JSONDecodeError as e:
+        print(f"Error: Invalid upload result JSON: {e}", file=sys.stderr)
+        sys.exit(1)
+    if result.get("success") is False:
+        print("Error: Upload result is not successful; nothing recorded", file=sys.stderr)
+        sys.exit(1)
+
+    sha256 = file_sha256(args.file_path)
+    try:
+        with UploadLedger(args.ledger) as ledger:
+            entry = ledger.record(
+                sha256, os.path.getsize(args.file_path), os.path.basename(args.file_path),
+                result, replace=args.replace,
+            )
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(entry, separators=(',', ':')))
+    print(f"📒 Recorded {entry['pinId']} for {sha256[:16]}...", file=sys.stderr)
+
+
+def cmd_list(args):
+    with UploadLedger(args.ledger) as ledger:
+        for entry in ledger.entries(args.limit):
+            print(json.dumps(entry, ensure_ascii=False, separators=(',', ':')))
+
+
+def cmd_forget(args):
+    with UploadLedger(args.ledger) as ledger:
+        removed = ledger.forget(args.sha256)
+    print(json.dumps({"removed": removed}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Content-addressed upload dedup ledger.")
+    parser.add_argument("--ledger", default=LEDGER_PATH, help=f"Ledger database (default: {LEDGER_PATH})")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    check_p = sub.add_parser("check", help="Check whether a file's content was already uploaded")
+    check_p.add_argument("file_path", help="Local file")
+    check_p.set_defaults(func=cmd_check)
+
+    record_p = sub.add_parser("record", help="Record an upload result (JSON on stdin) for a file")
+    record_p.add_argument("file_path", help="Local file that was uploaded")
+    record_p.add_argument("--replace", action="store_true", help="Overwrite an existing entry")
+    record_p.set_defaults(func=cmd_record)
+
+    list_p = sub.add_parser("list", help="List recorded uploads (newest first)")
+    list_p.add_argument("--limit", type=int, default=None, help="Maximum entries")
+    list_p.set_defaults(func=cmd_list)
+
+    forget_p = sub.add_parser("forget", help="Remove an entry by content SHA-256")
+    forget_p.add_argument("sha256", help="Content SHA-256")
+    forget_p.set_defaults(func=cmd_forget)
+
+    args = parser.parse_args()
+    try:
+        args.func(args)
+    except FileNotFoundError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,10 @@
 # 6. 显示最终结果
 #
 # 使用方法:
-#   bash upload_with_balance_check.sh <file_path> [--agent <keyword>] [--account-index <n>]
+#   bash upload_with_balance_check.sh <file_path> [--agent <keyword>] [--account-index <n>] [--no-dedup]
+#
+# 上传前会按文件内容 SHA-256 查询本地上传账本(upload_ledger.py)，已上传过的相同内容直接复用原 PinID；
+# 传 --no-dedup 可强制重新上传。
 #
 # 示例:
 #   bash upload_with_balance_check.sh res/file/photo.jpg
@@ -29,6 +32,8 @@ METABOT_DIR="$PROJECT_ROOT/.claude/skills/metabot-basic"
 ACCOUNT_FILE="$PROJECT_ROOT/account.json"
 # 可选: 指定 agent 关键词或 account 索引（由本 skill 的 metafs_*.ts 解析）
 AGENT_ARGS=""
+# 是否查询/写入本地上传账本(相同内容复用已有 PinID)
+DEDUP=1
 
 # 颜色输出
 RED='\033[0;31m'
@@ -56,7 +61,7 @@ print_error() {
 
 # 解析参数: <file_path> [--agent <keyword>] [--account-index <n>]
 if [ $# -eq 0 ]; then
-    echo "用法: $0 <file_path> [--agent <keyword>] [--account-index <n>]"
+    echo "用法: $0 <file_path> [--agent <keyword>] [--account-index <n>] [--no-dedup]"
     echo ""
     echo "示例:"
     echo "  $0 res/file/photo.jpg"
@@ -75,6 +80,9 @@ while [ $# -gt 0 ]; do
     elif [ "$1" = "--account-index" ] && [ -n "${2:-}" ]; then
         AGENT_ARGS="$AGENT_ARGS --account-index $2"
         shift 2
+    elif [ "$1" = "--no-dedup" ]; then
+        DEDUP=0
+        shift
     else
         shift
     fi
@@ -149,6 +157,25 @@ print_success "上传方式: $uploadMethod"
 
 echo ""
 
+# 相同内容已上传过则直接复用（按文件内容 SHA-256 查本地账本）
+if [ "$DEDUP" = "1" ] && ledgerHit=$(python3 "$SCRIPT_DIR/upload_ledger.py" check "$FILE_PATH" 2>/dev/null); then
+    txId=$(echo "$ledgerHit" | jq -r '.indexTxId')
+    pinId=$(echo "$ledgerHit" | jq -r '.pinId')
+    print_success "相同内容已上传过，复用已有 PinID（传 --no-dedup 可强制重新上传）"
+    echo ""
+    echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+    echo "♻️  复用已有上传"
+    echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+    echo "文件名: $fileName"
+    echo "交易 ID: $txId"
+    echo "PinID: $pinId"
+    echo ""
+    echo "🔗 直接内容:"
+    echo "   $(echo "$ledgerHit" | jq -r '.viewUrls.content')"
+    echo "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
+    exit 0
+fi
+
 # === 步骤 3: 检查余额（本 skill 的 metafs_check_balance.ts）===
 print_info "步骤 3/6: 检查余额..."
 
@@ -209,6 +236,7 @@ if [ "$uploadMethod" == "direct" ]; then
     fi
     
     print_success "上传完成！"
+    ledgerRecord="$uploadJson"
     
 else
     # 分块上传：使用 metafs_chunked_upload.ts（OSS 分片 → estimate → merge 签名 → 预交易 → 提交 task，不传 content）
@@ -253,6 +281,13 @@ else
     pinId=$(echo "$result" | jq -r '.pinId')
     
     print_success "上传完成！"
+    ledgerRecord="$result"
+fi
+
+# 记录到本地上传账本，供之后相同内容的上传复用
+if [ "$DEDUP" = "1" ]; then
+    echo "$ledgerRecord" | python3 "$SCRIPT_DIR/upload_ledger.py" record "$FILE_PATH" > /dev/null 2>&1 \
+        || print_warning "写入上传账本失败（不影响本次上传结果）"
 fi
 
 echo ""
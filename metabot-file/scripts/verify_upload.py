@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Verify an uploaded file against the local original.
+
+Streams the content of a pin from the indexer (content or accelerate URL)
+and hashes it incrementally, without holding the file in memory. Content is
+compared part by part against a chunk manifest (read_file_base64.py --manifest),
+so a mismatch is reported as the first differing byte range. If no manifest is
+given, one is built from the local file.
+
+When the file has several parts and the server honours HTTP Range requests,
+parts are fetched and hashed concurrently; otherwise the content is streamed
+once in order.
+
+Usage:
+    python verify_upload.py <file_path> --pinid <pinId> [--accelerate] [--concurrency N]
+    python verify_upload.py --manifest video.manifest.json --pinid <pinId>
+    python monitor_task.py <task_id> | python verify_upload.py <file_path>
+
+Exit codes: 0 = content matches, 1 = mismatch or error.
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from query_indexer import content_url, new_session
+from read_file_base64 import OSS_PART_SIZE, build_chunk_manifest
+
+DEFAULT_CONCURRENCY = 8
+STREAM_BLOCK_SIZE = 64 * 1024
+REQUEST_TIMEOUT = 60
+
+
+class VerifyError(Exception):
+    """Content could not be fetched for verification."""
+
+
+def probe_ranges(session, url):
+    """
+    Check whether url serves byte ranges.
+
+    Returns:
+        (total size or None, final URL after redirects)
+    """
+    response = session.get(url, headers={'Range': 'bytes=0-0'}, stream=True, timeout=REQUEST_TIMEOUT)
+    try:
+        if response.status_code != 206:
+            return None, response.url
+        content_range = response.headers.get('Content-Range', '')
+        total = content_range.rpartition('/')[2]
+        return (int(total) if total.isdigit() else None), response.url
+    finally:
+        response.close()
+
+
+def mismatch_range(part):
+    return {
+        'partNumber': part['partNumber'],
+        'start': part['offset'],
+        'end': part['offset'] + part['size'] - 1,
+    }
+
+
+def verify_streaming(session, url, manifest):
+    """Fetch url once in order, hashing the whole content and each part as it streams."""
+    parts = manifest['parts']
+    whole = hashlib.sha256()
+    mismatched = []
+    received = 0
+    part_index = 0
+    part_hash = hashlib.sha256()
+    part_filled = 0
+
+    def finish_part():
+        nonlocal part_index, part_hash, part_filled
+        if part_index < len(parts) and part_hash.hexdigest() != parts[part_index]['sha256']:
+            mismatched.append(parts[part_index])
+        part_index += 1
+        part_hash = hashlib.sha256()
+        part_filled = 0
+
+    with session.get(url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        if response.status_code != 200:
+            raise VerifyError(f"HTTP {response.status_code} from {url}")
+        for block in response.iter_content(STREAM_BLOCK_SIZE):
+            whole.update(block)
+            received += len(block)
+            view = memoryview(block)
+            while view:
+                size = parts[part_index]['size'] if part_index < len(parts) else manifest['partSize']
+                take = min(len(view), size - part_filled)
+                part_hash.update(view[:take])
+                part_filled += take
+                view = view[take:]
+                if part_filled == size:
+                    finish_part()
+    if part_filled:
+        finish_part()
+    # Parts never received (content shorter than the local file) also mismatch
+    mismatched.extend(parts[part_index:])
+    return received, whole.hexdigest(), mismatched
+
+
+def verify_ranged(session, url, manifest, concurrency):
+    """Fetch each manifest part with a Range request, concurrently, and hash it."""
+
+    def fetch_part(part):
+        start, end = part['offset'], part['offset'] + part['size'] - 1
+        digest = hashlib.sha256()
+        received = 0
+        with session.get(url, headers={'Range': f'bytes={start}-{end}'}, stream=True,
+                         timeout=REQUEST_TIMEOUT) as response:
+            if response.status_code != 206:
+                raise VerifyError(f"HTTP {response.status_code} for range {start}-{end}")
+            for block in response.iter_content(STREAM_BLOCK_SIZE):
+                digest.update(block)
+                received += len(block)
+        return part, received, digest.hexdigest()
+
+    received = 0
+    mismatched = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for part, part_received, part_hash in pool.map(fetch_part, manifest['parts']):
+            received += part_received
+            if part_received != part['size'] or part_hash != part['sha256']:
+                mismatched.append(part)
+    return received, mismatched
+
+
+def verify_upload(pin_id, manifest, accelerate=False, concurrency=DEFAULT_CONCURRENCY, session=None):
+    """
+    Compare the content of pin_id with a chunk manifest.
+
+    Returns:
+        Report dict: match, mode, bytes, seconds, throughputMBps, firstMismatch, ...
+    """
+    session = session or new_session(concurrency)
+    url = content_url(pin_id, accelerate)
+    start = time.perf_counter()
+
+    total, final_url = (None, url)
+    if concurrency > 1 and manifest['partCount'] > 1:
+        total, final_url = probe_ranges(session, url)
+
+    actual_sha256 = None
+    if total is not None:
+        mode = 'ranged'
+        if total != manifest['fileSize']:
+            # Sizes differ: ranges past the shorter end cannot match, stream instead
+            mode = 'stream'
+    else:
+        mode = 'stream'
+
+    if mode == 'ranged':
+        received, mismatched = verify_ranged(session, final_url, manifest, concurrency)
+        size = total
+    else:
+        received, actual_sha256, mismatched = verify_streaming(session, final_url, manifest)
+        size = received
+
+    seconds = time.perf_counter() - start
+    size_match = size == manifest['fileSize']
+    hash_match = actual_sha256 is None or actual_sha256 == manifest['sha256']
+    match = size_match and hash_match and not mismatched
+    if mismatched:
+        first_mismatch = mismatch_range(mismatched[0])
+    elif not size_match:
+        # Common prefix matches; the first difference is where the shorter one ends
+        first_mismatch = {'partNumber': None, 'start': min(size, manifest['fileSize']),
+                          'end': max(size, manifest['fileSize']) - 1}
+    else:
+        first_mismatch = None
+    return {
+        'match': match,
+        'pinId': pin_id,
+        'url': url,
+        'mode': mode,
+        'expectedSize': manifest['fileSize'],
+        'actualSize': size,
+        'expectedSha256': manifest['sha256'],
+        # Ranged mode verifies part hashes only; the whole-file hash is implied by them
+        'actualSha256': actual_sha256 if mode == 'stream' else (manifest['sha256'] if match else None),
+        'partSize': manifest['partSize'],
+        'mismatchedParts': len(mismatched),
+        'firstMismatch': first_mismatch,
+        'bytes': received,
+        'seconds': round(seconds, 3),
+        'throughputMBps': round(received / (1024 * 1024) / seconds, 2) if seconds > 0 else None,
+    }
+
+
+def read_pin_id_from_stdin():
+    """pinId from monitor_task.py / metafs_direct_upload.ts JSON on stdin (last line)."""
+    raw = sys.stdin.read().strip()
+    if not raw:
+        return None
+    try:
+        return json.loads(raw.splitlines()[-1]).get('pinId')
+    except (json.JSONDecodeError, AttributeError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify uploaded content against a local file or manifest.")
+    parser.add_argument("file_path", nargs="?", help="Local original file")
+    parser.add_argument("--manifest", help="Chunk manifest (read_file_base64.py --manifest) instead of a file")
+    parser.add_argument("--pinid", help="PinID to verify (default: pinId of the upload result JSON on stdin)")
+    parser.add_argument("--accelerate", action="store_true", help="Fetch from the accelerate (OSS) URL")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Concurrent range requests; 1 streams in order (default: {DEFAULT_CONCURRENCY})")
+    args = parser.parse_args()
+
+    if not args.file_path and not args.manifest:
+        print("Error: File path or --manifest required", file=sys.stderr)
+        sys.exit(1)
+    if args.concurrency <= 0:
+        print("Error: --concurrency must be positive", file=sys.stderr)
+        sys.exit(1)
+
+    pin_id = args.pinid or read_pin_id_from_stdin()
+    if not pin_id:
+        print("Error: --pinid required (or upload result JSON with pinId on stdin)", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        if args.manifest:
+            with open(args.manifest, encoding='utf-8') as f:
+                manifest = json.load(f)
+        else:
+            manifest = build_chunk_manifest(args.file_path, OSS_PART_SIZE)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    try:
+        report = verify_upload(pin_id, manifest, args.accelerate, args.concurrency)
+    except (VerifyError, requests.exceptions.RequestException) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        print(json.dumps({'match': False, 'pinId': pin_id, 'error': str(e)}, separators=(',', ':')))
+        sys.exit(1)
+
+    print(json.dumps(report, separators=(',', ':')))
+    print(f"\n📥 {report['bytes']:,} bytes in {report['seconds']}s "
+          f"({report['throughputMBps']} MB/s, {report['mode']})", file=sys.stderr)
+    if report['match']:
+        print("✅ Uploaded content matches the local file", file=sys.stderr)
+        return
+    first = report['firstMismatch']
+    if first and first['partNumber']:
+        print(f"❌ Content differs: first mismatch in part {first['partNumber']} "
+              f"(bytes {first['start']}-{first['end']}), {report['mismatchedParts']} parts differ", file=sys.stderr)
+    else:
+        print(f"❌ Content differs: size {report['actualSize']:,} vs expected {report['expectedSize']:,}",
+              file=sys.stderr)
+    sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()